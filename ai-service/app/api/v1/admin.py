@@ -0,0 +1,97 @@
+"""
+管理员 API 端点
+
+提供线上性能剖析接口（仅管理员）：
+- 按需采样剖析，导出 collapsed stacks / speedscope JSON
+- 最近的慢请求及其各阶段耗时
+- 最近的事件循环阻塞及当时的调用栈
+
+数据只针对处理该请求的 worker 进程，多 worker 部署时需多次请求或直连指定 worker。
+"""
+
+import os
+import threading
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.config import settings
+from app.middleware.auth import require_admin
+from app.services.profiling import (
+    ProfilerBusyError,
+    get_loop_block_monitor,
+    get_profiler,
+    get_slow_request_log,
+    to_collapsed,
+    to_speedscope,
+)
+
+router = APIRouter(prefix="/admin/profiling", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+    all_threads: bool = False,
+):
+    """
+    采样剖析
+
+    在后台线程中按 interval_ms 采样 seconds 秒，默认只采样事件循环线程；
+    all_threads=true 时包含线程池（motor、to_thread）等全部线程。
+    collapsed 格式可直接用于 flamegraph.pl 或拖入 speedscope。
+    """
+    if seconds > settings.profiling_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must not exceed {settings.profiling_max_seconds}",
+        )
+
+    interval = interval_ms / 1000
+    # 异步端点运行在事件循环线程上
+    thread_ids = None if all_threads else {threading.get_ident()}
+    try:
+        stacks = await get_profiler().profile(seconds, interval, thread_ids)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    name = f"ai-service pid={os.getpid()} {seconds}s"
+    if format == "speedscope":
+        return JSONResponse(
+            to_speedscope(stacks, interval, name),
+            headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'},
+        )
+    return PlainTextResponse(to_collapsed(stacks))
+
+
+@router.get("/slow-requests")
+async def slow_requests(limit: int = Query(20, ge=1, le=1000)):
+    """
+    最近的慢请求
+
+    返回超过 SLOW_REQUEST_THRESHOLD_SECONDS 的请求及其各阶段耗时（按开始时间排列）
+    """
+    requests = list(get_slow_request_log().requests)[-limit:]
+    return {
+        "pid": os.getpid(),
+        "threshold_seconds": settings.slow_request_threshold_seconds,
+        "requests": list(reversed(requests)),
+    }
+
+
+@router.get("/loop-blocks")
+async def loop_blocks(limit: int = Query(20, ge=1, le=1000)):
+    """
+    最近的事件循环阻塞
+
+    返回单个回调占用事件循环超过 LOOP_BLOCK_THRESHOLD_MS 的记录及当时的调用栈
+    """
+    blocks = list(get_loop_block_monitor().blocks)[-limit:]
+    return {
+        "pid": os.getpid(),
+        "threshold_ms": settings.loop_block_threshold_ms,
+        "blocks": list(reversed(blocks)),
+    }
@@ -4,7 +4,8 @@
 提供服务健康检查和依赖服务状态检查
 """
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
 from loguru import logger
 from typing import Dict, Any
 
@@ -28,12 +29,31 @@ async def health_check():
     }
 
 
+@router.get("/ready")
+async def readiness_check(request: Request):
+    """
+    就绪探针
+
+    启动预热完成、未在停机且 MongoDB / Redis 可用时返回 200，否则返回 503
+    （Kubernetes readinessProbe / 负载均衡健康检查使用）
+    """
+    services = getattr(request.app.state, "services", None)
+    if services is None:
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    ready, detail = await services.readiness()
+    return JSONResponse(
+        detail,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
 @router.get("/dependencies")
 async def check_dependencies():
     """
     依赖服务状态检查
 
-    检查 Qdrant、Redis、MongoDB 等依赖服务的连接状态
+    检查 Qdrant、Redis、MongoDB 等依赖服务的连接状态，并返回各依赖的熔断器状态
     """
     dependencies_status = {}
 
@@ -108,10 +128,36 @@ async def check_dependencies():
             "error": str(e),
         }
 
-    # 判断整体状态
-    all_healthy = all(dep.get("status") == "healthy" for dep in dependencies_status.values())
+    circuit_breakers = _attach_circuit_breakers(dependencies_status)
 
     return {
-        "status": "healthy" if all_healthy else "degraded",
+        "status": _overall_status(dependencies_status, circuit_breakers),
         "dependencies": dependencies_status,
+        "circuit_breakers": circuit_breakers,
     }
+
+
+def _attach_circuit_breakers(
+    dependencies_status: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """把熔断器状态附加到同名依赖，返回全部熔断器的状态"""
+    from app.services.circuit_breaker import get_circuit_breakers_status
+
+    circuit_breakers = get_circuit_breakers_status()
+    for name, breaker_status in circuit_breakers.items():
+        if name in dependencies_status:
+            dependencies_status[name]["circuit_breaker"] = breaker_status["state"]
+    return circuit_breakers
+
+
+def _overall_status(
+    dependencies_status: Dict[str, Dict[str, Any]],
+    circuit_breakers: Dict[str, Dict[str, Any]],
+) -> str:
+    """全部依赖健康且熔断器闭合时为 healthy，否则为 degraded"""
+    from app.services.circuit_breaker import CircuitState
+
+    all_healthy = all(
+        dep.get("status") == "healthy" for dep in dependencies_status.values()
+    ) and all(b["state"] == CircuitState.CLOSED for b in circuit_breakers.values())
+    return "healthy" if all_healthy else "degraded"
@@ -6,7 +6,9 @@
 
 from fastapi import APIRouter, Response
 
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.services.metrics_service import collect_metrics
 
 
 router = APIRouter(tags=["监控"])
@@ -17,12 +19,12 @@ async def metrics():
     """
     Prometheus metrics 端点
 
-    返回 Prometheus 格式的监控指标
+    返回 Prometheus 格式的监控指标，多 worker 部署时为所有 worker 的汇总
 
     Returns:
         Prometheus metrics 文本格式
     """
     return Response(
-        content=generate_latest(),
+        content=collect_metrics(),
         media_type=CONTENT_TYPE_LATEST,
     )
@@ -23,6 +23,7 @@ from app.models.rag_models import (
 )
 from app.services.rag_service import rag_service
 from app.services.deepseek_client import get_deepseek_client
+from app.services.http_client import request_deadline
 from app.config import settings
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
@@ -144,6 +145,8 @@ async def rag_query(request: RAGQueryRequest):
 
     检索相关知识后，使用 DeepSeek 生成回答
     """
+    # 检索和生成共享请求的时间预算
+    deadline = request_deadline()
     try:
         # 1. 检索相关文档
         results = await rag_service.search_by_text(
@@ -157,6 +160,8 @@ async def rag_query(request: RAGQueryRequest):
             response = await deepseek.chat(
                 messages=[{"role": "user", "content": request.question}],
                 temperature=request.temperature,
+                endpoint="rag_query",
+                deadline=deadline,
             )
             answer = response["content"]
         else:
@@ -186,6 +191,8 @@ async def rag_query(request: RAGQueryRequest):
                     {"role": "user", "content": request.question},
                 ],
                 temperature=request.temperature,
+                endpoint="rag_query",
+                deadline=deadline,
             )
             answer = response["content"]
 
@@ -1,15 +1,135 @@
 """
 日志配置模块
 
-使用 loguru 进行日志管理
+使用 loguru 进行日志管理：
+- 文本格式（开发）或 JSON 结构化格式（LOG_JSON=true，一行一条，便于 Loki / ELK 采集）
+- 写入在后台线程进行（LOG_ENQUEUE），请求路径上不做磁盘 / 终端 I/O
+- 每条日志自动携带 request_id（RequestContextMiddleware 设置）和 trace_id / span_id（启用追踪时）
+- 按模块对 DEBUG 及以下级别的高频日志采样（LOG_SAMPLING）
+
+热路径请使用惰性格式化，级别未启用时不会格式化消息，参数同时作为 JSON 字段输出：
+    logger.debug("Found {count} results", count=len(results))
+参数本身计算昂贵时：
+    logger.opt(lazy=True).debug("Stats: {stats}", stats=lambda: compute_stats())
 """
 
+import json
+import random
 import sys
+import traceback
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 from loguru import logger
 
 from app.core.config import settings
+from app.core.tracing import current_trace_ids
+
+# 当前请求 ID（由 RequestContextMiddleware 设置）
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# 采样丢弃标记（以下划线开头的 extra 字段不输出）
+_DROPPED = "_dropped"
+# INFO 及以上级别不采样
+_SAMPLED_MAX_LEVEL = 10
+
+
+def parse_sampling(spec: Optional[str]) -> Dict[str, float]:
+    """
+    解析按模块采样配置
+
+    Args:
+        spec: "模块前缀=比例,..."，如 "app.services.qdrant_service=0.01,app.services.cache_service=0.1"
+
+    Returns:
+        模块前缀 -> 保留比例
+
+    Raises:
+        ValueError: 格式错误或比例不在 [0, 1] 内
+    """
+    rates: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        module, _, rate = item.partition("=")
+        try:
+            value = float(rate)
+        except ValueError:
+            raise ValueError(f"Invalid log sampling rate: {item!r}")
+        if not module or not 0 <= value <= 1:
+            raise ValueError(f"Invalid log sampling rate: {item!r}")
+        rates[module.strip()] = value
+    return rates
+
+
+class RecordPatcher:
+    """
+    为每条日志补充请求上下文，并对配置的模块做采样
+
+    在调用方线程中执行，只做 contextvar 读取和一次随机数判断。
+    """
+
+    def __init__(self, sampling: Dict[str, float]):
+        # 最长前缀优先匹配
+        self.sampling = sorted(sampling.items(), key=lambda item: -len(item[0]))
+        self._rates: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        if name not in self._rates:
+            self._rates[name] = next(
+                (
+                    rate
+                    for prefix, rate in self.sampling
+                    if name == prefix or name.startswith(prefix + ".")
+                ),
+                None,
+            )
+        return self._rates[name]
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        extra = record["extra"]
+        current_request = request_id.get()
+        if current_request is not None:
+            extra.setdefault("request_id", current_request)
+        trace_id, span_id = current_trace_ids()
+        if trace_id is not None:
+            extra.setdefault("trace_id", trace_id)
+            extra.setdefault("span_id", span_id)
+
+        if self.sampling and record["level"].no <= _SAMPLED_MAX_LEVEL:
+            rate = self._rate(record["name"] or "")
+            if rate is not None and random.random() >= rate:
+                extra[_DROPPED] = True
+
+
+def not_dropped(record: Dict[str, Any]) -> bool:
+    """过滤掉被采样丢弃的日志"""
+    return _DROPPED not in record["extra"]
+
+
+def json_format(record: Dict[str, Any]) -> str:
+    """
+    JSON 格式（一行一条）
+
+    固定字段：time、level、logger、function、line、message；
+    extra 中的字段（bind 或日志参数）平铺输出，异常输出到 exception 字段。
+    """
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    for key, value in record["extra"].items():
+        if not key.startswith("_"):
+            payload.setdefault(key, value)
+    if record["exception"] is not None:
+        error_type, error, tb = record["exception"]
+        payload["exception"] = "".join(traceback.format_exception(error_type, error, tb))
+
+    record["extra"]["_json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
 
 
 def setup_logger() -> None:
@@ -17,55 +137,66 @@ def setup_logger() -> None:
     配置日志系统
 
     - 移除默认的 logger 配置
-    - 添加控制台输出
-    - 添加文件输出（按大小轮转）
-    - 根据环境变量设置日志级别
+    - 添加控制台输出，LOG_DIR 不为空时添加文件输出（按大小轮转）
+    - 根据环境变量设置日志级别、格式（文本 / JSON）、后台写入和采样
     """
     # 移除默认的 logger
     logger.remove()
+    logger.configure(patcher=RecordPatcher(parse_sampling(settings.log_sampling)))
+
+    log_format = json_format if settings.log_json else settings.log_format
 
     # 添加控制台输出
     logger.add(
         sys.stderr,
-        format=settings.log_format,
+        format=log_format,
         level=settings.log_level,
-        colorize=True,
+        filter=not_dropped,
+        colorize=not settings.log_json,
         backtrace=True,
         diagnose=True,
+        enqueue=settings.log_enqueue,
     )
 
-    # 创建日志目录
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-
-    # 添加文件输出 - 所有日志
-    logger.add(
-        log_dir / "app.log",
-        format=settings.log_format,
-        level=settings.log_level,
-        rotation=settings.log_rotation,
-        retention=settings.log_retention,
-        compression="zip",
-        backtrace=True,
-        diagnose=True,
-        enqueue=True,  # 异步写入
+    if settings.log_dir:
+        # 创建日志目录
+        log_dir = Path(settings.log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        # 添加文件输出 - 所有日志
+        logger.add(
+            log_dir / "app.log",
+            format=log_format,
+            level=settings.log_level,
+            filter=not_dropped,
+            rotation=settings.log_rotation,
+            retention=settings.log_retention,
+            compression="zip",
+            backtrace=True,
+            diagnose=True,
+            enqueue=True,  # 异步写入
+        )
+
+        # 添加文件输出 - 错误日志
+        logger.add(
+            log_dir / "error.log",
+            format=log_format,
+            level="ERROR",
+            rotation=settings.log_rotation,
+            retention=settings.log_retention,
+            compression="zip",
+            backtrace=True,
+            diagnose=True,
+            enqueue=True,
+        )
+
+    logger.info(
+        "Logger initialized: level={log_level}, json={json}, enqueue={enqueue}",
+        log_level=settings.log_level,
+        json=settings.log_json,
+        enqueue=settings.log_enqueue,
     )
-
-    # 添加文件输出 - 错误日志
-    logger.add(
-        log_dir / "error.log",
-        format=settings.log_format,
-        level="ERROR",
-        rotation=settings.log_rotation,
-        retention=settings.log_retention,
-        compression="zip",
-        backtrace=True,
-        diagnose=True,
-        enqueue=True,
-    )
-
-    logger.info(f"Logger initialized with level: {settings.log_level}")
-    logger.info(f"Environment: {settings.environment}")
+    logger.info("Environment: {environment}", environment=settings.environment)
 
 
 def get_logger(name: str):
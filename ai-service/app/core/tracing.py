@@ -0,0 +1,200 @@
+"""
+OpenTelemetry 链路追踪
+
+TRACING_ENABLED=true 时启用，依赖为可选安装：
+
+    pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-grpc \
+        opentelemetry-instrumentation-fastapi opentelemetry-instrumentation-httpx \
+        opentelemetry-instrumentation-pymongo opentelemetry-instrumentation-redis
+
+- 自动埋点：FastAPI 请求、httpx（DeepSeek / Embedding 的 OpenAI SDK 调用和 Qdrant REST）、
+  pymongo（motor）、redis
+- 手动 span：意图识别、RAG 检索、向量检索、Agent 各阶段和 LLM 调用，带 intent、top_k、
+  Token 数、缓存命中等属性
+- 导出：本地 OTLP collector（尾部采样在 collector 中配置）或 JSON Lines 文件（离线分析）
+
+未安装或未启用时 start_span / set_span_attributes 为空操作。
+"""
+
+import importlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover - 可选依赖
+    trace = None
+
+TRACER_NAME = "ai-service"
+
+_provider = None
+
+
+def _attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """过滤 None，非基本类型转为字符串（span 属性只支持基本类型）"""
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """
+    创建子 span 并设为当前 span（异常会记录到 span 并标记为错误）
+
+    Usage:
+        with start_span("rag.search", top_k=3):
+            ...
+
+    Args:
+        name: span 名称
+        attributes: span 属性，值为 None 的属性不记录
+
+    Yields:
+        span，未安装 OpenTelemetry 时为 None
+    """
+    if trace is None:
+        yield None
+        return
+
+    tracer = trace.get_tracer(TRACER_NAME)
+    with tracer.start_as_current_span(name, attributes=_attributes(attributes)) as span:
+        yield span
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """
+    在当前 span 上设置属性
+
+    Args:
+        attributes: span 属性，值为 None 的属性不记录
+    """
+    if trace is None:
+        return
+
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes(_attributes(attributes))
+
+
+def current_trace_ids() -> Tuple[Optional[str], Optional[str]]:
+    """
+    当前 span 的 trace_id / span_id（十六进制，用于日志关联）
+
+    Returns:
+        (trace_id, span_id)，未启用追踪或不在 span 内时为 (None, None)
+    """
+    if _provider is None:
+        return None, None
+
+    context = trace.get_current_span().get_span_context()
+    if not context.is_valid:
+        return None, None
+    return format(context.trace_id, "032x"), format(context.span_id, "016x")
+
+
+def configure_tracing() -> bool:
+    """
+    初始化 TracerProvider 并埋点 httpx、pymongo、redis
+
+    pymongo 埋点只对之后创建的客户端生效，须在导入 app.services（导入时创建 MongoDB 客户端）
+    之前调用。
+
+    Returns:
+        是否已启用
+    """
+    global _provider
+    if not settings.tracing_enabled or _provider is not None:
+        return _provider is not None
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("OpenTelemetry SDK not installed, tracing disabled")
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        # 上游已采样的请求跟随上游决定，根 span 按比例采样
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter()))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+
+    _instrument("opentelemetry.instrumentation.httpx", "HTTPXClientInstrumentor")
+    _instrument("opentelemetry.instrumentation.pymongo", "PymongoInstrumentor")
+    _instrument("opentelemetry.instrumentation.redis", "RedisInstrumentor")
+
+    logger.info(
+        f"Tracing enabled: exporter={settings.tracing_exporter}, "
+        f"sample_ratio={settings.tracing_sample_ratio}"
+    )
+    return True
+
+
+def instrument_app(app) -> None:
+    """
+    埋点 FastAPI 应用（/metrics 和健康检查不追踪）
+
+    Args:
+        app: FastAPI 应用
+    """
+    if _provider is None:
+        return
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    except ImportError:
+        logger.warning("opentelemetry-instrumentation-fastapi not installed, skipping")
+        return
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+
+
+def shutdown_tracing() -> None:
+    """导出剩余的 span 并关闭 TracerProvider"""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def _create_exporter():
+    """按配置创建 span 导出器"""
+    if settings.tracing_exporter == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        # 每行一个 span 的 JSON，便于离线分析
+        path = Path(settings.tracing_file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return ConsoleSpanExporter(
+            out=path.open("a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint, insecure=True)
+
+
+def _instrument(module_name: str, class_name: str) -> None:
+    """按需埋点第三方库，未安装对应的 instrumentation 包时跳过"""
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        logger.warning(f"{module_name} not installed, skipping instrumentation")
+        return
+    getattr(module, class_name)().instrument()
+
+
+# 导入时初始化（须早于 app.services 的导入）
+configure_tracing()
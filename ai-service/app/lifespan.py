@@ -0,0 +1,349 @@
+"""
+应用生命周期
+
+FastAPI lifespan 管理服务的启动和停机：
+- 启动：清理指标文件、创建 MongoDB 索引、启动后台刷写和过期消息桶清理任务；随后在后台预先建立连接池
+  （MongoDB、Redis、Qdrant）、预热 Embedding 模型和文章列表缓存，完成后就绪探针返回 200
+- 停机：收到 SIGTERM 后就绪探针立即返回 503，新请求返回 503 并关闭连接，继续服务
+  SHUTDOWN_DRAIN_DELAY_SECONDS 秒让负载均衡摘除实例，再交给 uvicorn 停止接受连接；
+  随后等待进行中的请求（含流式响应）完成，刷写未落库的消息和浏览量，最后关闭全部客户端
+
+服务实例不由容器构建：它们在导入时创建为模块级单例，路由、Agent 和测试都直接引用，
+改为在 start() 中构建需要改动全部调用方。ServiceContainer 只持有这些实例，统一管理
+它们的连接、后台任务和关闭。
+"""
+
+import asyncio
+import os
+import signal
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import FastAPI
+from loguru import logger
+
+from app.config import settings
+from app.core.tracing import shutdown_tracing
+from app.services.ai_service import ai_service
+from app.services.article_service import article_service
+from app.services.conversation_service import conversation_service
+from app.services.deepseek_client import get_deepseek_client
+from app.services.embedding_service import get_embedding_service
+from app.services.http_client import close_http_client, get_http_client
+from app.services.metrics_service import cleanup_dead_workers, mark_worker_dead
+from app.services.mongo_indexes import ensure_indexes
+from app.services.profiling import get_loop_block_monitor
+from app.services.qdrant_service import get_qdrant_service
+from app.services.rag_service import rag_service
+from app.services.redis_service import get_redis_service
+from app.services.summary_service import close_conversation_summarizer
+
+CHECK_OK = "ok"
+
+
+class RequestTracker:
+    """进行中的请求计数，停机时等待归零"""
+
+    def __init__(self):
+        self.active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self) -> None:
+        self.active += 1
+        self._idle.clear()
+
+    def exit(self) -> None:
+        self.active -= 1
+        if self.active == 0:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """
+        等待进行中的请求全部完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否在超时前完成
+        """
+        if self.active == 0:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class ServiceContainer:
+    """
+    服务容器
+
+    持有各服务实例（导入时创建的单例，容器不负责构建），负责启动时预先建立连接、预热，
+    以及停机时的排空和关闭。
+    """
+
+    # 就绪必需的依赖（其余依赖有熔断降级，失败时不影响就绪）
+    REQUIRED = ("mongodb", "redis")
+
+    def __init__(self):
+        self.conversations = conversation_service
+        self.articles = article_service
+        self.rag = rag_service
+        self.ai = ai_service
+        self.redis = get_redis_service()
+        self.qdrant = get_qdrant_service()
+        self.embedding = get_embedding_service()
+        self.deepseek = get_deepseek_client()
+        self.http_client = get_http_client()
+
+        self.requests = RequestTracker()
+        # 依赖名 -> "ok" 或错误描述
+        self.checks: Dict[str, str] = {}
+        self.started = False
+        self.draining = False
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._purge_task: Optional[asyncio.Task] = None
+        self._exit_handle: Optional[asyncio.TimerHandle] = None
+
+    async def start(self) -> None:
+        """启动后台任务，并在后台建立连接和预热（不阻塞服务开始接受请求）"""
+        # 多进程指标模式下清理上次异常退出的 worker 遗留的仪表文件
+        cleanup_dead_workers()
+
+        try:
+            await ensure_indexes(self.conversations.db)
+        except Exception as e:
+            logger.warning(f"Failed to ensure MongoDB indexes: {e}")
+
+        if self.conversations.write_behind:
+            await self.conversations.write_behind.start()
+        self.articles.views.start()
+        if settings.conversation_ttl_days > 0:
+            self._purge_task = asyncio.create_task(self._purge_expired_buckets())
+
+        if settings.loop_block_threshold_ms > 0:
+            get_loop_block_monitor().start()
+
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+        self._install_drain_handler()
+
+    def _install_drain_handler(self) -> None:
+        """
+        接管 SIGTERM：先进入排空状态，延迟后再触发 uvicorn 的正常停机
+
+        uvicorn 收到 SIGTERM 会立即关闭监听，lifespan 停机时已不再有新请求，
+        因此排空状态必须在信号到达时设置。
+        """
+        if settings.shutdown_drain_delay_seconds <= 0:
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._on_sigterm)
+        except (NotImplementedError, RuntimeError, ValueError) as e:
+            # 非主线程或不支持信号的平台（如测试、Windows）
+            logger.debug(f"SIGTERM drain handler not installed: {e}")
+
+    def _on_sigterm(self) -> None:
+        """进入排空状态，延迟后向自身发送 SIGINT 触发 uvicorn 停机；再次收到 SIGTERM 时立即停机"""
+        if self.draining:
+            if self._exit_handle:
+                self._exit_handle.cancel()
+            self._exit()
+            return
+
+        self.draining = True
+        logger.info(
+            f"SIGTERM received, draining for {settings.shutdown_drain_delay_seconds}s "
+            f"with {self.requests.active} requests in flight"
+        )
+        self._exit_handle = asyncio.get_running_loop().call_later(
+            settings.shutdown_drain_delay_seconds, self._exit
+        )
+
+    def _exit(self) -> None:
+        self._exit_handle = None
+        # uvicorn 对首个 SIGINT 执行正常停机（关闭监听、等待连接完成、lifespan 停机）
+        os.kill(os.getpid(), signal.SIGINT)
+
+    async def _purge_expired_buckets(self) -> None:
+        """定期删除会话头已过期的消息桶"""
+        while True:
+            await asyncio.sleep(settings.conversation_purge_interval_seconds)
+            try:
+                # 逐批检查，直到没有剩余的候选桶（某一批清理 0 个不代表后面没有）
+                _, after = await self.conversations.purge_expired_buckets()
+                while after is not None:
+                    _, after = await self.conversations.purge_expired_buckets(after)
+            except Exception as e:
+                logger.warning(f"Expired bucket purge failed: {e}")
+
+    async def _warm_up(self) -> None:
+        """预先建立连接池，预热 Embedding 模型和热点缓存，完成（或超时）后标记为已启动"""
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._run_warm_up(), settings.startup_warmup_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Startup warm-up timed out after {settings.startup_warmup_timeout_seconds}s"
+            )
+            for name, result in self.checks.items():
+                if result in ("pending", "cancelled"):
+                    self.checks[name] = "timeout"
+        self.started = True
+        logger.info(
+            "Startup finished in {elapsed:.2f}s: {checks}",
+            elapsed=time.perf_counter() - start_time,
+            checks=self.checks,
+        )
+
+    async def _run_warm_up(self) -> None:
+        await asyncio.gather(
+            self._check("mongodb", self._open_mongodb),
+            self._check("redis", self._open_redis),
+            self._check("qdrant", self._open_qdrant),
+        )
+        if settings.startup_warmup_enabled:
+            await asyncio.gather(
+                self._check("embedding", self.embedding.warm_up),
+                self._check("article_cache", self.articles.warm_listings),
+            )
+
+    async def _check(self, name: str, step: Callable[[], Awaitable[Any]]) -> bool:
+        """执行一个启动步骤并记录结果"""
+        self.checks[name] = "pending"
+        try:
+            await step()
+        except asyncio.CancelledError:
+            self.checks[name] = "cancelled"
+            raise
+        except Exception as e:
+            self.checks[name] = f"error: {e}"
+            logger.warning(f"Startup step {name} failed: {e}")
+            return False
+        self.checks[name] = CHECK_OK
+        return True
+
+    async def _open_mongodb(self) -> None:
+        """两个服务各自的连接池并发 ping，预先建立连接"""
+        clients = (self.conversations.client, self.articles.mongo_client)
+        await asyncio.gather(
+            *(
+                client.admin.command("ping")
+                for client in clients
+                for _ in range(max(1, settings.startup_preopen_connections))
+            )
+        )
+
+    async def _open_redis(self) -> None:
+        """共享 Redis 客户端和文章服务的 Redis 客户端并发 ping，预先建立连接"""
+        await self.redis.connect()
+        clients = (self.redis.client, self.articles.redis)
+        await asyncio.gather(
+            *(
+                client.ping()
+                for client in clients
+                for _ in range(max(1, settings.startup_preopen_connections))
+            )
+        )
+
+    async def _open_qdrant(self) -> None:
+        # 同步客户端，在线程中连接
+        await asyncio.to_thread(self.qdrant.list_collections)
+
+    async def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        就绪状态：启动完成、未在停机，且必需依赖可用
+
+        启动时失败的必需依赖在探测时重试，依赖恢复后自动就绪。
+
+        Returns:
+            (是否就绪, 状态详情)
+        """
+        if self.draining:
+            return False, {"status": "draining", "in_flight": self.requests.active}
+        if not self.started:
+            return False, {"status": "starting", "checks": dict(self.checks)}
+
+        openers = {"mongodb": self._open_mongodb, "redis": self._open_redis}
+        for name in self.REQUIRED:
+            if self.checks.get(name) != CHECK_OK:
+                await self._check(name, openers[name])
+
+        ready = all(self.checks.get(name) == CHECK_OK for name in self.REQUIRED)
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checks": dict(self.checks),
+            "in_flight": self.requests.active,
+        }
+
+    async def stop(self) -> None:
+        """排空进行中的请求，刷写缓冲数据，关闭全部客户端"""
+        self.draining = True
+        if self._exit_handle:
+            self._exit_handle.cancel()
+        if self._warm_up_task and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+            await asyncio.gather(self._warm_up_task, return_exceptions=True)
+
+        if not await self.requests.wait_idle(settings.shutdown_drain_timeout_seconds):
+            logger.warning(
+                f"Shutdown drain timed out, {self.requests.active} requests still in flight"
+            )
+
+        # 先停止后台任务并刷写缓冲数据，再关闭其依赖的连接
+        steps = [
+            ("bucket_purge", self._stop_purge),
+            ("loop_block_monitor", get_loop_block_monitor().stop),
+            ("summarizer", close_conversation_summarizer),
+            ("write_behind", self._close_write_behind),
+            ("articles", self.articles.close),
+            ("redis", self.redis.disconnect),
+            ("article_redis", self.articles.redis.aclose),
+            ("mongodb", self._close_mongodb),
+            ("qdrant", lambda: asyncio.to_thread(self.qdrant.close)),
+            ("http_client", close_http_client),
+        ]
+        for name, step in steps:
+            try:
+                await step()
+            except Exception as e:
+                logger.warning(f"Shutdown step {name} failed: {e}")
+
+        shutdown_tracing()
+        mark_worker_dead()
+        logger.info("Shutdown complete")
+        # 等待后台线程写完剩余日志
+        await logger.complete()
+
+    async def _stop_purge(self) -> None:
+        if self._purge_task:
+            self._purge_task.cancel()
+            await asyncio.gather(self._purge_task, return_exceptions=True)
+
+    async def _close_write_behind(self) -> None:
+        if self.conversations.write_behind:
+            await self.conversations.write_behind.close()
+
+    async def _close_mongodb(self) -> None:
+        self.conversations.client.close()
+        self.articles.mongo_client.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    FastAPI lifespan：创建服务容器（app.state.services），启动并在停机时关闭
+
+    Args:
+        app: FastAPI 应用
+    """
+    container = ServiceContainer()
+    app.state.services = container
+    await container.start()
+    try:
+        yield
+    finally:
+        await container.stop()
@@ -7,15 +7,26 @@ AI 服务的主入口文件
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
+
+# 日志须最先初始化（级别、格式、后台写入）
+from app.core import logger as _logger  # noqa: F401
+
+# 追踪须在导入服务模块（创建 MongoDB 客户端）之前初始化
+from app.core.tracing import instrument_app
 from app.routers import ai_router, education_router
+from app.middleware.drain_middleware import DrainMiddleware
 from app.middleware.metrics_middleware import MetricsMiddleware
-from app.api.v1 import metrics, rag, agent, health
+from app.middleware.request_context import RequestContextMiddleware
+from app.api.v1 import admin, metrics, rag, agent, health
 from app.config import settings
+from app.lifespan import lifespan
 
 app = FastAPI(
     title="智慧慢病管理系统 - AI 服务",
     description="提供 RAG 知识库检索、AI 对话、辅助诊断等功能",
     version="0.1.0",
+    # 启动预热、就绪状态和停机排空见 app/lifespan.py
+    lifespan=lifespan,
 )
 
 # 配置 HTTPBearer 安全方案（用于 Swagger UI）
@@ -41,9 +52,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 停机排空（统计进行中的请求）
+app.add_middleware(DrainMiddleware)
+
 # 监控中间件
 app.add_middleware(MetricsMiddleware)
 
+# 请求 ID（最外层，请求期间所有日志和慢请求记录都带 request_id）
+app.add_middleware(RequestContextMiddleware)
+
+# 链路追踪（未启用时为空操作）
+instrument_app(app)
+
 # 注册路由
 app.include_router(ai_router)
 app.include_router(education_router)
@@ -51,6 +71,7 @@ app.include_router(metrics.router)
 app.include_router(rag.router, prefix="/api/v1")
 app.include_router(agent.router, prefix="/api/v1")
 app.include_router(health.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -69,6 +90,10 @@ async def health_check():
     return {"status": "ok"}
 
 
+# 就绪探针（与 /api/v1/health/ready 相同）
+app.add_api_route("/health/ready", health.readiness_check, methods=["GET"])
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,6 +1,14 @@
 """Middleware package"""
 
-from .auth import get_current_user, JWTUser
+from .auth import get_current_user, get_optional_user, require_admin, JWTUser
 from .metrics_middleware import MetricsMiddleware
+from .request_context import RequestContextMiddleware
 
-__all__ = ["get_current_user", "JWTUser", "MetricsMiddleware"]
+__all__ = [
+    "get_current_user",
+    "get_optional_user",
+    "require_admin",
+    "JWTUser",
+    "MetricsMiddleware",
+    "RequestContextMiddleware",
+]
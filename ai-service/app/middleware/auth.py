@@ -9,6 +9,10 @@ from typing import Optional, Dict, Any
 from app.config import settings
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# 与后端 UserRole 枚举一致
+ADMIN_ROLE = "ADMIN"
 
 
 class JWTUser:
@@ -81,3 +85,44 @@ async def get_current_user(
         )
 
     return JWTUser(user_id=user_id, role=role, email=payload.get("email"))
+
+
+async def require_admin(user: JWTUser = Depends(get_current_user)) -> JWTUser:
+    """
+    要求管理员角色
+
+    Args:
+        user: 当前用户
+
+    Returns:
+        JWTUser: 用户信息对象
+
+    Raises:
+        HTTPException: 403 - 非管理员
+    """
+    if user.role != ADMIN_ROLE:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
+    return user
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Optional[JWTUser]:
+    """
+    可选认证：携带有效 JWT 时返回用户信息，未携带或无效时返回 None
+
+    用于匿名可访问、但登录用户需要区分身份的接口。
+
+    Args:
+        credentials: HTTP Bearer 认证凭证
+
+    Returns:
+        JWTUser 或 None
+    """
+    if not credentials:
+        return None
+
+    try:
+        return await get_current_user(credentials)
+    except HTTPException:
+        return None
@@ -0,0 +1,46 @@
+"""
+停机排空中间件
+
+统计进行中的请求（流式响应在响应体发送完毕后才算完成），停机时服务容器等待其归零；
+停机开始后到达的新请求直接返回 503 并关闭连接，由负载均衡重试到其他实例。
+"""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class DrainMiddleware:
+    """进行中请求计数与停机排空"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        处理请求
+
+        Args:
+            scope: ASGI scope
+            receive: ASGI receive
+            send: ASGI send
+        """
+        # 服务容器由 lifespan 创建，未启用 lifespan 时（如测试）直接放行
+        services = getattr(scope["app"].state, "services", None) if "app" in scope else None
+        if scope["type"] != "http" or services is None:
+            await self.app(scope, receive, send)
+            return
+
+        if services.draining:
+            response = JSONResponse(
+                {"detail": "Service is shutting down"},
+                status_code=503,
+                headers={"Connection": "close", "Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        services.requests.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            services.requests.exit()
@@ -1,78 +1,113 @@
 """
 性能监控中间件
 
-自动记录每个 API 请求的性能指标
+自动记录每个 API 请求的性能指标：
+- 纯 ASGI 实现，不包装请求/响应流，不缓冲响应体，流式响应不受影响
+- endpoint 标签使用匹配到的路由模板（如 /api/v1/agent/sessions/{session_id}），
+  未匹配任何路由的请求统一记为 "unmatched"，指标序列数量有上限
+- 超过慢请求阈值（延迟 SLO）的请求记录各阶段耗时（LLM、检索、MongoDB、Redis 等）
 """
 
 import time
-from typing import Callable
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
 from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.services.metrics_service import get_metrics_service
+from app.config import settings
+from app.services.metrics_service import get_metrics_service, request_timings
+from app.services.profiling import get_slow_request_log
 
+UNMATCHED_ROUTE = "unmatched"
 
-class MetricsMiddleware(BaseHTTPMiddleware):
+
+def route_template(scope: Scope) -> str:
+    """
+    获取请求匹配到的路由模板
+
+    路由匹配后 FastAPI 会把路由对象写入 scope["route"]。
+
+    Args:
+        scope: ASGI scope
+
+    Returns:
+        路由模板，未匹配时返回 "unmatched"
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
     """
     Prometheus 性能监控中间件
 
-    自动记录 API 请求的响应时间、错误等指标
+    自动记录 API 请求的响应时间、进行中请求数、响应大小和错误等指标
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         处理请求并记录性能指标
 
         Args:
-            request: HTTP 请求对象
-            call_next: 下一个中间件或路由处理器
-
-        Returns:
-            HTTP 响应对象
+            scope: ASGI scope
+            receive: ASGI receive
+            send: ASGI send
         """
-        metrics = get_metrics_service()
-        method = request.method
-        endpoint = request.url.path
-
-        # 记录开始时间
-        start_time = time.time()
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        metrics = get_metrics_service()
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = metrics.api_requests_in_progress.labels(method=method)
+        in_progress.inc()
+        timings_token = request_timings.set([])
+        start_time = time.perf_counter()
         try:
-            # 调用下一个中间件或路由处理器
-            response = await call_next(request)
-            duration = time.time() - start_time
-
-            # 记录成功的请求
-            metrics.record_api_request(
-                method=method,
-                endpoint=endpoint,
-                duration=duration,
-                status_code=response.status_code,
-            )
-
-            logger.debug(
-                f"API request: {method} {endpoint} - {response.status_code} ({duration:.3f}s)"
-            )
-
-            return response
-
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
+            endpoint = route_template(scope)
 
             # 记录错误
             error_type = type(e).__name__
-            metrics.record_api_error(
-                method=method,
-                endpoint=endpoint,
-                error_type=error_type,
-            )
-
+            metrics.record_api_error(method=method, endpoint=endpoint, error_type=error_type)
             logger.error(
                 f"API error: {method} {endpoint} - {error_type} ({duration:.3f}s): {str(e)}"
             )
 
             # 重新抛出异常，让 FastAPI 的错误处理器处理
             raise
+        finally:
+            in_progress.dec()
+            duration = time.perf_counter() - start_time
+            endpoint = route_template(scope)
+            metrics.record_api_request(
+                method=method,
+                endpoint=endpoint,
+                duration=duration,
+                status_code=status_code,
+                response_size=response_size,
+            )
+
+            timings = request_timings.get()
+            request_timings.reset(timings_token)
+            threshold = settings.slow_request_threshold_seconds
+            if threshold and duration >= threshold:
+                metrics.record_slow_request(method, endpoint)
+                get_slow_request_log().record(
+                    method, endpoint, status_code, duration, start_time, timings
+                )
@@ -0,0 +1,57 @@
+"""
+请求上下文中间件
+
+为每个请求确定请求 ID，写入 app.core.logger.request_id，请求期间的日志自动携带：
+- 复用上游（网关 / NestJS 后端）传入的 X-Request-ID，格式不合法时重新生成
+- 响应头回写 X-Request-ID，便于客户端和上游关联日志
+- 纯 ASGI 实现，不影响流式响应
+"""
+
+import re
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logger import request_id
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# 上游请求 ID 只接受有限长度的安全字符，避免日志注入
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class RequestContextMiddleware:
+    """设置请求 ID 上下文并回写响应头"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        处理请求
+
+        Args:
+            scope: ASGI scope
+            receive: ASGI receive
+            send: ASGI send
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        current = (
+            incoming if incoming and _VALID_REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = current
+            await send(message)
+
+        token = request_id.set(current)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -28,6 +28,7 @@ class ChatResponse(BaseModel):
     confidence: float = Field(..., description="意图置信度")
     sources: Optional[List[Dict[str, Any]]] = Field(default=None, description="参考来源（RAG）")
     usage: Optional[Dict[str, Any]] = Field(default=None, description="Token 使用统计")
+    degraded: bool = Field(default=False, description="是否为降级响应（依赖服务不可用）")
 
 
 class SessionInfoResponse(BaseModel):
@@ -12,6 +12,7 @@ class ChatMessage(BaseModel):
 
     role: str = Field(..., description="角色: user/assistant/system")
     content: str = Field(..., description="消息内容")
+    token_count: Optional[int] = Field(None, description="消息 Token 数（写入时缓存）")
 
 
 class ChatRequest(BaseModel):
@@ -36,6 +37,10 @@ class Conversation(BaseModel):
     id: str = Field(..., description="对话ID")
     user_id: str = Field(..., description="用户ID")
     messages: List[ChatMessage] = Field(default_factory=list, description="消息列表")
+    summary: Optional[str] = Field(None, description="早期对话摘要")
+    summarized_count: int = Field(0, description="已压缩进摘要的消息数")
+    message_count: int = Field(0, description="消息总数")
+    last_message: Optional[ChatMessage] = Field(None, description="最后一条消息")
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
     updated_at: datetime = Field(default_factory=datetime.now, description="更新时间")
 
@@ -51,16 +56,18 @@ class Article(BaseModel):
     author: str = Field(..., description="作者")
     cover_image: Optional[str] = Field(None, description="封面图")
     views: int = Field(0, description="浏览量")
+    unique_views: int = Field(0, description="独立访客数（估算）")
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
 
 
 class ArticleListResponse(BaseModel):
     """文章列表响应"""
 
-    total: int = Field(..., description="总数")
+    total: Optional[int] = Field(None, description="总数（可能为估算值）")
     items: List[Article] = Field(..., description="文章列表")
-    page: int = Field(..., description="当前页")
+    page: Optional[int] = Field(None, description="当前页（游标分页时为空）")
     page_size: int = Field(..., description="每页数量")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有下一页时为空")
 
 
 class FavoriteRequest(BaseModel):
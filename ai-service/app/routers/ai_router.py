@@ -2,9 +2,15 @@
 AI Chat Router
 """
 
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends
 from app.models import ChatRequest, ChatResponse, ChatMessage, Conversation
-from app.services import ai_service, conversation_service
+from app.services import (
+    ai_service,
+    conversation_service,
+    get_conversation_summarizer,
+    InvalidCursorError,
+)
 from app.middleware import get_current_user, JWTUser
 
 router = APIRouter(prefix="/api/v1/ai", tags=["AI"])
@@ -25,7 +31,9 @@ async def chat(request: ChatRequest, current_user: JWTUser = Depends(get_current
 
         # 获取或创建对话
         if request.conversation_id:
-            conversation = await conversation_service.get_conversation(request.conversation_id)
+            conversation = await conversation_service.get_conversation_window(
+                request.conversation_id, max_messages=1
+            )
             if not conversation:
                 raise HTTPException(status_code=404, detail="对话不存在")
         else:
@@ -37,15 +45,17 @@ async def chat(request: ChatRequest, current_user: JWTUser = Depends(get_current
         if not conversation:
             raise HTTPException(status_code=500, detail="添加消息失败")
 
-        # 构建对话历史
-        messages = [ChatMessage(role=m.role, content=m.content) for m in conversation.messages]
-
-        # 调用AI服务
-        reply, sources = await ai_service.chat(messages=messages, use_rag=request.use_rag)
+        # 调用AI服务（已摘要的消息以摘要代替，其余历史按 Token 预算裁剪）
+        reply, sources = await ai_service.chat(
+            messages=conversation_service.unsummarized_messages(conversation),
+            use_rag=request.use_rag,
+            summary=conversation.summary,
+        )
 
         # 保存AI回复
         assistant_message = ChatMessage(role="assistant", content=reply)
         await conversation_service.add_message(conversation.id, assistant_message)
+        get_conversation_summarizer().schedule(conversation.id)
 
         return ChatResponse(conversation_id=conversation.id, message=reply, sources=sources)
 
@@ -55,21 +65,30 @@ async def chat(request: ChatRequest, current_user: JWTUser = Depends(get_current
 
 @router.get("/conversations")
 async def get_conversations(
-    current_user: JWTUser = Depends(get_current_user), limit: int = 20, skip: int = 0
+    current_user: JWTUser = Depends(get_current_user),
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
 ):
     """
     获取用户的对话历史列表
 
     - 按更新时间倒序
-    - 支持分页
+    - 支持游标分页（cursor 为上一页返回的 next_cursor）
     - 需要JWT认证
     """
     try:
         user_id = current_user.user_id
-        conversations = await conversation_service.get_user_conversations(
-            user_id, limit=limit, skip=skip
+        conversations, next_cursor = await conversation_service.get_user_conversations(
+            user_id, limit=limit, skip=skip, cursor=cursor
         )
-        return {"conversations": conversations, "total": len(conversations)}
+        return {
+            "conversations": conversations,
+            "total": len(conversations),
+            "next_cursor": next_cursor,
+        }
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取对话历史失败: {str(e)}")
 
@@ -2,10 +2,11 @@
 Education Article Router
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from app.models import Article, ArticleListResponse
-from app.services import article_service
-from app.middleware import get_current_user, JWTUser
+from app.services import article_service, InvalidCursorError
+from app.middleware import get_current_user, get_optional_user, require_admin, JWTUser
 
 router = APIRouter(prefix="/api/v1/education", tags=["Education"])
 
@@ -15,34 +16,58 @@ async def get_articles(
     category: str = Query(None, description="文章分类"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor）"),
+    with_total: bool = Query(True, description="是否返回总数"),
 ):
     """
     获取科普文章列表
 
     - 支持按分类筛选
-    - 支持分页
+    - 支持游标分页（推荐，翻页开销与页码无关）和页码分页
     - 按创建时间倒序
+    - 总数为估算或缓存值，with_total=false 时不返回
     """
     try:
-        articles, total = await article_service.get_articles(
-            category=category, page=page, page_size=page_size
+        articles, total, next_cursor = await article_service.get_articles(
+            category=category,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            with_total=with_total,
         )
 
-        return ArticleListResponse(total=total, items=articles, page=page, page_size=page_size)
+        return ArticleListResponse(
+            total=total,
+            items=articles,
+            page=None if cursor else page,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取文章列表失败: {str(e)}")
 
 
 @router.get("/articles/{article_id}", response_model=Article)
-async def get_article(article_id: str):
+async def get_article(
+    article_id: str,
+    request: Request,
+    current_user: Optional[JWTUser] = Depends(get_optional_user),
+):
     """
     获取文章详情
 
-    - 自动增加浏览量
+    - 自动增加浏览量（先计入 Redis，批量写入数据库）
+    - 按登录用户或 IP 统计独立访客
     - 使用Redis缓存
     """
     try:
-        article = await article_service.get_article(article_id)
+        if current_user:
+            viewer_id = f"user:{current_user.user_id}"
+        else:
+            viewer_id = f"ip:{request.client.host}" if request.client else None
+        article = await article_service.get_article(article_id, viewer_id=viewer_id)
         if not article:
             raise HTTPException(status_code=404, detail="文章不存在")
 
@@ -53,6 +78,39 @@ async def get_article(article_id: str):
         raise HTTPException(status_code=500, detail=f"获取文章详情失败: {str(e)}")
 
 
+@router.put("/articles/{article_id}", response_model=Article)
+async def save_article(article_id: str, article: Article, _: JWTUser = Depends(require_admin)):
+    """
+    创建或更新文章（仅管理员）
+
+    - 写入后立即使文章详情、分类计数和列表缓存失效，并在后台重新预热列表
+    - 直接写入 MongoDB 的文章要等缓存过期后才可见，发布文章应使用本接口
+    """
+    if article.id != article_id:
+        raise HTTPException(status_code=400, detail="文章ID与路径不一致")
+    try:
+        await article_service.save_article(article)
+        return article
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"保存文章失败: {str(e)}")
+
+
+@router.delete("/articles/{article_id}")
+async def delete_article(article_id: str, _: JWTUser = Depends(require_admin)):
+    """
+    删除文章（仅管理员）
+
+    - 删除后立即使文章详情、分类计数和列表缓存失效
+    """
+    try:
+        deleted = await article_service.delete_article(article_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"删除文章失败: {str(e)}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="文章不存在")
+    return {"success": True, "message": "删除成功"}
+
+
 @router.post("/articles/{article_id}/favorite")
 async def favorite_article(article_id: str, current_user: JWTUser = Depends(get_current_user)):
     """
@@ -89,18 +147,29 @@ async def get_user_favorites(
     current_user: JWTUser = Depends(get_current_user),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor）"),
+    with_total: bool = Query(True, description="是否返回总数"),
 ):
     """
     获取用户收藏的文章列表
 
+    - 支持游标分页（推荐）和页码分页
     - 需要JWT认证
     """
     try:
         user_id = current_user.user_id
-        articles, total = await article_service.get_user_favorites(
-            user_id, page=page, page_size=page_size
+        articles, total, next_cursor = await article_service.get_user_favorites(
+            user_id, page=page, page_size=page_size, cursor=cursor, with_total=with_total
         )
 
-        return ArticleListResponse(total=total, items=articles, page=page, page_size=page_size)
+        return ArticleListResponse(
+            total=total,
+            items=articles,
+            page=None if cursor else page,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取收藏列表失败: {str(e)}")
@@ -4,9 +4,17 @@ from .ai_service import ai_service, AIService
 from .rag_service import rag_service, RAGService
 from .conversation_service import conversation_service, ConversationService
 from .article_service import article_service, ArticleService
+from .article_views import ArticleViewCounter
+from .article_listing_cache import ArticleListingCache
 from .redis_service import get_redis_service, RedisService
-from .metrics_service import get_metrics_service, MetricsService, start_metrics_server
+from .metrics_service import get_metrics_service, MetricsService, start_metrics_server, timed
 from .cache_service import get_cache_manager, CacheManager
+from .circuit_breaker import get_circuit_breaker, CircuitBreaker, CircuitOpenError
+from .http_client import get_http_client, get_retry_policy, close_http_client, RetryPolicy
+from .mongo_indexes import ensure_indexes
+from .pagination import InvalidCursorError
+from .conversation_write_behind import ConversationWriteBehind
+from .session_cache import get_session_cache, SessionContextCache
 
 # 新增服务
 from .deepseek_client import get_deepseek_client, DeepSeekClient, DeepSeekAPIError
@@ -15,6 +23,12 @@ from .qdrant_service import get_qdrant_service, QdrantService
 from .intent_service import get_intent_service, IntentService, IntentType
 from .agent_service import get_agent_service, AgentService
 from .prompt_templates import PromptTemplates, PromptType, DISCLAIMER
+from .context_builder import get_context_builder, ContextBuilder
+from .summary_service import (
+    get_conversation_summarizer,
+    close_conversation_summarizer,
+    ConversationSummarizer,
+)
 
 __all__ = [
     "ai_service",
@@ -25,13 +39,28 @@ __all__ = [
     "ConversationService",
     "article_service",
     "ArticleService",
+    "ArticleViewCounter",
+    "ArticleListingCache",
     "get_redis_service",
     "RedisService",
     "get_metrics_service",
     "MetricsService",
     "start_metrics_server",
+    "timed",
     "get_cache_manager",
     "CacheManager",
+    "get_circuit_breaker",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "get_http_client",
+    "get_retry_policy",
+    "close_http_client",
+    "RetryPolicy",
+    "ensure_indexes",
+    "InvalidCursorError",
+    "ConversationWriteBehind",
+    "get_session_cache",
+    "SessionContextCache",
     # 新增服务
     "get_deepseek_client",
     "DeepSeekClient",
@@ -48,4 +77,9 @@ __all__ = [
     "PromptTemplates",
     "PromptType",
     "DISCLAIMER",
+    "get_context_builder",
+    "ContextBuilder",
+    "get_conversation_summarizer",
+    "close_conversation_summarizer",
+    "ConversationSummarizer",
 ]
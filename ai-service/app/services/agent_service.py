@@ -6,19 +6,36 @@ AI Agent 核心服务，支持：
 - 多轮对话上下文维护
 - 意图识别和路由
 - RAG 增强回答
+- 依赖故障时的降级响应
 """
 
-from typing import Dict, Any, List, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+import uuid
 from loguru import logger
 
-from app.services.deepseek_client import get_deepseek_client
+from app.core.tracing import set_span_attributes, start_span
+from app.services.deepseek_client import get_deepseek_client, DeepSeekAPIError
+from app.services.http_client import request_deadline
+from app.services.cache_service import get_cache_manager
+from app.services.context_builder import get_context_builder
+from app.services.summary_service import get_conversation_summarizer
 from app.services.intent_service import get_intent_service, IntentType
 from app.services.conversation_service import conversation_service
 from app.services.rag_service import rag_service
 from app.services.prompt_templates import PromptTemplates
+from app.services.metrics_service import get_metrics_service
 from app.models import ChatMessage
 from app.config import settings
 
+# 回答不依赖对话历史的意图，其非个性化回答可缓存用于降级
+# （健康咨询的回答使用对话历史和摘要，不同用户的相同问题不能共用缓存）
+CACHEABLE_INTENTS = {
+    IntentType.MEDICATION_CONSULTATION,
+    IntentType.DIET_ADVICE,
+    IntentType.EXERCISE_ADVICE,
+}
+
 
 class AgentService:
     """AI Agent 服务"""
@@ -26,7 +43,10 @@ class AgentService:
     def __init__(self):
         self.deepseek = get_deepseek_client()
         self.intent_service = get_intent_service()
+        self.context_builder = get_context_builder()
+        self.summarizer = get_conversation_summarizer()
         self.disclaimer = settings.disclaimer_text
+        self.metrics = get_metrics_service()
         logger.info("Agent service initialized")
 
     async def chat(
@@ -50,89 +70,263 @@ class AgentService:
         Returns:
             对话响应
         """
+        with start_span("agent.chat", session_id=session_id, use_rag=use_rag):
+            # 整个请求共享一个时间预算，意图识别和生成按剩余时间调用 DeepSeek
+            deadline = request_deadline()
+            try:
+                # 1. 识别意图
+                with self._stage("intent"):
+                    intent_result = await self.intent_service.recognize_intent(
+                        message, deadline=deadline
+                    )
+                intent = intent_result.get("intent")
+                confidence = intent_result.get("confidence", 0)
+                set_span_attributes(intent=intent, confidence=confidence)
+
+                logger.debug(
+                    "Intent: {intent}, Confidence: {confidence}",
+                    intent=intent,
+                    confidence=confidence,
+                )
+
+                # 2. 获取或创建会话、添加用户消息、获取上下文
+                # MongoDB 不可用时降级为无历史的单轮对话
+                (
+                    session_id,
+                    context_messages,
+                    summary,
+                    patient_context,
+                    persisted,
+                ) = await self._load_context(user_id, session_id, message, patient_context)
+
+                # 3. 根据意图生成回答，DeepSeek 不可用时返回缓存答案或降级提示
+                response, degraded = await self._respond(
+                    intent, message, context_messages, use_rag, patient_context, summary, deadline
+                )
+                set_span_attributes(degraded=degraded, persisted=persisted)
+
+                # 4. 添加 AI 回复
+                if persisted:
+                    await self._persist_reply(session_id, response["content"])
+
+                # 5. 返回响应
+                return {
+                    "session_id": session_id,
+                    "message": response["content"],
+                    "intent": intent,
+                    "confidence": confidence,
+                    "sources": response.get("sources"),
+                    "usage": response.get("usage"),
+                    "degraded": degraded,
+                }
+
+            except Exception as e:
+                logger.error(f"Chat failed: {str(e)}")
+                raise
+
+    async def _load_context(
+        self,
+        user_id: str,
+        session_id: str,
+        message: str,
+        patient_context: Optional[Dict[str, Any]],
+    ) -> Tuple[str, List[ChatMessage], Optional[str], Optional[Dict[str, Any]], bool]:
+        """
+        获取或创建会话、写入用户消息并读取上下文
+
+        Returns:
+            (会话 ID, 历史消息, 摘要, 患者上下文, 是否已持久化)；会话存储不可用时
+            返回空历史且未持久化
+        """
         try:
-            # 1. 识别意图
-            intent_result = await self.intent_service.recognize_intent(message)
-            intent = intent_result.get("intent")
-            confidence = intent_result.get("confidence", 0)
-
-            logger.info(f"Intent: {intent}, Confidence: {confidence}")
-
-            # 2. 获取或创建会话
-            conversation = await conversation_service.get_conversation(session_id)
-            if not conversation:
-                conversation = await conversation_service.create_conversation(user_id)
-                session_id = conversation.id
-
-            # 3. 添加用户消息
-            user_msg = ChatMessage(role="user", content=message)
-            await conversation_service.add_message(session_id, user_msg)
-
-            # 4. 获取上下文消息
-            context_messages = await conversation_service.get_context_messages(session_id)
-
-            # 5. 根据意图生成回答
-            if intent == IntentType.HEALTH_CONSULTATION and use_rag:
-                # 健康咨询 - 使用 RAG
-                response = await self._handle_health_consultation_with_rag(
-                    message, context_messages, patient_context
+            with self._stage("context"):
+                conversation = await conversation_service.get_conversation_window(
+                    session_id, max_messages=1
                 )
-            elif intent == IntentType.MEDICATION_CONSULTATION:
-                # 用药咨询
-                response = await self._handle_medication_consultation(message, patient_context)
-            elif intent == IntentType.DIET_ADVICE:
-                # 饮食建议
-                response = await self._handle_diet_advice(message, patient_context)
-            elif intent == IntentType.EXERCISE_ADVICE:
-                # 运动建议
-                response = await self._handle_exercise_advice(message, patient_context)
-            else:
-                # 普通对话
-                response = await self._handle_general_chat(
-                    message, context_messages, patient_context
+                if not conversation:
+                    conversation = await conversation_service.create_conversation(user_id)
+                    session_id = conversation.id
+
+                user_msg = ChatMessage(role="user", content=message)
+                await conversation_service.add_message(session_id, user_msg)
+
+                summary, context_messages = await conversation_service.get_context_window(
+                    session_id
                 )
+                # 未携带患者上下文时沿用本会话此前提供的
+                patient_context = await conversation_service.get_patient_context(
+                    session_id, patient_context
+                )
+        except Exception as e:
+            logger.warning(f"Conversation store unavailable, continuing without history: {e}")
+            return session_id or str(uuid.uuid4()), [], None, patient_context, False
+
+        # 当前问题由 Prompt 模板单独拼接，不重复计入历史
+        if (
+            context_messages
+            and context_messages[-1].role == "user"
+            and context_messages[-1].content == message
+        ):
+            context_messages = context_messages[:-1]
+        return session_id, context_messages, summary, patient_context, True
+
+    async def _respond(
+        self,
+        intent: Optional[str],
+        message: str,
+        context_messages: List[ChatMessage],
+        use_rag: bool,
+        patient_context: Optional[Dict[str, Any]],
+        summary: Optional[str],
+        deadline: Optional[float] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        生成回答，DeepSeek 不可用时返回降级响应
 
-            # 6. 添加 AI 回复
-            ai_msg = ChatMessage(role="assistant", content=response["content"])
-            await conversation_service.add_message(session_id, ai_msg)
-
-            # 7. 返回响应
-            return {
-                "session_id": session_id,
-                "message": response["content"],
-                "intent": intent,
-                "confidence": confidence,
-                "sources": response.get("sources"),
-                "usage": response.get("usage"),
-            }
+        Returns:
+            (响应, 是否降级)
+        """
+        try:
+            response = await self._generate_response(
+                intent, message, context_messages, use_rag, patient_context, summary, deadline
+            )
+        except DeepSeekAPIError as e:
+            logger.warning(f"DeepSeek unavailable, serving degraded response: {e}")
+            return await self._get_degraded_response(intent, message, patient_context), True
+
+        if patient_context is None and intent in CACHEABLE_INTENTS:
+            await self._cache_answer(intent, message, response["content"])
+        return response, False
 
+    async def _persist_reply(self, session_id: str, content: str) -> None:
+        """保存 AI 回复并在后台滚动摘要（不阻塞本次响应）"""
+        try:
+            ai_msg = ChatMessage(role="assistant", content=content)
+            with self._stage("persistence"):
+                await conversation_service.add_message(session_id, ai_msg)
+            self.summarizer.schedule(session_id)
         except Exception as e:
-            logger.error(f"Chat failed: {str(e)}")
-            raise
+            logger.warning(f"Failed to persist assistant message: {e}")
+
+    async def _generate_response(
+        self,
+        intent: Optional[str],
+        message: str,
+        context_messages: List[ChatMessage],
+        use_rag: bool,
+        patient_context: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """根据意图路由到对应处理器（deadline 为请求截止时间，见 request_deadline）"""
+        if intent == IntentType.HEALTH_CONSULTATION and use_rag:
+            # 健康咨询 - 使用 RAG
+            return await self._handle_health_consultation_with_rag(
+                message, context_messages, patient_context, summary, deadline
+            )
+        elif intent == IntentType.MEDICATION_CONSULTATION:
+            # 用药咨询
+            return await self._handle_medication_consultation(message, patient_context, deadline)
+        elif intent == IntentType.DIET_ADVICE:
+            # 饮食建议
+            return await self._handle_diet_advice(message, patient_context, deadline)
+        elif intent == IntentType.EXERCISE_ADVICE:
+            # 运动建议
+            return await self._handle_exercise_advice(message, patient_context, deadline)
+        else:
+            # 普通对话
+            return await self._handle_general_chat(
+                message, context_messages, patient_context, summary, deadline
+            )
+
+    async def _complete(
+        self, messages: List[Dict[str, str]], endpoint: str, deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """调用 DeepSeek 生成回答（受请求剩余时间限制）并记录生成阶段耗时"""
+        with self._stage("generation", endpoint=endpoint):
+            return await self.deepseek.chat(
+                messages=messages, temperature=0.7, endpoint=endpoint, deadline=deadline
+            )
+
+    @contextmanager
+    def _stage(self, stage: str, **attributes: Any):
+        """Agent 对话阶段：记录耗时指标并创建追踪 span"""
+        with self.metrics.time_agent_stage(stage), start_span(f"agent.{stage}", **attributes):
+            yield
+
+    async def _cache_answer(self, intent: str, message: str, content: str) -> None:
+        """缓存非个性化回答，供 DeepSeek 不可用时降级使用"""
+        try:
+            await get_cache_manager().set("rag_answer", f"{intent}:{message}", content)
+        except Exception as e:
+            logger.debug(f"Failed to cache answer: {e}")
+
+    async def _get_degraded_response(
+        self,
+        intent: Optional[str],
+        message: str,
+        patient_context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        降级响应：优先返回缓存答案，否则返回固定的就医指引
+
+        Returns:
+            响应字典
+        """
+        if patient_context is None:
+            try:
+                cached = await get_cache_manager().get("rag_answer", f"{intent}:{message}")
+                set_span_attributes(degraded_cache_hit=bool(cached))
+                if cached:
+                    return {"content": cached}
+            except Exception as e:
+                logger.debug(f"Failed to read cached answer: {e}")
+
+        return {"content": f"{settings.degraded_reply_text}\n\n{self.disclaimer}"}
 
     async def _handle_health_consultation_with_rag(
         self,
         message: str,
         context_messages: List[ChatMessage],
         patient_context: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """处理健康咨询（使用 RAG）"""
+        # 检索链路熔断时直接跳过 RAG
+        if not rag_service.is_available():
+            logger.warning("RAG unavailable (circuit open), skipping retrieval")
+            return await self._handle_general_chat(
+                message, context_messages, patient_context, summary, deadline
+            )
+
         try:
             # 1. RAG 检索
-            search_results = await rag_service.search_by_text(
-                query_text=message,
-                top_k=3,
-            )
+            with self._stage("retrieval", top_k=3):
+                search_results = await rag_service.search_by_text(
+                    query_text=message,
+                    top_k=3,
+                )
 
+            set_span_attributes(
+                retrieval_results=len(search_results),
+                retrieval_top_score=max((r["score"] for r in search_results), default=None),
+            )
             if search_results:
-                # 2. 构建上下文
-                context = "\n\n".join([r["content"] for r in search_results])
-
-                # 3. 构建 Prompt
-                messages = PromptTemplates.build_rag_query_prompt(message, context)
+                # 2. 构建上下文（去重并限制在片段 Token 预算内）
+                chunks = self.context_builder.select_chunks([r["content"] for r in search_results])
+                context = "\n\n".join(chunks)
+
+                # 3. 构建 Prompt（历史按剩余 Token 预算裁剪）
+                prompt = PromptTemplates.build_rag_query_prompt(message, context)
+                messages = self.context_builder.build(
+                    prompt[:1], context_messages, prompt[1:], summary=summary
+                )
 
                 # 4. 调用 DeepSeek
-                response = await self.deepseek.chat(messages=messages, temperature=0.7)
+                response = await self._complete(
+                    messages, endpoint="health_consultation_with_rag", deadline=deadline
+                )
 
                 return {
                     "content": response["content"],
@@ -141,17 +335,25 @@ class AgentService:
                 }
             else:
                 # 没有检索到相关知识，使用普通对话
-                return await self._handle_general_chat(message, context_messages, patient_context)
+                return await self._handle_general_chat(
+                    message, context_messages, patient_context, summary, deadline
+                )
 
+        except DeepSeekAPIError:
+            # DeepSeek 不可用，交由上层降级处理
+            raise
         except Exception as e:
             logger.error(f"RAG consultation failed: {str(e)}")
             # 降级到普通对话
-            return await self._handle_general_chat(message, context_messages, patient_context)
+            return await self._handle_general_chat(
+                message, context_messages, patient_context, summary, deadline
+            )
 
     async def _handle_medication_consultation(
         self,
         message: str,
         patient_context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """处理用药咨询"""
         messages = PromptTemplates.build_medication_consultation_prompt(
@@ -159,7 +361,9 @@ class AgentService:
             patient_info=patient_context,
         )
 
-        response = await self.deepseek.chat(messages=messages, temperature=0.7)
+        response = await self._complete(
+            messages, endpoint="medication_consultation", deadline=deadline
+        )
 
         return {
             "content": response["content"],
@@ -170,6 +374,7 @@ class AgentService:
         self,
         message: str,
         patient_context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """处理饮食建议"""
         messages = PromptTemplates.build_diet_advice_prompt(
@@ -177,7 +382,7 @@ class AgentService:
             specific_question=message,
         )
 
-        response = await self.deepseek.chat(messages=messages, temperature=0.7)
+        response = await self._complete(messages, endpoint="diet_advice", deadline=deadline)
 
         return {
             "content": response["content"],
@@ -188,6 +393,7 @@ class AgentService:
         self,
         message: str,
         patient_context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """处理运动建议"""
         messages = PromptTemplates.build_exercise_advice_prompt(
@@ -195,7 +401,7 @@ class AgentService:
             specific_question=message,
         )
 
-        response = await self.deepseek.chat(messages=messages, temperature=0.7)
+        response = await self._complete(messages, endpoint="exercise_advice", deadline=deadline)
 
         return {
             "content": response["content"],
@@ -207,20 +413,21 @@ class AgentService:
         message: str,
         context_messages: List[ChatMessage],
         patient_context: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """处理普通对话"""
-        messages = PromptTemplates.build_health_consultation_prompt(
+        prompt = PromptTemplates.build_health_consultation_prompt(
             question=message,
             patient_context=patient_context,
         )
 
-        # 添加历史上下文（最近 5 条）
-        if context_messages:
-            history = [{"role": msg.role, "content": msg.content} for msg in context_messages[-5:]]
-            # 插入到 system 消息之后
-            messages = [messages[0]] + history + [messages[1]]
+        # 历史上下文插入到 system 消息之后，按 Token 预算从最早的轮次开始裁剪
+        messages = self.context_builder.build(
+            prompt[:1], context_messages, prompt[1:], summary=summary
+        )
 
-        response = await self.deepseek.chat(messages=messages, temperature=0.7)
+        response = await self._complete(messages, endpoint="general_chat", deadline=deadline)
 
         return {
             "content": response["content"],
@@ -250,12 +457,7 @@ class AgentService:
         Returns:
             消息列表
         """
-        conversation = await conversation_service.get_conversation(session_id)
-
-        if not conversation:
-            return []
-
-        messages = conversation.messages[-limit:]
+        messages = await conversation_service.get_context_messages(session_id, max_messages=limit)
         return [
             {
                 "role": msg.role,
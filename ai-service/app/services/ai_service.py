@@ -2,12 +2,18 @@
 DeepSeek AI Chat Service
 """
 
+import time
 from typing import List, Dict, Any, Optional
 from openai import AsyncOpenAI
 from loguru import logger
 from app.config import settings
 from app.models import ChatMessage
+from app.services.circuit_breaker import get_circuit_breaker
 from app.services.rag_service import rag_service
+from app.services.context_builder import get_context_builder
+from app.services.http_client import get_http_client, get_retry_policy
+from app.services.metrics_service import get_metrics_service
+from app.services.token_counter import extract_usage
 
 
 class AIService:
@@ -17,17 +23,31 @@ class AIService:
         self.client = AsyncOpenAI(
             api_key=settings.deepseek_api_key,
             base_url=settings.deepseek_base_url,
-            timeout=settings.deepseek_timeout,
-            max_retries=settings.deepseek_max_retries,
+            max_retries=0,  # 禁用 SDK 自动重试，使用统一重试策略
+            http_client=get_http_client(),
+        )
+        self.retry_policy = get_retry_policy()
+        # 与 DeepSeekClient / EmbeddingService 共用熔断器，只有可重试类错误计入失败
+        self.chat_breaker = get_circuit_breaker(
+            "deepseek", is_failure=self.retry_policy.is_retryable
+        )
+        self.embedding_breaker = get_circuit_breaker(
+            "embedding", is_failure=self.retry_policy.is_retryable
         )
         self.model = settings.deepseek_model
         self.disclaimer = settings.disclaimer_text
+        self.context_builder = get_context_builder()
 
     async def get_embedding(self, text: str) -> List[float]:
         """获取文本向量"""
-        response = await self.client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text,
+        response = await self.retry_policy.call(
+            lambda: self.embedding_breaker.call(
+                lambda: self.client.embeddings.create(
+                    model="text-embedding-ada-002",
+                    input=text,
+                )
+            ),
+            name="Embedding API",
         )
         return response.data[0].embedding
 
@@ -36,6 +56,7 @@ class AIService:
         messages: List[ChatMessage],
         use_rag: bool = True,
         temperature: float = 0.7,
+        summary: Optional[str] = None,
     ) -> tuple[str, Optional[List[Dict[str, Any]]]]:
         """
         AI对话
@@ -44,11 +65,13 @@ class AIService:
             messages: 对话历史
             use_rag: 是否使用RAG检索
             temperature: 温度参数
+            summary: 早期对话摘要（代替已压缩的历史消息）
 
         Returns:
             (AI回复, RAG检索来源)
         """
         sources = None
+        head: List[Dict[str, str]] = []
 
         # RAG检索增强
         if use_rag and messages:
@@ -62,20 +85,45 @@ class AIService:
 
                 # 将检索结果添加到上下文
                 if sources:
-                    context = "\n\n".join([s["content"] for s in sources[:3]])
-                    system_message = ChatMessage(
-                        role="system",
-                        content=f"参考以下健康知识回答用户问题：\n\n{context}\n\n注意：必须在回答末尾添加免责声明。",
-                    )
-                    messages = [system_message] + messages
+                    chunks = self.context_builder.select_chunks([s["content"] for s in sources[:3]])
+                    context = "\n\n".join(chunks)
+                    head = [
+                        {
+                            "role": "system",
+                            "content": f"参考以下健康知识回答用户问题：\n\n{context}\n\n注意：必须在回答末尾添加免责声明。",
+                        }
+                    ]
             except Exception as e:
                 logger.error(f"RAG检索失败: {e}")
 
+        # 按 Token 预算裁剪历史，最后一条（当前问题）必须保留
+        prompt_messages = self.context_builder.build(
+            head,
+            messages[:-1],
+            [{"role": m.role, "content": m.content} for m in messages[-1:]],
+            summary=summary,
+        )
+
         # 调用DeepSeek API
-        response = await self.client.chat.completions.create(
+        start_time = time.perf_counter()
+        response = await self.retry_policy.call(
+            lambda: self.chat_breaker.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=prompt_messages,
+                    temperature=temperature,
+                )
+            ),
+            name="DeepSeek API",
+        )
+
+        prompt_tokens, completion_tokens = extract_usage(response.usage)
+        get_metrics_service().record_llm_usage(
             model=self.model,
-            messages=[{"role": m.role, "content": m.content} for m in messages],
-            temperature=temperature,
+            endpoint="ai_chat",
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            duration=time.perf_counter() - start_time,
         )
 
         reply = response.choices[0].message.content
@@ -0,0 +1,104 @@
+"""
+文章列表缓存
+
+缓存每个分类（以及不筛选分类时）前 K 页的列表结果：
+- 缓存内容为本页文章 ID、下一页游标和总数，文章详情通过批量 MGET 读取（浏览量实时叠加）
+- 键中带版本号 articles:list:v{version}:...，文章写入时递增版本号使全部列表缓存失效，
+  旧版本的键由 TTL 清理
+
+失效只发生在 ArticleService.save_article / delete_article（管理员文章接口 PUT / DELETE
+/api/v1/education/articles/{id}）。绕过接口直接写入 MongoDB 的文章（如批量导入）
+最迟在 ARTICLE_LIST_CACHE_TTL 后出现在列表中，文章详情最迟在 REDIS_CACHE_TTL 后更新。
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.services.metrics_service import get_metrics_service
+
+VERSION_KEY = "articles:list:version"
+
+
+class ArticleListingCache:
+    """文章列表缓存"""
+
+    def __init__(self, redis):
+        """
+        初始化列表缓存
+
+        Args:
+            redis: Redis 异步客户端
+        """
+        self.redis = redis
+
+    def cacheable(self, page: int, cursor: Optional[str]) -> bool:
+        """只缓存页码分页的前 K 页"""
+        return cursor is None and page <= settings.article_list_cache_pages
+
+    async def get(
+        self, category: Optional[str], page: int, page_size: int
+    ) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        读取缓存的列表页
+
+        Args:
+            category: 分类，None 表示全部
+            page: 页码
+            page_size: 每页数量
+
+        Returns:
+            (当前版本号, {"ids", "next_cursor", "total"})，未命中时内容为 None
+        """
+        version = await self.version()
+        raw = await self.redis.get(self._key(version, category, page, page_size))
+        if raw is None:
+            get_metrics_service().record_cache_miss("article_listing")
+            return version, None
+        get_metrics_service().record_cache_hit("article_listing")
+        return version, json.loads(raw)
+
+    async def version(self) -> int:
+        """当前版本号（在读取数据前获取，随后写入该版本）"""
+        return int(await self.redis.get(VERSION_KEY) or 0)
+
+    async def set(
+        self,
+        version: int,
+        category: Optional[str],
+        page: int,
+        page_size: int,
+        listing: Dict[str, Any],
+    ) -> None:
+        """
+        缓存列表页
+
+        Args:
+            version: 读取数据前获取的版本号（构建期间发生写入时写到旧版本，不会污染新版本）
+            category: 分类
+            page: 页码
+            page_size: 每页数量
+            listing: {"ids", "next_cursor", "total"}
+        """
+        await self.redis.setex(
+            self._key(version, category, page, page_size),
+            settings.article_list_cache_ttl,
+            json.dumps(listing, ensure_ascii=False),
+        )
+
+    async def invalidate(self) -> int:
+        """
+        使全部列表缓存失效（文章写入后调用）
+
+        Returns:
+            新版本号
+        """
+        version = await self.redis.incr(VERSION_KEY)
+        logger.info(f"Article listing cache invalidated: version={version}")
+        return version
+
+    @staticmethod
+    def _key(version: int, category: Optional[str], page: int, page_size: int) -> str:
+        return f"articles:list:v{version}:{category or '*'}:{page}:{page_size}"
@@ -2,80 +2,319 @@
 Education Article Service
 """
 
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional, Set
 from datetime import datetime
+from loguru import logger
 from motor.motor_asyncio import AsyncIOMotorClient
-from redis import asyncio as aioredis
 from app.config import settings
 from app.models import Article
+from app.services.article_listing_cache import ArticleListingCache
+from app.services.article_views import ArticleViewCounter, views_key
+from app.services.instrumentation import InstrumentedRedis, MongoCommandMetrics
+from app.services.metrics_service import get_metrics_service
+from app.services.pagination import keyset_query, keyset_sort, paginate
 import json
 
+# 列表查询只读取排序键（由索引覆盖），文章详情批量从缓存加载
+_LIST_PROJECTION = {"_id": 0, "id": 1, "created_at": 1}
+_FAVORITE_PROJECTION = {"_id": 0, "article_id": 1, "created_at": 1}
+
 
 class ArticleService:
     """科普文章管理服务"""
 
     def __init__(self):
-        self.mongo_client = AsyncIOMotorClient(settings.mongodb_url)
+        self.mongo_client = AsyncIOMotorClient(
+            settings.mongodb_url,
+            serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+            event_listeners=[MongoCommandMetrics()],
+        )
         self.db = self.mongo_client[settings.mongodb_db_name]
         self.articles_collection = self.db["articles"]
         self.favorites_collection = self.db["favorites"]
 
         # Redis缓存
-        self.redis = aioredis.from_url(
+        self.redis = InstrumentedRedis.from_url(
             f"redis://{settings.redis_host}:{settings.redis_port}/{settings.redis_db}",
             password=settings.redis_password,
             decode_responses=True,
         )
 
+        # 浏览量先计入 Redis，由后台任务批量写入 MongoDB
+        self.views = ArticleViewCounter(self.redis, self.articles_collection)
+        # 各分类前 K 页的列表缓存
+        self.listings = ArticleListingCache(self.redis)
+        self._warm_task: Optional[asyncio.Task] = None
+        self.metrics = get_metrics_service()
+
     async def get_articles(
         self,
         category: Optional[str] = None,
         page: int = 1,
         page_size: int = 20,
-    ) -> tuple[List[Article], int]:
-        """获取文章列表"""
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[Article], Optional[int], Optional[str]]:
+        """
+        获取文章列表（按创建时间倒序）
+
+        传入 cursor 时使用游标分页，忽略 page。前 K 页的结果缓存在 Redis 中。
+
+        Returns:
+            (文章列表, 总数, 下一页游标)，with_total=False 时总数为 None
+
+        Raises:
+            InvalidCursorError: 游标格式错误
+        """
+        cacheable = self.listings.cacheable(page, cursor)
+        if cacheable:
+            version, listing = await self.listings.get(category, page, page_size)
+            if listing is None:
+                ids, next_cursor = await self._list_article_ids(
+                    category, page_size, skip=(page - 1) * page_size
+                )
+                listing = {
+                    "ids": ids,
+                    "next_cursor": next_cursor,
+                    "total": await self._count_articles(category),
+                }
+                await self.listings.set(version, category, page, page_size, listing)
+
+            articles = await self.get_articles_by_ids(listing["ids"])
+            return articles, listing["total"] if with_total else None, listing["next_cursor"]
+
+        skip = (page - 1) * page_size if not cursor else 0
+        ids, next_cursor = await self._list_article_ids(category, page_size, cursor, skip)
+        articles = await self.get_articles_by_ids(ids)
+
+        total = await self._count_articles(category) if with_total else None
+        return articles, total, next_cursor
+
+    async def _list_article_ids(
+        self,
+        category: Optional[str],
+        page_size: int,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+    ) -> tuple[List[str], Optional[str]]:
+        """查询一页文章 ID 和下一页游标"""
         query = {}
         if category:
             query["category"] = category
 
-        # 计算总数
-        total = await self.articles_collection.count_documents(query)
+        find = self.articles_collection.find(
+            keyset_query(query, "created_at", cursor), _LIST_PROJECTION
+        ).sort(keyset_sort("created_at"))
+        if skip:
+            find = find.skip(skip)
+
+        docs = [doc async for doc in find.limit(page_size + 1)]
+        docs, next_cursor = paginate(docs, page_size, "created_at")
+        return [doc["id"] for doc in docs], next_cursor
+
+    async def warm_listings(self, page_size: int = 20) -> int:
+        """
+        预热列表缓存：为全部文章和每个分类构建前 K 页，同时回填文章详情缓存
 
-        # 分页查询
-        skip = (page - 1) * page_size
-        cursor = (
-            self.articles_collection.find(query).sort("created_at", -1).skip(skip).limit(page_size)
+        Args:
+            page_size: 每页数量（与客户端默认值一致）
+
+        Returns:
+            构建的页数
+        """
+        version = await self.listings.version()
+        categories = [None] + sorted(await self.articles_collection.distinct("category"))
+
+        built = 0
+        for category in categories:
+            total = await self._count_articles(category)
+            cursor = None
+            for page in range(1, settings.article_list_cache_pages + 1):
+                # 按游标逐页构建，避免 skip
+                ids, next_cursor = await self._list_article_ids(category, page_size, cursor)
+                await self.listings.set(
+                    version,
+                    category,
+                    page,
+                    page_size,
+                    {"ids": ids, "next_cursor": next_cursor, "total": total},
+                )
+                await self.get_articles_by_ids(ids)
+                built += 1
+                if not next_cursor:
+                    break
+                cursor = next_cursor
+
+        logger.info(f"Article listing cache warmed: version={version}, pages={built}")
+        return built
+
+    def schedule_warm(self) -> None:
+        """在后台预热列表缓存（启动时和文章写入后调用），进行中的预热会被取消重来"""
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+        self._warm_task = asyncio.create_task(self._warm())
+
+    async def _warm(self) -> None:
+        try:
+            await self.warm_listings()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Article listing cache warm-up failed: {e}")
+
+    async def save_article(self, article: Article) -> None:
+        """
+        创建或更新文章，并使文章缓存和列表缓存失效
+
+        Args:
+            article: 文章
+        """
+        previous = await self.articles_collection.find_one_and_replace(
+            {"id": article.id}, article.model_dump(), upsert=True
         )
+        categories = {article.category}
+        if previous:
+            categories.add(previous["category"])
+        await self._invalidate(article.id, categories)
 
-        articles = []
-        async for doc in cursor:
-            articles.append(Article(**doc))
+    async def delete_article(self, article_id: str) -> bool:
+        """
+        删除文章，并使文章缓存和列表缓存失效
+
+        Args:
+            article_id: 文章 ID
+
+        Returns:
+            是否删除
+        """
+        previous = await self.articles_collection.find_one_and_delete({"id": article_id})
+        if not previous:
+            return False
+        await self._invalidate(article_id, {previous["category"]})
+        return True
+
+    async def _invalidate(self, article_id: str, categories: Set[str]) -> None:
+        """文章写入后：删除文章详情和分类计数缓存，递增列表版本号并重新预热"""
+        await self.redis.delete(
+            f"article:{article_id}", *[f"articles:count:{c}" for c in categories]
+        )
+        await self.listings.invalidate()
+        self.schedule_warm()
+
+    async def close(self) -> None:
+        """停止预热任务，并把未落库的浏览量写入 MongoDB"""
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+            await asyncio.gather(self._warm_task, return_exceptions=True)
+        await self.views.close()
 
-        return articles, total
+    async def _count_articles(self, category: Optional[str]) -> int:
+        """
+        文章总数：不筛选时使用集合元数据估算，按分类筛选时缓存计数结果
+        """
+        if not category:
+            return await self.articles_collection.estimated_document_count()
 
-    async def get_article(self, article_id: str) -> Optional[Article]:
-        """获取文章详情"""
+        cache_key = f"articles:count:{category}"
+        cached = await self.redis.get(cache_key)
+        if cached is not None:
+            self.metrics.record_cache_hit("article_count")
+            return int(cached)
+        self.metrics.record_cache_miss("article_count")
+
+        total = await self.articles_collection.count_documents({"category": category})
+        await self.redis.setex(cache_key, settings.article_count_cache_ttl, total)
+        return total
+
+    async def get_article(
+        self, article_id: str, viewer_id: Optional[str] = None
+    ) -> Optional[Article]:
+        """
+        获取文章详情并记录一次浏览
+
+        Args:
+            article_id: 文章 ID
+            viewer_id: 访客标识（用户 ID 或 IP），用于统计独立访客
+
+        Returns:
+            文章（浏览量含尚未落库的增量），不存在时返回 None
+        """
         # 尝试从缓存获取
         cache_key = f"article:{article_id}"
         cached = await self.redis.get(cache_key)
         if cached:
-            return Article(**json.loads(cached))
+            self.metrics.record_cache_hit("article")
+            article = Article(**json.loads(cached))
+        else:
+            self.metrics.record_cache_miss("article")
+            # 从数据库获取
+            doc = await self.articles_collection.find_one({"id": article_id})
+            if not doc:
+                return None
 
-        # 从数据库获取
-        doc = await self.articles_collection.find_one({"id": article_id})
-        if doc:
             article = Article(**doc)
+            await self.redis.setex(cache_key, settings.redis_cache_ttl, article.model_dump_json())
 
-            # 增加浏览量
-            await self.articles_collection.update_one({"id": article_id}, {"$inc": {"views": 1}})
-            article.views += 1
+        # 增加浏览量（只写 Redis）
+        pending, unique_views = await self.views.record_view(article_id, viewer_id)
+        article.views += pending
+        if unique_views:
+            article.unique_views = max(article.unique_views, unique_views)
 
-            # 缓存
-            await self.redis.setex(cache_key, settings.redis_cache_ttl, article.model_dump_json())
+        return article
+
+    async def get_articles_by_ids(self, article_ids: List[str]) -> List[Article]:
+        """
+        批量获取文章详情（保持传入顺序）
+
+        先用一次 MGET 读取缓存和待落库的浏览量，未命中的文章用一次 $in 查询读取并回填缓存。
+
+        Args:
+            article_ids: 文章 ID 列表
+
+        Returns:
+            文章列表，顺序与 article_ids 一致，已删除的文章会被跳过
+        """
+        if not article_ids:
+            return []
+
+        found: Dict[str, Article] = {}
+        values = await self.redis.mget(
+            [f"article:{article_id}" for article_id in article_ids]
+            + [views_key(article_id) for article_id in article_ids]
+        )
+        cached, pending = values[: len(article_ids)], values[len(article_ids) :]
+        for article_id, value in zip(article_ids, cached):
+            if value:
+                found[article_id] = Article(**json.loads(value))
 
-            return article
+        misses = [article_id for article_id in article_ids if article_id not in found]
+        self.metrics.record_cache_hit("article", len(found))
+        self.metrics.record_cache_miss("article", len(misses))
+        if misses:
+            loaded = []
+            async for doc in self.articles_collection.find({"id": {"$in": misses}}):
+                article = Article(**doc)
+                found[article.id] = article
+                loaded.append(article)
 
-        return None
+            if loaded:
+                pipe = self.redis.pipeline(transaction=False)
+                for article in loaded:
+                    pipe.setex(
+                        f"article:{article.id}", settings.redis_cache_ttl, article.model_dump_json()
+                    )
+                await pipe.execute()
+
+        # 叠加尚未落库的浏览量（缓存中的文档不含这部分）
+        articles = []
+        for article_id, views in zip(article_ids, pending):
+            if article_id in found:
+                article = found[article_id].model_copy()
+                article.views += int(views or 0)
+                articles.append(article)
+        return articles
 
     async def add_favorite(self, user_id: str, article_id: str) -> bool:
         """收藏文章"""
@@ -84,6 +323,7 @@ class ArticleService:
             {"$set": {"created_at": datetime.now()}},
             upsert=True,
         )
+        await self.redis.delete(f"favorites:count:{user_id}")
         return result.upserted_id is not None or result.modified_count > 0
 
     async def remove_favorite(self, user_id: str, article_id: str) -> bool:
@@ -91,36 +331,56 @@ class ArticleService:
         result = await self.favorites_collection.delete_one(
             {"user_id": user_id, "article_id": article_id}
         )
+        await self.redis.delete(f"favorites:count:{user_id}")
         return result.deleted_count > 0
 
     async def get_user_favorites(
-        self, user_id: str, page: int = 1, page_size: int = 20
-    ) -> tuple[List[Article], int]:
-        """获取用户收藏的文章"""
+        self,
+        user_id: str,
+        page: int = 1,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[Article], Optional[int], Optional[str]]:
+        """
+        获取用户收藏的文章（按收藏时间倒序）
+
+        传入 cursor 时使用游标分页，忽略 page。
+
+        Returns:
+            (文章列表, 总数, 下一页游标)，with_total=False 时总数为 None
+
+        Raises:
+            InvalidCursorError: 游标格式错误
+        """
         # 获取收藏的文章ID
-        skip = (page - 1) * page_size
-        cursor = (
-            self.favorites_collection.find({"user_id": user_id})
-            .sort("created_at", -1)
-            .skip(skip)
-            .limit(page_size)
+        query = keyset_query({"user_id": user_id}, "created_at", cursor, id_field="article_id")
+        find = self.favorites_collection.find(query, _FAVORITE_PROJECTION).sort(
+            keyset_sort("created_at", id_field="article_id")
         )
+        if page > 1 and not cursor:
+            find = find.skip((page - 1) * page_size)
 
-        article_ids = []
-        async for doc in cursor:
-            article_ids.append(doc["article_id"])
+        favorites = [doc async for doc in find.limit(page_size + 1)]
+        favorites, next_cursor = paginate(favorites, page_size, "created_at", id_field="article_id")
+        # 按收藏顺序批量获取文章详情
+        articles = await self.get_articles_by_ids([doc["article_id"] for doc in favorites])
 
-        # 获取文章详情
-        articles = []
-        if article_ids:
-            cursor = self.articles_collection.find({"id": {"$in": article_ids}})
-            async for doc in cursor:
-                articles.append(Article(**doc))
+        total = await self._count_favorites(user_id) if with_total else None
+        return articles, total, next_cursor
 
-        # 计算总数
-        total = await self.favorites_collection.count_documents({"user_id": user_id})
+    async def _count_favorites(self, user_id: str) -> int:
+        """用户收藏总数（缓存，收藏/取消收藏时失效）"""
+        cache_key = f"favorites:count:{user_id}"
+        cached = await self.redis.get(cache_key)
+        if cached is not None:
+            self.metrics.record_cache_hit("favorite_count")
+            return int(cached)
+        self.metrics.record_cache_miss("favorite_count")
 
-        return articles, total
+        total = await self.favorites_collection.count_documents({"user_id": user_id})
+        await self.redis.setex(cache_key, settings.redis_cache_ttl, total)
+        return total
 
 
 # 全局实例
@@ -0,0 +1,190 @@
+"""
+文章浏览量缓冲计数
+
+每次阅读只写 Redis，不写 MongoDB：
+- article:{id}:views      待落库的浏览量增量（INCR）
+- article:{id}:viewers    独立访客（HyperLogLog）
+- articles:views:dirty    有待落库增量的文章 ID 集合
+
+后台任务按固定间隔把增量用 bulk_write 批量 $inc 到 MongoDB，独立访客数以 $max 写入，
+同时把已落库的增量原地加到缓存的文章文档上（不删除缓存，避免热点文章每次刷写后回源）；
+读取文章时在缓存的文档上叠加尚未落库的增量。
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+
+from app.config import settings
+
+DIRTY_KEY = "articles:views:dirty"
+
+# 把已落库的增量加到缓存的文章文档（JSON）的 views 字段上，保留原有过期时间；
+# 未缓存的文章跳过。ARGV[i] 为 KEYS[i] 的增量
+_ADD_CACHED_VIEWS = """
+local updated = 0
+for i, key in ipairs(KEYS) do
+    local doc = redis.call('GET', key)
+    if doc then
+        local count = tonumber(ARGV[i])
+        local new_doc, n = string.gsub(doc, '"views":(%d+)', function(views)
+            return '"views":' .. string.format('%d', tonumber(views) + count)
+        end, 1)
+        if n > 0 then
+            redis.call('SET', key, new_doc, 'KEEPTTL')
+            updated = updated + 1
+        end
+    end
+end
+return updated
+"""
+
+
+def views_key(article_id: str) -> str:
+    return f"article:{article_id}:views"
+
+
+def viewers_key(article_id: str) -> str:
+    return f"article:{article_id}:viewers"
+
+
+class ArticleViewCounter:
+    """文章浏览量缓冲计数器"""
+
+    def __init__(self, redis, collection: AsyncIOMotorCollection):
+        """
+        初始化计数器
+
+        Args:
+            redis: Redis 异步客户端
+            collection: 文章集合
+        """
+        self.redis = redis
+        self.collection = collection
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def record_view(
+        self, article_id: str, viewer_id: Optional[str] = None
+    ) -> Tuple[int, Optional[int]]:
+        """
+        记录一次浏览
+
+        Args:
+            article_id: 文章 ID
+            viewer_id: 访客标识（用户 ID 或 IP），为空时不计独立访客
+
+        Returns:
+            (待落库的浏览量增量, 独立访客数)，未传入访客时独立访客数为 None
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.incr(views_key(article_id))
+        pipe.sadd(DIRTY_KEY, article_id)
+        if viewer_id:
+            pipe.pfadd(viewers_key(article_id), viewer_id)
+            pipe.pfcount(viewers_key(article_id))
+        results = await pipe.execute()
+        return results[0], results[3] if viewer_id else None
+
+    async def flush(self) -> int:
+        """
+        把一批浏览量增量写入 MongoDB
+
+        Returns:
+            处理的文章数
+        """
+        article_ids: List[str] = await self.redis.spop(
+            DIRTY_KEY, settings.article_view_flush_batch_size
+        )
+        if not article_ids:
+            return 0
+
+        # GETDEL 原子取走增量，取走之后的新浏览会重新加入 dirty 集合
+        pipe = self.redis.pipeline(transaction=False)
+        for article_id in article_ids:
+            pipe.getdel(views_key(article_id))
+            pipe.pfcount(viewers_key(article_id))
+        results = await pipe.execute()
+
+        increments: Dict[str, int] = {}
+        operations = []
+        for i, article_id in enumerate(article_ids):
+            count, unique = results[2 * i], results[2 * i + 1]
+            if not count:
+                continue
+            increments[article_id] = int(count)
+            update = {"$inc": {"views": int(count)}}
+            if unique:
+                update["$max"] = {"unique_views": unique}
+            operations.append(UpdateOne({"id": article_id}, update))
+
+        if not operations:
+            return len(article_ids)
+
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception:
+            await self._restore(increments)
+            raise
+
+        # 已落库的增量不再计入待落库增量，同步加到缓存的文章文档上
+        await self.redis.eval(
+            _ADD_CACHED_VIEWS,
+            len(increments),
+            *[f"article:{article_id}" for article_id in increments],
+            *increments.values(),
+        )
+        logger.debug("Article views flushed: {count} articles", count=len(increments))
+        return len(article_ids)
+
+    async def _restore(self, increments: Dict[str, int]) -> None:
+        """写入失败时把取走的增量放回 Redis"""
+        pipe = self.redis.pipeline(transaction=False)
+        for article_id, count in increments.items():
+            pipe.incrby(views_key(article_id), count)
+            pipe.sadd(DIRTY_KEY, article_id)
+        await pipe.execute()
+
+    def start(self) -> None:
+        """启动后台刷写任务"""
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Article view flusher started: interval={settings.article_view_flush_interval}s"
+        )
+
+    async def close(self) -> None:
+        """停止后台任务，并把剩余增量写入 MongoDB"""
+        if self._task is None:
+            return
+
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+        try:
+            while await self.flush() > 0:
+                pass
+        except Exception as e:
+            logger.error(f"Article view flush on shutdown failed: {e}")
+        logger.info("Article view flusher stopped")
+
+    async def _run(self) -> None:
+        """后台刷写循环"""
+        while not self._stopping.is_set():
+            try:
+                flushed = await self.flush()
+            except Exception as e:
+                logger.error(f"Article view flush failed: {e}")
+                flushed = 0
+
+            if flushed < settings.article_view_flush_batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=settings.article_view_flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
@@ -12,6 +12,7 @@ from typing import Any, Callable, Optional, TypeVar
 from loguru import logger
 
 from app.services.redis_service import get_redis_service
+from app.core.tracing import set_span_attributes
 from app.services.metrics_service import get_metrics_service
 
 # 类型变量
@@ -72,12 +73,12 @@ def cache_result(
             # 尝试从缓存读取
             cached_value = await redis.get(cache_key)
             if cached_value is not None:
-                logger.debug(f"Cache hit: {cache_key}")
+                logger.debug("Cache hit: {key}", key=cache_key)
                 metrics.record_cache_hit(cache_type)
                 return cached_value
 
             # 缓存未命中，执行函数
-            logger.debug(f"Cache miss: {cache_key}")
+            logger.debug("Cache miss: {key}", key=cache_key)
             metrics.record_cache_miss(cache_type)
             result = await func(*args, **kwargs)
 
@@ -140,12 +141,13 @@ class CacheManager:
         """
         cache_key = generate_cache_key(cache_type, key)
         value = await self.redis.get(cache_key)
+        set_span_attributes(**{f"cache.{cache_type}.hit": value is not None})
         if value is not None:
             self.metrics.record_cache_hit(cache_type)
-            logger.debug(f"Cache hit for {cache_type}: {cache_key}")
+            logger.debug("Cache hit for {cache_type}: {key}", cache_type=cache_type, key=cache_key)
         else:
             self.metrics.record_cache_miss(cache_type)
-            logger.debug(f"Cache miss for {cache_type}: {cache_key}")
+            logger.debug("Cache miss for {cache_type}: {key}", cache_type=cache_type, key=cache_key)
         return value
 
     async def set(
@@ -173,7 +175,12 @@ class CacheManager:
         cache_key = generate_cache_key(cache_type, key)
         success = await self.redis.set(cache_key, value, ttl=ttl)
         if success:
-            logger.debug(f"Cache set for {cache_type}: {cache_key} (TTL: {ttl}s)")
+            logger.debug(
+                "Cache set for {cache_type}: {key} (TTL: {ttl}s)",
+                cache_type=cache_type,
+                key=cache_key,
+                ttl=ttl,
+            )
         return success
 
     async def delete(self, cache_type: str, key: str) -> int:
@@ -190,7 +197,9 @@ class CacheManager:
         cache_key = generate_cache_key(cache_type, key)
         count = await self.redis.delete(cache_key)
         if count > 0:
-            logger.debug(f"Cache deleted for {cache_type}: {cache_key}")
+            logger.debug(
+                "Cache deleted for {cache_type}: {key}", cache_type=cache_type, key=cache_key
+            )
         return count
 
     async def clear_by_prefix(self, prefix: str) -> int:
@@ -0,0 +1,281 @@
+"""
+熔断器模块
+
+为外部依赖（DeepSeek、Embedding、Qdrant、MongoDB）提供统一的熔断保护：
+- 基于最近 N 次调用的失败率窗口判断是否熔断
+- 熔断期间快速失败，不再占用重试/退避时间
+- 熔断超时后进入半开状态，放行少量探测请求
+- 状态同步到 Prometheus 和健康检查接口
+"""
+
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from loguru import logger
+
+from app.config import settings
+from app.services.metrics_service import get_metrics_service
+
+T = TypeVar("T")
+
+
+class CircuitState:
+    """熔断器状态常量"""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+# Prometheus gauge 取值
+_STATE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被拒绝"""
+
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"Circuit breaker '{name}' is open")
+
+
+class CircuitBreaker:
+    """
+    失败率窗口熔断器
+
+    closed -> open: 窗口内调用数 >= min_calls 且失败率 >= failure_rate
+    open -> half_open: 打开持续 open_seconds 秒后
+    half_open -> closed: 探测请求成功
+    half_open -> open: 探测请求失败
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_max_calls: Optional[int] = None,
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            name: 依赖名称（用于日志和指标标签）
+            window_size: 失败率统计窗口（最近调用次数）
+            min_calls: 触发熔断所需的最少调用次数
+            failure_rate: 触发熔断的失败率阈值（0-1）
+            open_seconds: 熔断打开持续时间（秒）
+            half_open_max_calls: 半开状态允许的并发探测请求数
+            is_failure: 判断异常是否计为失败（默认所有异常都计为失败）
+        """
+        self.name = name
+        self.window_size = window_size or settings.circuit_breaker_window_size
+        self.min_calls = min_calls or settings.circuit_breaker_min_calls
+        self.failure_rate = failure_rate or settings.circuit_breaker_failure_rate
+        self.open_seconds = (
+            open_seconds if open_seconds is not None else settings.circuit_breaker_open_seconds
+        )
+        self.half_open_max_calls = (
+            half_open_max_calls or settings.circuit_breaker_half_open_max_calls
+        )
+        self.is_failure = is_failure or (lambda error: True)
+
+        self._state = CircuitState.CLOSED
+        self._outcomes: deque = deque(maxlen=self.window_size)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._rejected = 0
+
+        get_metrics_service().record_circuit_breaker_state(self.name, _STATE_VALUES[self._state])
+
+    @property
+    def state(self) -> str:
+        """当前状态（打开超时后自动转为半开）"""
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.open_seconds
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        判断是否放行请求
+
+        Returns:
+            放行返回 True
+        """
+        if not settings.circuit_breaker_enabled:
+            return True
+
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+
+        self._rejected += 1
+        get_metrics_service().record_circuit_breaker_rejection(self.name)
+        return False
+
+    def record_success(self) -> None:
+        """记录一次成功调用"""
+        if self._state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        if self._state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            return
+
+        self._outcomes.append(False)
+        if self._state == CircuitState.CLOSED and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for ok in self._outcomes if not ok)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(CircuitState.OPEN)
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        通过熔断器执行异步调用
+
+        Args:
+            func: 无参异步函数
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        try:
+            result = await func()
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except BaseException:
+            # 被取消（对冲请求、客户端断开）不计入结果，只释放半开探测名额
+            self._release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def call_sync(self, func: Callable[[], T]) -> T:
+        """
+        通过熔断器执行同步调用
+
+        Args:
+            func: 无参同步函数
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        try:
+            result = func()
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except BaseException:
+            # KeyboardInterrupt / SystemExit 不计入结果，只释放半开探测名额
+            self._release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取熔断器状态
+
+        Returns:
+            状态字典
+        """
+        failures = sum(1 for ok in self._outcomes if not ok)
+        return {
+            "state": self.state,
+            "failure_rate": round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "window_calls": len(self._outcomes),
+            "rejected": self._rejected,
+        }
+
+    def reset(self) -> None:
+        """重置为关闭状态"""
+        self._transition(CircuitState.CLOSED)
+
+    def _record_error(self, error: Exception) -> None:
+        """根据异常类型记录失败或成功"""
+        if self.is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def _release_probe(self) -> None:
+        """释放一个半开探测名额"""
+        if self._state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def _transition(self, state: str) -> None:
+        """切换状态"""
+        if state == self._state:
+            return
+
+        previous = self._state
+        self._state = state
+        self._half_open_calls = 0
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CircuitState.CLOSED:
+            self._outcomes.clear()
+
+        get_metrics_service().record_circuit_breaker_state(self.name, _STATE_VALUES[state])
+        log = logger.warning if state == CircuitState.OPEN else logger.info
+        log(f"Circuit breaker '{self.name}': {previous} -> {state}")
+
+
+# 全局注册表
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(
+    name: str, is_failure: Optional[Callable[[Exception], bool]] = None
+) -> CircuitBreaker:
+    """
+    获取指定依赖的熔断器（单例）
+
+    Args:
+        name: 依赖名称（deepseek、embedding、qdrant、mongodb）
+        is_failure: 判断异常是否计为失败（仅首次创建时生效）
+
+    Returns:
+        熔断器实例
+    """
+    if name not in _circuit_breakers:
+        _circuit_breakers[name] = CircuitBreaker(name, is_failure=is_failure)
+    return _circuit_breakers[name]
+
+
+def get_circuit_breakers_status() -> Dict[str, Dict[str, Any]]:
+    """
+    获取所有熔断器状态
+
+    Returns:
+        {依赖名称: 状态字典}
+    """
+    return {name: breaker.get_status() for name, breaker in _circuit_breakers.items()}
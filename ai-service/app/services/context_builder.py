@@ -0,0 +1,168 @@
+"""
+Prompt 上下文构建模块
+
+按 Token 预算组装多轮对话 Prompt：
+- System Prompt、患者上下文和当前问题必须保留
+- 检索片段去重后按相关度顺序装入，最多占用 context_max_chunk_tokens
+- 早期对话的摘要（如有）代替原文进入 Prompt
+- 剩余预算从最近的对话轮次向前填充，超出时丢弃最早的轮次
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from app.config import settings
+from app.models import ChatMessage
+from app.services.token_counter import MESSAGE_OVERHEAD_TOKENS, count_message_tokens, count_tokens
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def message_tokens(message: ChatMessage) -> int:
+    """
+    获取消息 Token 数（优先使用写入时缓存的值）
+
+    Args:
+        message: 对话消息
+
+    Returns:
+        Token 数（含消息格式开销）
+    """
+    tokens = message.token_count
+    if tokens is None:
+        tokens = count_tokens(message.content)
+    return tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextBuilder:
+    """Token 预算内的 Prompt 组装器"""
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        max_chunk_tokens: Optional[int] = None,
+    ):
+        """
+        初始化上下文构建器
+
+        Args:
+            max_tokens: Prompt 总 Token 上限
+            max_chunk_tokens: 检索片段 Token 上限
+        """
+        self.max_tokens = max_tokens or settings.context_max_tokens
+        self.max_chunk_tokens = max_chunk_tokens or settings.context_max_chunk_tokens
+
+    def select_chunks(self, chunks: Sequence[str], budget: Optional[int] = None) -> List[str]:
+        """
+        去重并按预算选取检索片段
+
+        去除空白后内容相同、或被已选片段包含的片段会被跳过。
+
+        Args:
+            chunks: 按相关度排序的检索片段
+            budget: Token 预算，默认使用 max_chunk_tokens
+
+        Returns:
+            选中的片段（保持原顺序）
+        """
+        budget = self.max_chunk_tokens if budget is None else budget
+        selected: List[str] = []
+        normalized: List[str] = []
+        used = 0
+
+        for chunk in chunks:
+            key = _WHITESPACE.sub("", chunk or "")
+            if not key or any(key in existing for existing in normalized):
+                continue
+
+            tokens = count_tokens(chunk)
+            if used + tokens > budget:
+                continue
+
+            selected.append(chunk)
+            normalized.append(key)
+            used += tokens
+
+        if len(selected) < len(chunks):
+            logger.debug(
+                "Context chunks: kept {kept}/{total}, tokens={tokens}",
+                kept=len(selected),
+                total=len(chunks),
+                tokens=used,
+            )
+        return selected
+
+    def build(
+        self,
+        head: List[Dict[str, str]],
+        history: Sequence[ChatMessage],
+        tail: List[Dict[str, str]],
+        summary: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        组装 Prompt：head + 对话摘要 + 裁剪后的历史 + tail
+
+        Args:
+            head: 前置消息（System Prompt，必须保留）
+            history: 按时间顺序排列的历史消息（不含当前问题）
+            tail: 后置消息（当前问题，必须保留）
+            summary: 早期对话摘要
+
+        Returns:
+            消息列表
+        """
+        if summary:
+            head = head + [{"role": "system", "content": f"此前对话摘要：\n{summary}"}]
+
+        used = count_message_tokens(head) + count_message_tokens(tail)
+        remaining = self.max_tokens - used
+
+        kept: List[ChatMessage] = []
+        for message in reversed(history):
+            tokens = message_tokens(message)
+            if tokens > remaining:
+                break
+            kept.append(message)
+            remaining -= tokens
+        kept.reverse()
+
+        # 避免历史以孤立的助手回复开头
+        while kept and kept[0].role == "assistant":
+            remaining += message_tokens(kept.pop(0))
+
+        if len(kept) < len(history):
+            logger.debug(
+                "Context history trimmed: kept {kept}/{total} messages, "
+                "tokens={tokens}/{max_tokens}",
+                kept=len(kept),
+                total=len(history),
+                tokens=self.max_tokens - remaining,
+                max_tokens=self.max_tokens,
+            )
+        if remaining < 0:
+            logger.warning(
+                f"Prompt exceeds context budget before history: "
+                f"tokens={used}, budget={self.max_tokens}"
+            )
+
+        history_messages = [{"role": m.role, "content": m.content} for m in kept]
+        return head + history_messages + tail
+
+
+# 全局单例
+_context_builder: Optional[ContextBuilder] = None
+
+
+def get_context_builder() -> ContextBuilder:
+    """
+    获取上下文构建器单例
+
+    Returns:
+        ContextBuilder 实例
+    """
+    global _context_builder
+    if _context_builder is None:
+        _context_builder = ContextBuilder()
+    return _context_builder
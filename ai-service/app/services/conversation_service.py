@@ -2,29 +2,66 @@
 Conversation Storage Service (MongoDB)
 
 增强版会话管理服务，支持：
-- 上下文窗口管理（最近 N 条消息）
-- 会话过期清理
+- 分桶存储：conversations 仅保存会话头（计数、摘要、最后一条消息），
+  消息按固定大小分桶写入 conversation_messages
+- 上下文窗口管理（最近 N 条消息只读取 1~2 个桶）
+- 活跃会话的会话头和最近消息缓存在 Redis（见 session_cache），写穿透、滑动过期
+- 可选的 write-behind 模式：消息先写 Redis，后台批量落库（见 conversation_write_behind）
+- 会话过期（会话头 TTL 索引，见 mongo_indexes；消息桶随后级联清理）
 - 会话摘要生成
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
 from loguru import logger
 from app.config import settings
 from app.models import Conversation, ChatMessage
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.conversation_write_behind import ConversationWriteBehind
+from app.services.instrumentation import MongoCommandMetrics
+from app.services.pagination import keyset_query, keyset_sort, paginate
+from app.services.session_cache import SessionContextCache, get_session_cache
+from app.services.token_counter import count_tokens
 import uuid
 
+# 会话头投影（排除未迁移旧文档中的内嵌 messages 数组）
+_HEADER_PROJECTION = {"_id": 0, "messages": 0}
+
 
 class ConversationService:
     """对话历史存储服务"""
 
     def __init__(self):
-        self.client = AsyncIOMotorClient(settings.mongodb_url)
+        self.client = AsyncIOMotorClient(
+            settings.mongodb_url,
+            serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+            event_listeners=[MongoCommandMetrics()],
+        )
         self.db = self.client[settings.mongodb_db_name]
-        self.collection = self.db["conversations"]
+        self.collection = self.db["conversations"]  # 会话头文档
+        self.messages_collection = self.db["conversation_messages"]  # 消息分桶
+        # 仅连接类错误计入熔断
+        self.circuit_breaker = get_circuit_breaker(
+            "mongodb", is_failure=lambda e: isinstance(e, ConnectionFailure)
+        )
+        self.bucket_size = settings.conversation_bucket_size
         self.max_context_messages = 10  # 上下文窗口大小
-        self.session_expiry_days = 30  # 会话过期天数
+        # write-behind 模式下未落库的消息保存在缓存的消息窗口中，必须启用缓存
+        self.session_cache: Optional[SessionContextCache] = (
+            get_session_cache()
+            if settings.conversation_cache_enabled or settings.conversation_write_behind_enabled
+            else None
+        )
+        self.write_behind: Optional[ConversationWriteBehind] = (
+            ConversationWriteBehind(
+                self.collection, self.messages_collection, self.bucket_size, self.session_cache
+            )
+            if settings.conversation_write_behind_enabled
+            else None
+        )
         logger.info("Conversation service initialized")
 
     async def create_conversation(self, user_id: str) -> Conversation:
@@ -37,54 +74,259 @@ class ConversationService:
             updated_at=datetime.now(),
         )
 
-        await self.collection.insert_one(conversation.model_dump())
+        await self.circuit_breaker.call(
+            lambda: self.collection.insert_one(conversation.model_dump(exclude={"messages"}))
+        )
+        if self.session_cache:
+            await self.session_cache.set_header(conversation.model_dump(exclude={"messages"}))
         return conversation
 
     async def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
-        """获取对话"""
-        doc = await self.collection.find_one({"id": conversation_id})
-        if doc:
-            return Conversation(**doc)
-        return None
+        """获取对话（完整消息列表）"""
+        header = await self._get_header(conversation_id)
+        if not header:
+            return None
 
-    async def get_user_conversations(
-        self, user_id: str, limit: int = 20, skip: int = 0
-    ) -> List[Conversation]:
-        """获取用户的对话列表"""
-        cursor = (
-            self.collection.find({"user_id": user_id})
-            .sort("updated_at", -1)
-            .skip(skip)
-            .limit(limit)
+        return await self._with_range(header, start=0)
+
+    async def get_conversation_window(
+        self, conversation_id: str, max_messages: Optional[int] = None
+    ) -> Optional[Conversation]:
+        """
+        获取对话及最近 N 条消息（不加载完整历史）
+
+        Args:
+            conversation_id: 对话 ID
+            max_messages: 最大消息数量，默认使用配置值
+
+        Returns:
+            messages 仅含最近 N 条、message_count 为消息总数的对话
+        """
+        header = await self._get_header(conversation_id)
+        if not header:
+            return None
+
+        return await self._with_range(
+            header, max_messages=max_messages or self.max_context_messages
+        )
+
+    def _context_size(self, header: Dict[str, Any]) -> int:
+        """
+        构建 Prompt 上下文需要读取的最近消息数
+
+        启用摘要时读取尚未压缩进摘要的全部消息（由 ContextBuilder 按 Token 预算裁剪），
+        否则在摘要触发前，最近窗口之前的轮次既不在摘要中也不会发送给模型；
+        摘要长期落后时以消息窗口大小为上限。
+
+        Args:
+            header: 会话头文档
+
+        Returns:
+            消息数
+        """
+        if not settings.summary_enabled:
+            return self.max_context_messages
+        unsummarized = header.get("message_count", 0) - header.get("summarized_count", 0)
+        return max(
+            self.max_context_messages,
+            min(unsummarized, settings.conversation_hot_window_size),
         )
 
-        conversations = []
-        async for doc in cursor:
-            conversations.append(Conversation(**doc))
+    async def get_unsummarized_conversation(self, conversation_id: str) -> Optional[Conversation]:
+        """
+        获取对话及尚未压缩进摘要的全部消息
 
-        return conversations
+        Args:
+            conversation_id: 对话 ID
+
+        Returns:
+            messages 为 summarized_count 之后全部消息的对话
+        """
+        header = await self._get_header(conversation_id)
+        if not header:
+            return None
+
+        return await self._with_range(header, start=header.get("summarized_count", 0))
+
+    @staticmethod
+    def unsummarized_messages(conversation: Conversation) -> List[ChatMessage]:
+        """
+        从（窗口化的）对话中取出尚未压缩进摘要的消息
+
+        Args:
+            conversation: 对话，messages 可以只是末尾的一段
+
+        Returns:
+            消息列表
+        """
+        start = conversation.message_count - len(conversation.messages)
+        return conversation.messages[max(0, conversation.summarized_count - start) :]
+
+    async def get_user_conversations(
+        self, user_id: str, limit: int = 20, skip: int = 0, cursor: Optional[str] = None
+    ) -> Tuple[List[Conversation], Optional[str]]:
+        """
+        获取用户的对话列表（仅会话头，不含消息），按更新时间倒序
+
+        Args:
+            user_id: 用户 ID
+            limit: 每页数量
+            skip: 跳过数量（兼容旧客户端，传入 cursor 时忽略）
+            cursor: 上一页返回的游标
+
+        Returns:
+            (对话列表, 下一页游标)
+
+        Raises:
+            InvalidCursorError: 游标格式错误
+        """
+        query = keyset_query({"user_id": user_id}, "updated_at", cursor)
+        find = self.collection.find(query, _HEADER_PROJECTION).sort(keyset_sort("updated_at"))
+        if skip and not cursor:
+            find = find.skip(skip)
+
+        docs = [doc async for doc in find.limit(limit + 1)]
+        docs, next_cursor = paginate(docs, limit, "updated_at")
+
+        return [Conversation(**doc) for doc in docs], next_cursor
 
     async def add_message(
         self, conversation_id: str, message: ChatMessage
     ) -> Optional[Conversation]:
-        """添加消息到对话"""
-        result = await self.collection.update_one(
-            {"id": conversation_id},
-            {
-                "$push": {"messages": message.model_dump()},
-                "$set": {"updated_at": datetime.now()},
-            },
+        """
+        添加消息到对话
+
+        先在会话头上原子递增 message_count 分配序号，再追加到对应的桶（不存在时创建）。
+        write-behind 模式下只写 Redis，由后台任务批量落库。
+        仍内嵌 messages 数组的旧会话先就地迁移为分桶存储，避免序号从 0 开始与迁移写入的桶冲突。
+
+        Returns:
+            更新后的对话（messages 含构建上下文所需的最近消息），对话不存在时返回 None
+        """
+        # 写入时缓存 Token 数，构建上下文时无需重复计算
+        if message.token_count is None:
+            message.token_count = count_tokens(message.content)
+
+        if self.write_behind:
+            header = await self._get_header(conversation_id)
+            if header and "message_count" not in header:
+                header = await self._migrate_embedded(conversation_id)
+            if not header:
+                return None
+            seq = await self.write_behind.append(
+                conversation_id, message, header.get("message_count", 0)
+            )
+            header.update(
+                message_count=seq + 1, last_message=message.model_dump(), updated_at=datetime.now()
+            )
+            await self.session_cache.set_header(header)
+            return await self._with_range(header, max_messages=self._context_size(header))
+
+        now = datetime.now()
+
+        def allocate():
+            # 只给已迁移的会话分配序号
+            return self.collection.find_one_and_update(
+                {"id": conversation_id, "messages": {"$exists": False}},
+                {
+                    "$inc": {"message_count": 1},
+                    "$set": {"last_message": message.model_dump(), "updated_at": now},
+                },
+                projection=_HEADER_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
+
+        header = await self.circuit_breaker.call(allocate)
+        if not header:
+            if not await self._migrate_embedded(conversation_id):
+                return None
+            header = await self.circuit_breaker.call(allocate)
+            if not header:
+                return None
+
+        seq = header["message_count"] - 1
+        await self.circuit_breaker.call(
+            lambda: self.messages_collection.update_one(
+                {"conversation_id": conversation_id, "bucket": seq // self.bucket_size},
+                {
+                    # 并发追加时按序号排序，保证桶内顺序
+                    "$push": {
+                        "messages": {
+                            "$each": [{**message.model_dump(), "seq": seq}],
+                            "$sort": {"seq": 1},
+                        }
+                    },
+                    "$inc": {"count": 1},
+                    "$set": {"updated_at": now},
+                },
+                upsert=True,
+            )
         )
+        if self.session_cache:
+            await self.session_cache.append(header, message, seq)
 
-        if result.modified_count > 0:
-            return await self.get_conversation(conversation_id)
-        return None
+        return await self._with_range(header, max_messages=self._context_size(header))
 
     async def delete_conversation(self, conversation_id: str) -> bool:
         """删除对话"""
         result = await self.collection.delete_one({"id": conversation_id})
+        await self.messages_collection.delete_many({"conversation_id": conversation_id})
+        if self.write_behind:
+            await self.write_behind.discard(conversation_id)
+        elif self.session_cache:
+            await self.session_cache.discard(conversation_id)
         return result.deleted_count > 0
 
+    async def purge_expired_buckets(
+        self, after: Optional[Tuple[datetime, Any]] = None, batch_size: int = 1000
+    ) -> Tuple[int, Optional[Tuple[datetime, Any]]]:
+        """
+        删除会话头已被 TTL 索引删除的会话的消息桶（检查一批）
+
+        消息桶不设 TTL（活跃会话较早的桶不再写入，会先于会话头过期）。会话头在最后一次写入
+        conversation_ttl_days 天后删除，届时该会话的全部消息桶都早于截止时间，
+        因此只需在早于截止时间的桶中查找会话头已不存在的会话。
+        仍然活跃的长会话的旧桶也早于截止时间且不会被删除，因此按 (updated_at, _id)
+        游标逐批向后检查，而不是每次从头读取。
+
+        Args:
+            after: 上一批最后一个桶的 (updated_at, _id)，从头开始时为 None
+            batch_size: 每批检查的桶数
+
+        Returns:
+            (清理的会话数量, 下一批的起点)，已检查完全部候选桶时起点为 None
+        """
+        if settings.conversation_ttl_days <= 0:
+            return 0, None
+
+        cutoff = datetime.now() - timedelta(days=settings.conversation_ttl_days)
+        query: Dict[str, Any] = {"updated_at": {"$lt": cutoff}}
+        if after:
+            updated_at, bucket_id = after
+            query["$or"] = [
+                {"updated_at": {"$gt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$gt": bucket_id}},
+            ]
+        find = (
+            self.messages_collection.find(query, {"conversation_id": 1, "updated_at": 1})
+            .sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+            .limit(batch_size)
+        )
+        buckets = [bucket async for bucket in find]
+        if not buckets:
+            return 0, None
+
+        candidates = {bucket["conversation_id"] for bucket in buckets}
+        headers = self.collection.find({"id": {"$in": list(candidates)}}, {"_id": 0, "id": 1})
+        expired = candidates - {header["id"] async for header in headers}
+        if expired:
+            await self.messages_collection.delete_many({"conversation_id": {"$in": list(expired)}})
+            logger.info(f"Purged message buckets of {len(expired)} expired conversations")
+
+        last = buckets[-1]
+        next_after = (last["updated_at"], last["_id"]) if len(buckets) == batch_size else None
+        return len(expired), next_after
+
     async def get_context_messages(
         self, conversation_id: str, max_messages: Optional[int] = None
     ) -> List[ChatMessage]:
@@ -98,66 +340,95 @@ class ConversationService:
         Returns:
             消息列表
         """
-        max_messages = max_messages or self.max_context_messages
-        conversation = await self.get_conversation(conversation_id)
+        conversation = await self.get_conversation_window(conversation_id, max_messages)
 
-        if not conversation or not conversation.messages:
+        if not conversation:
             return []
 
-        # 返回最近的 N 条消息
-        return conversation.messages[-max_messages:]
+        return conversation.messages
 
-    async def clear_old_messages(self, conversation_id: str, keep_recent: int = 10) -> bool:
+    async def get_context_window(
+        self, conversation_id: str, max_messages: Optional[int] = None
+    ) -> Tuple[Optional[str], List[ChatMessage]]:
         """
-        清理旧消息，只保留最近的 N 条
+        获取 Prompt 上下文：早期对话摘要 + 尚未压缩的最近消息
 
         Args:
             conversation_id: 对话 ID
-            keep_recent: 保留的消息数量
+            max_messages: 最大消息数量，默认读取尚未压缩进摘要的全部消息
 
         Returns:
-            是否成功
+            (摘要, 消息列表)
         """
-        conversation = await self.get_conversation(conversation_id)
+        header = await self._get_header(conversation_id)
+        if not header:
+            return None, []
 
-        if not conversation or len(conversation.messages) <= keep_recent:
-            return True
+        conversation = await self._with_range(
+            header, max_messages=max_messages or self._context_size(header)
+        )
+
+        return conversation.summary, self.unsummarized_messages(conversation)
 
-        # 保留最近的消息
-        recent_messages = conversation.messages[-keep_recent:]
+    async def update_summary(
+        self,
+        conversation_id: str,
+        summary: str,
+        summarized_count: int,
+        expected_count: int,
+    ) -> bool:
+        """
+        更新对话摘要
 
+        仅当 summarized_count 仍为 expected_count 时写入，避免并发摘要互相覆盖。
+
+        Args:
+            conversation_id: 对话 ID
+            summary: 新摘要
+            summarized_count: 新摘要覆盖的消息数
+            expected_count: 读取时的 summarized_count
+
+        Returns:
+            是否成功
+        """
+        # 旧文档没有 summarized_count 字段，None 可匹配缺失字段
+        expected = {"$in": [0, None]} if expected_count == 0 else expected_count
         result = await self.collection.update_one(
-            {"id": conversation_id},
-            {
-                "$set": {
-                    "messages": [msg.model_dump() for msg in recent_messages],
-                    "updated_at": datetime.now(),
-                }
-            },
+            {"id": conversation_id, "summarized_count": expected},
+            {"$set": {"summary": summary, "summarized_count": summarized_count}},
         )
-
+        if result.modified_count > 0 and self.session_cache:
+            await self.session_cache.invalidate(conversation_id)
         return result.modified_count > 0
 
-    async def cleanup_expired_sessions(self) -> int:
+    async def clear_old_messages(self, conversation_id: str, keep_recent: int = 10) -> bool:
         """
-        清理过期会话
+        清理旧消息，至少保留最近的 N 条
+
+        按桶删除，最近 N 条所在桶之前的桶整体删除；消息序号和 message_count 不变。
+
+        Args:
+            conversation_id: 对话 ID
+            keep_recent: 保留的消息数量
 
         Returns:
-            清理的会话数量
+            是否成功
         """
-        expiry_date = datetime.now() - timedelta(days=self.session_expiry_days)
+        header = await self._get_header(conversation_id)
 
-        result = await self.collection.delete_many({"updated_at": {"$lt": expiry_date}})
+        if not header or header.get("message_count", 0) <= keep_recent:
+            return True
 
-        deleted_count = result.deleted_count
-        if deleted_count > 0:
-            logger.info(f"Cleaned up {deleted_count} expired sessions")
+        first_kept_bucket = (header["message_count"] - keep_recent) // self.bucket_size
+        result = await self.messages_collection.delete_many(
+            {"conversation_id": conversation_id, "bucket": {"$lt": first_kept_bucket}}
+        )
 
-        return deleted_count
+        return result.deleted_count > 0
 
     async def get_session_info(self, conversation_id: str) -> Optional[dict]:
         """
-        获取会话信息
+        获取会话信息（只读取会话头）
 
         Args:
             conversation_id: 对话 ID
@@ -165,20 +436,252 @@ class ConversationService:
         Returns:
             会话信息字典
         """
-        conversation = await self.get_conversation(conversation_id)
+        header = await self._get_header(conversation_id)
 
-        if not conversation:
+        if not header:
             return None
 
+        conversation = Conversation(**header)
         return {
             "id": conversation.id,
             "user_id": conversation.user_id,
-            "message_count": len(conversation.messages),
+            "message_count": conversation.message_count,
             "created_at": conversation.created_at,
             "updated_at": conversation.updated_at,
-            "last_message": conversation.messages[-1].content if conversation.messages else None,
+            "last_message": (
+                conversation.last_message.content if conversation.last_message else None
+            ),
         }
 
+    async def get_patient_context(
+        self, conversation_id: str, patient_context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        获取会话的患者上下文
+
+        传入时缓存到会话上，未传入时使用本会话此前缓存的患者上下文。
+
+        Args:
+            conversation_id: 对话 ID
+            patient_context: 本次请求携带的患者上下文
+
+        Returns:
+            患者上下文
+        """
+        if not self.session_cache:
+            return patient_context
+        if patient_context is not None:
+            await self.session_cache.set_patient_context(conversation_id, patient_context)
+            return patient_context
+        return await self.session_cache.get_patient_context(conversation_id)
+
+    async def _get_header(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """读取会话头文档（优先读取缓存）"""
+        if self.session_cache:
+            header = await self.session_cache.get_header(conversation_id)
+            if header:
+                return header
+
+        header = await self.circuit_breaker.call(
+            lambda: self.collection.find_one({"id": conversation_id}, _HEADER_PROJECTION)
+        )
+        if header and self.session_cache:
+            await self.session_cache.set_header(header)
+        return header
+
+    async def _migrate_embedded(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        将仍内嵌 messages 数组的旧会话就地迁移为分桶存储
+
+        Returns:
+            迁移后的会话头，对话不存在时返回 None
+        """
+        doc = await self.circuit_breaker.call(
+            lambda: self.collection.find_one({"id": conversation_id})
+        )
+        if not doc:
+            return None
+        if "messages" in doc:
+            await migrate_embedded_messages(
+                self.collection, self.messages_collection, doc, self.bucket_size
+            )
+            logger.info(f"Migrated embedded messages of conversation {conversation_id}")
+
+        header = await self.circuit_breaker.call(
+            lambda: self.collection.find_one({"id": conversation_id}, _HEADER_PROJECTION)
+        )
+        if header and self.session_cache:
+            await self.session_cache.set_header(header)
+        return header
+
+    async def _with_range(
+        self,
+        header: Dict[str, Any],
+        start: int = 0,
+        max_messages: Optional[int] = None,
+    ) -> Conversation:
+        """
+        用会话头和序号 >= start 的消息构建对话
+
+        缓存的消息窗口覆盖的部分（包括 write-behind 模式下尚未落库的消息）从 Redis 读取，
+        更早的消息从消息桶读取，读取最近 N 条时回填到窗口。
+
+        Args:
+            header: 会话头文档
+            start: 起始序号
+            max_messages: 只取最近 N 条（优先于 start）
+
+        Returns:
+            对话
+        """
+        total = header.get("message_count", 0)
+        hot: List[ChatMessage] = []
+        if self.session_cache:
+            window = await self.session_cache.get_window(header["id"])
+            if window and window[0] >= total:
+                total, hot = window
+
+        if max_messages is not None:
+            start = max(0, total - max_messages)
+
+        first_hot = total - len(hot)
+        messages = []
+        if start < first_hot:
+            messages = await self._load_messages(header["id"], start, first_hot)
+            # 只回填连续的最近消息，窗口保持为会话末尾的一段
+            if (
+                self.session_cache
+                and max_messages is not None
+                and len(messages) == first_hot - start
+            ):
+                await self.session_cache.backfill(header["id"], messages, start)
+        messages += hot[max(0, start - first_hot) :]
+
+        return Conversation(**{**header, "message_count": total}, messages=messages)
+
+    async def _load_messages(self, conversation_id: str, start: int, end: int) -> List[ChatMessage]:
+        """
+        读取序号在 [start, end) 内的消息
+
+        Args:
+            conversation_id: 对话 ID
+            start: 起始序号（含）
+            end: 结束序号（不含）
+
+        Returns:
+            按序号排列的消息（已清理的桶中的消息会缺失）
+        """
+        if end <= start:
+            return []
+
+        cursor = self.messages_collection.find(
+            {
+                "conversation_id": conversation_id,
+                "bucket": {
+                    "$gte": start // self.bucket_size,
+                    "$lte": (end - 1) // self.bucket_size,
+                },
+            },
+            {"_id": 0, "messages": 1},
+        ).sort("bucket", 1)
+
+        messages = []
+        async for bucket in cursor:
+            for doc in bucket.get("messages", []):
+                if start <= doc.get("seq", -1) < end:
+                    messages.append(ChatMessage(**doc))
+        return messages
+
+
+def build_buckets(
+    conversation_id: str, messages: List[Dict[str, Any]], bucket_size: int, updated_at: datetime
+) -> List[Dict[str, Any]]:
+    """
+    将消息列表切分为桶文档（用于迁移内嵌 messages 数组的旧会话）
+
+    Args:
+        conversation_id: 对话 ID
+        messages: 按时间顺序排列的消息字典
+        bucket_size: 每桶消息数
+        updated_at: 桶的更新时间
+
+    Returns:
+        桶文档列表
+    """
+    buckets = []
+    for bucket, offset in enumerate(range(0, len(messages), bucket_size)):
+        chunk = [
+            {**message, "seq": offset + i}
+            for i, message in enumerate(messages[offset : offset + bucket_size])
+        ]
+        buckets.append(
+            {
+                "conversation_id": conversation_id,
+                "bucket": bucket,
+                "messages": chunk,
+                "count": len(chunk),
+                "updated_at": updated_at,
+            }
+        )
+    return buckets
+
+
+async def migrate_embedded_messages(
+    collection: Any, messages_collection: Any, doc: Dict[str, Any], bucket_size: int
+) -> bool:
+    """
+    将内嵌 messages 数组的旧会话写入消息桶，并在会话头上写入 message_count、移除内嵌数组
+
+    桶只在不存在时写入，会话头只在仍含 messages 时更新：迁移完成前 add_message 不会分配序号，
+    并发或重复迁移写入的是相同的桶，不会覆盖迁移后追加的消息或重置 message_count。
+
+    Args:
+        collection: 会话头集合
+        messages_collection: 消息桶集合
+        doc: 含内嵌 messages 数组的会话文档
+        bucket_size: 每桶消息数
+
+    Returns:
+        会话头是否由本次调用完成迁移
+    """
+    messages = doc.get("messages") or []
+    buckets = build_buckets(
+        doc["id"], messages, bucket_size, doc.get("updated_at") or datetime.now()
+    )
+    if buckets:
+        try:
+            await messages_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"conversation_id": b["conversation_id"], "bucket": b["bucket"]},
+                        {
+                            "$setOnInsert": {
+                                k: v for k, v in b.items() if k not in ("conversation_id", "bucket")
+                            }
+                        },
+                        upsert=True,
+                    )
+                    for b in buckets
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            # 并发迁移同时插入同一个桶时唯一索引冲突，对方写入的是相同内容
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+    result = await collection.update_one(
+        {"_id": doc["_id"], "messages": {"$exists": True}},
+        {
+            "$set": {
+                "message_count": len(messages),
+                "last_message": messages[-1] if messages else None,
+            },
+            "$unset": {"messages": ""},
+        },
+    )
+    return result.modified_count == 1
+
 
 # 全局实例
 conversation_service = ConversationService()
@@ -0,0 +1,276 @@
+"""
+会话消息异步落库（write-behind）
+
+开启 CONVERSATION_WRITE_BEHIND_ENABLED 后，对话消息不再同步写入 MongoDB：
+- 追加消息时在 Redis 中分配序号，写入追加日志（Redis Stream）和会话上下文缓存的消息窗口
+- 后台刷写任务按固定间隔批量读取日志，用 bulk_write 写入会话头和消息桶，成功后 XACK
+- 刷写操作幂等（桶内按 seq 去重、会话头计数只增不减），进程崩溃后未确认的日志会被重放
+- 关闭时执行最后一次刷写
+
+持久性依赖 Redis 自身的持久化配置：建议开启 AOF（appendfsync everysec），
+且淘汰策略不能淘汰日志键（使用 noeviction 或独立实例）。
+"""
+
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from redis.exceptions import ResponseError
+
+from app.config import settings
+from app.models import ChatMessage
+from app.services.session_cache import SessionContextCache, dump_message
+
+STREAM_KEY = "conversation:stream"
+CONSUMER_GROUP = "conversation-flusher"
+
+_DUPLICATE_KEY = 11000
+
+
+def _seq_key(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}:seq"
+
+
+class ConversationWriteBehind:
+    """会话消息 write-behind 写入器"""
+
+    def __init__(
+        self,
+        headers: AsyncIOMotorCollection,
+        buckets: AsyncIOMotorCollection,
+        bucket_size: int,
+        cache: SessionContextCache,
+    ):
+        """
+        初始化写入器
+
+        Args:
+            headers: 会话头集合
+            buckets: 消息桶集合
+            bucket_size: 每桶消息数
+            cache: 会话上下文缓存（消息窗口保存尚未落库的消息）
+        """
+        self.headers = headers
+        self.buckets = buckets
+        self.bucket_size = bucket_size
+        self.cache = cache
+        self.ttl = settings.conversation_hot_ttl_seconds
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def append(self, conversation_id: str, message: ChatMessage, message_count: int) -> int:
+        """
+        追加消息到日志和消息窗口
+
+        Args:
+            conversation_id: 对话 ID
+            message: 消息
+            message_count: MongoDB 会话头中的消息数（用于首次初始化序号）
+
+        Returns:
+            消息序号
+        """
+        client = await self.cache.client()
+        seq_key = _seq_key(conversation_id)
+
+        # 序号计数器不存在时以已落库的消息数为起点
+        await client.set(seq_key, message_count, nx=True, ex=self.ttl)
+        seq = await client.incr(seq_key) - 1
+
+        payload = dump_message(message, seq)
+
+        pipe = client.pipeline(transaction=True)
+        pipe.xadd(
+            STREAM_KEY,
+            {
+                "conversation_id": conversation_id,
+                "message": payload,
+                "ts": datetime.now().isoformat(),
+            },
+        )
+        self.cache.queue_append(pipe, conversation_id, payload)
+        pipe.expire(seq_key, self.ttl)
+        await pipe.execute()
+        return seq
+
+    async def discard(self, conversation_id: str) -> None:
+        """删除会话的缓存和序号计数器（删除会话时调用）"""
+        await self.cache.discard(conversation_id, _seq_key(conversation_id))
+
+    async def start(self) -> None:
+        """创建消费组并启动后台刷写任务"""
+        client = await self.cache.client()
+        try:
+            await client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Conversation write-behind started: consumer={self.consumer}, "
+            f"interval={settings.conversation_flush_interval}s"
+        )
+
+    async def close(self) -> None:
+        """停止后台任务，并把剩余日志刷写到 MongoDB"""
+        if self._task is None:
+            return
+
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+        while await self.flush() > 0:
+            pass
+        logger.info("Conversation write-behind stopped")
+
+    async def flush(self) -> int:
+        """
+        刷写一批日志到 MongoDB
+
+        优先处理本消费者未确认的日志，其次认领其他消费者超时未确认的日志，最后读取新日志。
+
+        Returns:
+            刷写的日志条数
+        """
+        client = await self.cache.client()
+        count = settings.conversation_flush_batch_size
+
+        entries = await self._read(client, "0", count)
+        if not entries:
+            claimed = await client.xautoclaim(
+                STREAM_KEY,
+                CONSUMER_GROUP,
+                self.consumer,
+                min_idle_time=settings.conversation_flush_claim_idle_ms,
+                start_id="0-0",
+                count=count,
+            )
+            entries = [(entry_id, fields) for entry_id, fields in claimed[1] if fields]
+        if not entries:
+            entries = await self._read(client, ">", count)
+        if not entries:
+            return 0
+
+        await self._apply(entries)
+
+        ids = [entry_id for entry_id, _ in entries]
+        pipe = client.pipeline(transaction=True)
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *ids)
+        pipe.xdel(STREAM_KEY, *ids)
+        await pipe.execute()
+
+        logger.debug("Conversation write-behind flushed {count} messages", count=len(ids))
+        return len(ids)
+
+    async def _read(self, client, stream_id: str, count: int) -> List[Tuple[str, Dict[str, str]]]:
+        """从消费组读取日志"""
+        response = await client.xreadgroup(
+            CONSUMER_GROUP, self.consumer, {STREAM_KEY: stream_id}, count=count
+        )
+        if not response:
+            return []
+        # 已被删除的待确认日志字段为 None
+        return [(entry_id, fields) for entry_id, fields in response[0][1] if fields]
+
+    async def _apply(self, entries: List[Tuple[str, Dict[str, str]]]) -> None:
+        """把一批日志写入 MongoDB（幂等）"""
+        bucket_ops, header_ops = build_flush_operations(entries, self.bucket_size)
+
+        try:
+            await self.buckets.bulk_write(bucket_ops, ordered=False)
+        except BulkWriteError as e:
+            # 重放时桶内已存在该 seq：过滤条件不匹配导致 upsert 插入冲突，可忽略
+            errors = [err for err in e.details["writeErrors"] if err["code"] != _DUPLICATE_KEY]
+            if errors:
+                raise
+
+        await self.headers.bulk_write(header_ops, ordered=False)
+
+    async def _run(self) -> None:
+        """后台刷写循环"""
+        while not self._stopping.is_set():
+            try:
+                flushed = await self.flush()
+            except Exception as e:
+                logger.error(f"Conversation write-behind flush failed: {e}")
+                flushed = 0
+
+            if flushed < settings.conversation_flush_batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=settings.conversation_flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+
+def build_flush_operations(
+    entries: List[Tuple[str, Dict[str, str]]], bucket_size: int
+) -> Tuple[List[UpdateOne], List[UpdateOne]]:
+    """
+    把日志转换为消息桶和会话头的批量写操作
+
+    Args:
+        entries: [(日志 ID, 字段)]
+        bucket_size: 每桶消息数
+
+    Returns:
+        (消息桶操作, 会话头操作)
+    """
+    bucket_ops: List[UpdateOne] = []
+    latest: Dict[str, Tuple[Dict[str, Any], datetime]] = {}
+
+    for _, fields in entries:
+        conversation_id = fields["conversation_id"]
+        doc = json.loads(fields["message"])
+        ts = datetime.fromisoformat(fields["ts"])
+        seq = doc["seq"]
+
+        bucket_ops.append(
+            UpdateOne(
+                {
+                    "conversation_id": conversation_id,
+                    "bucket": seq // bucket_size,
+                    "messages.seq": {"$ne": seq},
+                },
+                {
+                    "$push": {"messages": {"$each": [doc], "$sort": {"seq": 1}}},
+                    "$inc": {"count": 1},
+                    "$max": {"updated_at": ts},
+                },
+                upsert=True,
+            )
+        )
+
+        if conversation_id not in latest or seq > latest[conversation_id][0]["seq"]:
+            latest[conversation_id] = (doc, ts)
+
+    header_ops = []
+    for conversation_id, (doc, ts) in latest.items():
+        last_message = {k: v for k, v in doc.items() if k != "seq"}
+        header_ops.append(
+            UpdateOne(
+                # 计数只增不减，乱序或重放的旧日志不会覆盖较新的状态
+                {"id": conversation_id, "message_count": {"$lt": doc["seq"] + 1}},
+                {
+                    "$set": {
+                        "message_count": doc["seq"] + 1,
+                        "last_message": last_message,
+                        "updated_at": ts,
+                    }
+                },
+            )
+        )
+
+    return bucket_ops, header_ops
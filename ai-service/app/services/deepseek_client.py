@@ -7,14 +7,29 @@ DeepSeek API 客户端封装
 - 对话历史管理
 - Token 使用统计
 - 自动重试和错误处理
+- 时间预算（deadline）与对冲请求（hedged request）
+- 熔断保护
+- Token 用量与费用的 Prometheus 导出
 """
 
+from collections import deque
 from typing import List, Dict, Any, Optional, AsyncIterator
 import asyncio
+import time
 from openai import AsyncOpenAI, OpenAIError, APITimeoutError, RateLimitError
 from loguru import logger
 
 from app.config import settings
+from app.core.tracing import set_span_attributes
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.services.http_client import (
+    DeadlineExceededError,
+    get_http_client,
+    get_retry_policy,
+    request_timeout,
+)
+from app.services.metrics_service import get_metrics_service
+from app.services.token_counter import count_message_tokens, count_tokens, extract_usage
 
 
 class DeepSeekClient:
@@ -29,18 +44,28 @@ class DeepSeekClient:
         self.client = AsyncOpenAI(
             api_key=settings.deepseek_api_key,
             base_url=settings.deepseek_base_url,
-            timeout=settings.deepseek_timeout,
-            max_retries=0,  # 禁用 SDK 自动重试，使用自定义重试逻辑
+            max_retries=0,  # 禁用 SDK 自动重试，使用统一重试策略
+            http_client=get_http_client(),
         )
         self.model = settings.deepseek_model
         self.temperature = settings.deepseek_temperature
         self.max_tokens = settings.deepseek_max_tokens
-        self.max_retries = settings.deepseek_max_retries
+        self.timeout = settings.deepseek_timeout
+        self.hedge_enabled = settings.deepseek_hedge_enabled
+        self.retry_policy = get_retry_policy()
+        self.max_retries = self.retry_policy.max_retries
+        self.circuit_breaker = get_circuit_breaker(
+            "deepseek", is_failure=self.retry_policy.is_retryable
+        )
 
         # Token 使用统计
         self._total_prompt_tokens = 0
         self._total_completion_tokens = 0
         self._total_requests = 0
+        self._hedged_requests = 0
+
+        # 最近成功请求的延迟样本（用于计算对冲延迟）
+        self._latencies: deque = deque(maxlen=200)
 
         logger.info(
             f"DeepSeek client initialized: model={self.model}, "
@@ -53,6 +78,10 @@ class DeepSeekClient:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         stream: bool = False,
+        budget: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        endpoint: str = "default",
+        deadline: Optional[float] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """
@@ -63,6 +92,12 @@ class DeepSeekClient:
             temperature: 生成温度，控制随机性（0.0-2.0）
             max_tokens: 最大生成 token 数
             stream: 是否使用流式响应
+            budget: 总时间预算（秒，含重试和退避），默认使用配置值；
+                每次尝试的超时取 min(deepseek_timeout, 剩余预算)
+            hedge: 是否启用对冲请求（仅非流式），默认使用配置值
+            endpoint: 调用方标识（用于 Token 用量和费用指标）
+            deadline: 调用方请求的截止时间（time.monotonic() 时间点，见 request_deadline），
+                与 budget 取较早者
             **kwargs: 其他 API 参数
 
         Returns:
@@ -74,96 +109,204 @@ class DeepSeekClient:
         temperature = temperature if temperature is not None else self.temperature
         max_tokens = max_tokens if max_tokens is not None else self.max_tokens
 
-        # 带重试的 API 调用
-        for attempt in range(self.max_retries + 1):
-            try:
-                logger.debug(
-                    f"DeepSeek API request (attempt {attempt + 1}/{self.max_retries + 1}): "
-                    f"messages={len(messages)}, temperature={temperature}, max_tokens={max_tokens}"
-                )
+        budget = budget if budget is not None else settings.deepseek_request_budget
+        if budget:
+            own_deadline = time.monotonic() + budget
+            deadline = own_deadline if deadline is None else min(deadline, own_deadline)
+        hedge = (hedge if hedge is not None else self.hedge_enabled) and not stream
+        start_time = time.perf_counter()
+
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+            **kwargs,
+        }
 
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    stream=stream,
-                    **kwargs,
+        async def _create():
+            attempt_timeout = self._get_attempt_timeout(deadline)
+            logger.debug(
+                "DeepSeek API request: messages={messages}, temperature={temperature}, "
+                "max_tokens={max_tokens}, timeout={timeout:.1f}s, hedge={hedge}",
+                messages=len(messages),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=attempt_timeout,
+                hedge=hedge,
+            )
+            if hedge:
+                return await self.circuit_breaker.call(
+                    lambda: self._create_hedged(params, attempt_timeout)
                 )
+            return await self.circuit_breaker.call(
+                lambda: self._create_once(params, attempt_timeout)
+            )
 
-                if stream:
-                    # 流式响应直接返回
-                    return {"stream": response}
-
-                # 提取响应内容
-                result = {
-                    "content": response.choices[0].message.content,
-                    "finish_reason": response.choices[0].finish_reason,
-                    "usage": {
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "completion_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens,
-                    },
-                    "model": response.model,
-                }
-
-                # 更新统计
-                self._update_usage_stats(
-                    response.usage.prompt_tokens,
-                    response.usage.completion_tokens,
-                )
+        # 带重试的 API 调用
+        try:
+            response = await self.retry_policy.call(_create, name="DeepSeek API", deadline=deadline)
+        except Exception as e:
+            raise self._to_api_error(e) from e
+
+        if stream:
+            # 流式响应直接返回
+            return {"stream": response}
+
+        # 提取响应内容
+        result = {
+            "content": response.choices[0].message.content,
+            "finish_reason": response.choices[0].finish_reason,
+            "usage": {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens,
+            },
+            "model": response.model,
+        }
 
-                logger.info(
-                    f"DeepSeek API success: tokens={response.usage.total_tokens}, "
-                    f"finish_reason={response.choices[0].finish_reason}"
-                )
+        # 更新统计
+        self._update_usage_stats(
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens,
+            endpoint=endpoint,
+            duration=time.perf_counter() - start_time,
+        )
 
-                return result
+        return result
 
-            except APITimeoutError as e:
-                logger.warning(
-                    f"DeepSeek API timeout (attempt {attempt + 1}/{self.max_retries + 1}): {str(e)}"
-                )
-                if attempt >= self.max_retries:
-                    raise DeepSeekAPIError(f"API 请求超时，已重试 {self.max_retries} 次") from e
-                await asyncio.sleep(2**attempt)  # 指数退避
+    def _to_api_error(self, error: Exception) -> "DeepSeekAPIError":
+        """
+        把调用异常转换为 DeepSeekAPIError
 
-            except RateLimitError as e:
-                logger.warning(
-                    f"DeepSeek API rate limit (attempt {attempt + 1}/{self.max_retries + 1}): {str(e)}"
-                )
-                if attempt >= self.max_retries:
-                    raise DeepSeekAPIError(f"API 请求频率限制，请稍后再试") from e
-                await asyncio.sleep(5 * (attempt + 1))  # 更长的等待时间
+        Args:
+            error: 重试结束后抛出的异常
 
-            except OpenAIError as e:
-                logger.error(
-                    f"DeepSeek API error (attempt {attempt + 1}/{self.max_retries + 1}): {str(e)}"
+        Returns:
+            DeepSeekAPIError
+        """
+        if isinstance(error, CircuitOpenError):
+            return DeepSeekAPIError("DeepSeek 服务暂时不可用（熔断中）")
+        if isinstance(error, DeadlineExceededError):
+            return DeepSeekAPIError("API 请求超出时间预算")
+        if isinstance(error, (APITimeoutError, asyncio.TimeoutError)):
+            return DeepSeekAPIError(f"API 请求超时，已重试 {self.max_retries} 次")
+        if isinstance(error, RateLimitError):
+            return DeepSeekAPIError("API 请求频率限制，请稍后再试")
+        if isinstance(error, OpenAIError):
+            logger.error(f"DeepSeek API error: {str(error)}")
+            return DeepSeekAPIError(f"API 调用失败: {str(error)}")
+        logger.error(f"Unexpected error in DeepSeek API call: {str(error)}")
+        return DeepSeekAPIError(f"API 调用发生未知错误: {str(error)}")
+
+    async def _create_once(self, params: Dict[str, Any], timeout: float) -> Any:
+        """
+        发起单次请求，超过 timeout 秒即取消
+
+        Args:
+            params: chat.completions.create 参数
+            timeout: 本次请求超时（秒）
+
+        Returns:
+            SDK 响应对象
+        """
+        start_time = time.perf_counter()
+        response = await asyncio.wait_for(
+            self.client.chat.completions.create(**params, timeout=request_timeout(timeout)),
+            timeout=timeout,
+        )
+        if not params.get("stream"):
+            self._latencies.append(time.perf_counter() - start_time)
+        return response
+
+    async def _create_hedged(self, params: Dict[str, Any], timeout: float) -> Any:
+        """
+        对冲请求：主请求超过对冲延迟仍未返回时发出第二个相同请求，
+        取先成功返回的结果并取消另一个
+
+        Args:
+            params: chat.completions.create 参数
+            timeout: 本次尝试超时（秒），两个请求共享同一截止时间
+
+        Returns:
+            SDK 响应对象
+        """
+        hedge_delay = self.get_hedge_delay()
+        if hedge_delay >= timeout:
+            return await self._create_once(params, timeout)
+
+        tasks = [asyncio.create_task(self._create_once(params, timeout))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                self._hedged_requests += 1
+                logger.debug(
+                    "DeepSeek primary request exceeded {delay:.2f}s, hedging", delay=hedge_delay
                 )
-                if attempt >= self.max_retries:
-                    raise DeepSeekAPIError(f"API 调用失败: {str(e)}") from e
-                await asyncio.sleep(2**attempt)
+                tasks.append(asyncio.create_task(self._create_once(params, timeout - hedge_delay)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def _get_attempt_timeout(self, deadline: Optional[float]) -> float:
+        """
+        根据剩余预算计算本次尝试的超时
 
-            except Exception as e:
-                logger.error(f"Unexpected error in DeepSeek API call: {str(e)}")
-                raise DeepSeekAPIError(f"API 调用发生未知错误: {str(e)}") from e
+        Raises:
+            DeadlineExceededError: 预算已耗尽
+        """
+        if deadline is None:
+            return float(self.timeout)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError("DeepSeek request budget exhausted")
+        return min(float(self.timeout), remaining)
+
+    def get_hedge_delay(self) -> float:
+        """
+        获取对冲延迟：样本足够时取最近成功请求的 p95 延迟，否则使用配置值
 
-        raise DeepSeekAPIError("API 调用失败，已达到最大重试次数")
+        Returns:
+            对冲延迟（秒）
+        """
+        if len(self._latencies) < settings.deepseek_hedge_min_samples:
+            return settings.deepseek_hedge_delay
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
 
     async def chat_stream(
         self,
         messages: List[Dict[str, str]],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        endpoint: str = "default",
         **kwargs,
     ) -> AsyncIterator[str]:
         """
         流式对话接口
 
+        请求 stream_options.include_usage 以获取最后一个分片中的 usage；
+        服务端未返回 usage 时按本地估算值记录用量。
+
         Args:
             messages: 对话消息列表
             temperature: 生成温度
             max_tokens: 最大生成 token 数
+            endpoint: 调用方标识（用于 Token 用量和费用指标）
             **kwargs: 其他 API 参数
 
         Yields:
@@ -172,34 +315,65 @@ class DeepSeekClient:
         Raises:
             DeepSeekAPIError: API 调用失败
         """
+        start_time = time.perf_counter()
+        extra_body = kwargs.pop("extra_body", None) or {}
+        extra_body.setdefault("stream_options", {"include_usage": True})
+
         response = await self.chat(
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             stream=True,
+            extra_body=extra_body,
             **kwargs,
         )
 
+        usage = None
+        completion_parts: List[str] = []
         try:
             async for chunk in response["stream"]:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                # 携带 usage 的最后一个分片 choices 为空
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    completion_parts.append(content)
+                    yield content
         except Exception as e:
             logger.error(f"Error in stream processing: {str(e)}")
             raise DeepSeekAPIError(f"流式响应处理失败: {str(e)}") from e
 
+        if usage is not None:
+            prompt_tokens, completion_tokens = extract_usage(usage)
+            estimated = False
+        else:
+            prompt_tokens = count_message_tokens(messages)
+            completion_tokens = count_tokens("".join(completion_parts))
+            estimated = True
+
+        self._update_usage_stats(
+            prompt_tokens,
+            completion_tokens,
+            endpoint=endpoint,
+            duration=time.perf_counter() - start_time,
+            estimated=estimated,
+        )
+
     def get_usage_stats(self) -> Dict[str, int]:
         """
         获取 Token 使用统计
 
         Returns:
-            包含 prompt_tokens、completion_tokens、total_tokens、requests 的字典
+            包含 prompt_tokens、completion_tokens、total_tokens、requests、hedged_requests 的字典
         """
         return {
             "prompt_tokens": self._total_prompt_tokens,
             "completion_tokens": self._total_completion_tokens,
             "total_tokens": self._total_prompt_tokens + self._total_completion_tokens,
             "requests": self._total_requests,
+            "hedged_requests": self._hedged_requests,
         }
 
     def reset_usage_stats(self):
@@ -207,14 +381,40 @@ class DeepSeekClient:
         self._total_prompt_tokens = 0
         self._total_completion_tokens = 0
         self._total_requests = 0
+        self._hedged_requests = 0
         logger.info("DeepSeek usage stats reset")
 
-    def _update_usage_stats(self, prompt_tokens: int, completion_tokens: int):
-        """更新使用统计"""
+    def _update_usage_stats(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        endpoint: str = "default",
+        duration: float = 0.0,
+        estimated: bool = False,
+    ):
+        """更新使用统计并导出 Token 用量与费用指标"""
         self._total_prompt_tokens += prompt_tokens
         self._total_completion_tokens += completion_tokens
         self._total_requests += 1
 
+        set_span_attributes(
+            **{
+                "llm.model": self.model,
+                "llm.endpoint": endpoint,
+                "llm.prompt_tokens": prompt_tokens,
+                "llm.completion_tokens": completion_tokens,
+                "llm.tokens_estimated": estimated,
+            }
+        )
+        get_metrics_service().record_llm_usage(
+            model=self.model,
+            endpoint=endpoint,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            duration=duration,
+            estimated=estimated,
+        )
+
 
 class DeepSeekAPIError(Exception):
     """DeepSeek API 调用异常"""
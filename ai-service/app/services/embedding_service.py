@@ -6,11 +6,16 @@ Embedding 服务模块
 2. 本地 Sentence Transformers 模型 - 可选
 """
 
+import asyncio
 from typing import List, Optional
 from loguru import logger
 from openai import AsyncOpenAI
 
 from app.config import settings
+from app.core.tracing import set_span_attributes
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.http_client import get_http_client, get_retry_policy
+from app.services.metrics_service import get_metrics_service, timed
 
 
 class EmbeddingService:
@@ -26,6 +31,11 @@ class EmbeddingService:
         self.dimension = settings.embedding_dimension
         self.cache_enabled = settings.embedding_cache_enabled
         self._cache: dict = {}  # 简单的内存缓存
+        self.metrics = get_metrics_service()
+        self.retry_policy = get_retry_policy()
+        self.circuit_breaker = get_circuit_breaker(
+            "embedding", is_failure=self.retry_policy.is_retryable
+        )
 
         if self.provider == "openai":
             # 使用独立的 embedding API 配置,如果未设置则回退到 DeepSeek
@@ -35,7 +45,8 @@ class EmbeddingService:
             self.client = AsyncOpenAI(
                 api_key=api_key,
                 base_url=base_url,
-                timeout=settings.deepseek_timeout,
+                max_retries=0,  # 禁用 SDK 自动重试，使用统一重试策略
+                http_client=get_http_client(),
             )
             self.model = settings.embedding_model
             logger.info(
@@ -83,9 +94,13 @@ class EmbeddingService:
             return [0.0] * self.dimension
 
         # 检查缓存
-        if self.cache_enabled and text in self._cache:
-            logger.debug("Returning cached embedding")
-            return self._cache[text]
+        if self.cache_enabled:
+            set_span_attributes(**{"cache.embedding.hit": text in self._cache})
+            if text in self._cache:
+                self.metrics.record_cache_hit("embedding")
+                logger.debug("Returning cached embedding")
+                return self._cache[text]
+            self.metrics.record_cache_miss("embedding")
 
         try:
             if self.provider == "openai":
@@ -127,7 +142,7 @@ class EmbeddingService:
             return [[0.0] * self.dimension] * len(texts)
 
         try:
-            logger.info(f"Batch embedding {len(valid_texts)} texts")
+            logger.debug("Batch embedding {count} texts", count=len(valid_texts))
 
             if self.provider == "openai":
                 return await self._embed_with_openai(valid_texts)
@@ -138,14 +153,21 @@ class EmbeddingService:
             logger.error(f"Batch embedding failed: {str(e)}")
             raise RuntimeError(f"Batch embedding failed: {str(e)}")
 
+    @timed("record_embedding", "openai")
     async def _embed_with_openai(self, texts: List[str]) -> List[List[float]]:
         """使用 OpenAI API 进行向量化"""
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=texts,
+        response = await self.retry_policy.call(
+            lambda: self.circuit_breaker.call(
+                lambda: self.client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                )
+            ),
+            name="Embedding API",
         )
         return [item.embedding for item in response.data]
 
+    @timed("record_embedding", "local")
     def _embed_with_local(self, texts: List[str]) -> List[List[float]]:
         """使用本地模型进行向量化"""
         model = self._load_local_model()
@@ -165,6 +187,18 @@ class EmbeddingService:
             model = self._load_local_model()
             return model.get_sentence_embedding_dimension()
 
+    async def warm_up(self) -> None:
+        """
+        启动预热：本地模型在线程中加载并完成一次推理；API 方式发送一次请求，建立连接
+
+        结果不写入缓存。
+        """
+        if self.provider == "openai":
+            await self._embed_with_openai(["预热"])
+        else:
+            await asyncio.to_thread(self._embed_with_local, ["预热"])
+        logger.info(f"Embedding warmed up: provider={self.provider}, model={self.model}")
+
     def clear_cache(self):
         """清空缓存"""
         self._cache.clear()
@@ -0,0 +1,226 @@
+"""
+共享 HTTP 客户端模块
+
+为所有 OpenAI 兼容接口（DeepSeek 对话、Embedding）提供：
+- 共享的 httpx.AsyncClient 连接池（HTTP/2、keepalive、连接数限制）
+- 统一的连接/读取超时配置
+- 统一的重试策略
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from loguru import logger
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+def _http2_available() -> bool:
+    """检查 HTTP/2 依赖（h2）是否已安装"""
+    try:
+        import h2  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def request_timeout(total: float) -> httpx.Timeout:
+    """
+    构建请求超时：读写和连接池等待为 total，连接超时单独配置（快速失败）
+
+    OpenAI SDK 的 timeout 参数会整体覆盖客户端的超时设置，传入浮点数时连接超时也变为该值，
+    因此按次指定超时时应使用本函数的返回值。
+
+    Args:
+        total: 读写超时（秒）
+
+    Returns:
+        httpx.Timeout
+    """
+    return httpx.Timeout(total, connect=min(settings.http_connect_timeout, total))
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    创建调优后的 httpx 异步客户端
+
+    Returns:
+        httpx.AsyncClient 实例
+    """
+    http2 = settings.http2_enabled and _http2_available()
+    if settings.http2_enabled and not http2:
+        logger.warning(
+            "h2 not installed, falling back to HTTP/1.1. "
+            "Install it with: pip install 'httpx[http2]'"
+        )
+
+    client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=request_timeout(settings.deepseek_timeout),
+    )
+
+    logger.info(
+        f"Shared HTTP client initialized: http2={http2}, "
+        f"max_connections={settings.http_max_connections}, "
+        f"max_keepalive={settings.http_max_keepalive_connections}"
+    )
+    return client
+
+
+class DeadlineExceededError(Exception):
+    """调用总时间预算已耗尽"""
+
+    pass
+
+
+def request_deadline() -> Optional[float]:
+    """
+    API 请求的截止时间，请求开始时获取，传给该请求内的每次 DeepSeek 调用
+
+    Returns:
+        time.monotonic() 时间点，未配置请求预算时为 None
+    """
+    budget = settings.request_budget_seconds
+    return time.monotonic() + budget if budget else None
+
+
+class RetryPolicy:
+    """
+    统一重试策略
+
+    - 连接错误、超时（含单次尝试超时）、5xx：指数退避
+    - 429 频率限制：线性增长的更长等待
+    - 其他错误（4xx 等）：不重试，直接抛出
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        rate_limit_backoff: Optional[float] = None,
+    ):
+        self.max_retries = max_retries if max_retries is not None else settings.deepseek_max_retries
+        self.backoff_base = (
+            backoff_base if backoff_base is not None else settings.retry_backoff_base
+        )
+        self.backoff_max = backoff_max if backoff_max is not None else settings.retry_backoff_max
+        self.rate_limit_backoff = (
+            rate_limit_backoff
+            if rate_limit_backoff is not None
+            else settings.retry_rate_limit_backoff
+        )
+
+    def is_retryable(self, error: Exception) -> bool:
+        """判断异常是否可重试（APITimeoutError 是 APIConnectionError 的子类）"""
+        return isinstance(
+            error,
+            (APIConnectionError, RateLimitError, InternalServerError, asyncio.TimeoutError),
+        )
+
+    def get_delay(self, attempt: int, error: Exception) -> float:
+        """
+        计算第 attempt 次失败后的等待时间（秒）
+
+        Args:
+            attempt: 已失败的尝试序号（从 0 开始）
+            error: 本次失败的异常
+
+        Returns:
+            等待秒数（带 50%~100% 抖动）
+        """
+        if isinstance(error, RateLimitError):
+            delay = self.rate_limit_backoff * (attempt + 1)
+        else:
+            delay = self.backoff_base * (2**attempt)
+        delay = min(delay, self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        name: str = "request",
+        deadline: Optional[float] = None,
+    ) -> T:
+        """
+        按重试策略执行异步调用
+
+        Args:
+            func: 无参异步函数，每次尝试都会重新调用
+            name: 调用名称（用于日志）
+            deadline: 总截止时间（time.monotonic() 时间点），退避等待会越过截止时间时不再重试
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            最后一次尝试的异常，或不可重试的异常
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func()
+            except Exception as e:
+                if not self.is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = self.get_delay(attempt, e)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning(
+                    f"{name} failed (attempt {attempt + 1}/{self.max_retries + 1}): "
+                    f"{type(e).__name__}: {str(e)}, retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+        raise RuntimeError(f"{name} failed after {self.max_retries} retries")
+
+
+# 全局单例
+_http_client: Optional[httpx.AsyncClient] = None
+_retry_policy: Optional[RetryPolicy] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取共享 HTTP 客户端单例
+
+    Returns:
+        httpx.AsyncClient 实例
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    获取统一重试策略单例
+
+    Returns:
+        RetryPolicy 实例
+    """
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy()
+    return _retry_policy
+
+
+async def close_http_client() -> None:
+    """关闭共享 HTTP 客户端，释放连接池"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        logger.info("Shared HTTP client closed")
+    _http_client = None
@@ -0,0 +1,87 @@
+"""
+数据库客户端埋点
+
+在客户端层统一记录 MongoDB 和 Redis 的调用耗时，业务代码无需逐个调用点计时：
+- MongoDB: 通过 pymongo 命令监听器（CommandListener）记录每条命令的耗时
+- Redis: 继承 redis.asyncio.Redis，记录单条命令和 pipeline 的耗时
+"""
+
+import time
+from typing import Any, Dict, Tuple
+
+from pymongo import monitoring
+from redis.asyncio.client import Pipeline, Redis
+
+from app.services.metrics_service import get_metrics_service
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    MongoDB 命令耗时监听器
+
+    Usage:
+        AsyncIOMotorClient(url, event_listeners=[MongoCommandMetrics()])
+    """
+
+    def __init__(self):
+        # (连接, 请求 ID) -> 集合名称，命令完成事件中不包含命令内容
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        if isinstance(target, str):
+            self._collections[(event.connection_id, event.request_id)] = target
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event)
+
+    def _record(self, event) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), None)
+        # 握手、心跳等不针对集合的命令不记录
+        if collection is None:
+            return
+        get_metrics_service().record_mongo_operation(
+            collection, event.command_name, event.duration_micros / 1e6
+        )
+
+
+class InstrumentedPipeline(Pipeline):
+    """记录整体耗时的 Redis pipeline"""
+
+    async def execute(self, raise_on_error: bool = True):
+        start_time = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            get_metrics_service().record_redis_operation(
+                "MULTI" if self.is_transaction else "PIPELINE",
+                time.perf_counter() - start_time,
+            )
+
+
+class InstrumentedRedis(Redis):
+    """
+    记录命令耗时的 Redis 客户端
+
+    Usage:
+        InstrumentedRedis.from_url(url, decode_responses=True)
+    """
+
+    async def execute_command(self, *args, **options):
+        start_time = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            get_metrics_service().record_redis_operation(
+                str(args[0]).upper(), time.perf_counter() - start_time
+            )
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
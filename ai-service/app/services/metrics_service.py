@@ -4,19 +4,140 @@
 使用 Prometheus 记录关键性能指标：
 - API 响应时间
 - 错误率
-- DeepSeek API Token 使用量
-- 向量检索次数
+- DeepSeek API Token 使用量和调用耗时
+- 向量检索次数、耗时、结果数和最高相似度
+- Embedding、MongoDB、Redis 调用耗时
+- 缓存命中率
+- Agent 对话各阶段耗时
+- 外部依赖熔断器状态
+
+直方图按指标族（HTTP、LLM、embedding、向量检索、MongoDB、Redis、Agent 阶段）使用不同的
+桶边界，可通过 METRICS_BUCKETS_<族> 覆盖。Python 客户端不支持原生（native）直方图，
+较宽的范围使用指数桶。
+
+多 worker 部署时设置环境变量 PROMETHEUS_MULTIPROC_DIR（必须在进程启动前设置，.env 不生效）
+启用 prometheus_client 多进程模式：各 worker 把指标写入该目录下的 mmap 文件，/metrics 汇总
+所有 worker 的数据；已退出 worker 的实时仪表文件在采集时清理。
 """
 
+import inspect
+import os
+import re
 import time
-from contextlib import contextmanager
-from typing import Optional
-
-from prometheus_client import Counter, Histogram, start_http_server
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
 from loguru import logger
 
 from app.core.config import settings
 
+F = TypeVar("F", bound=Callable)
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> Tuple[float, ...]:
+    """
+    生成指数桶边界
+
+    Args:
+        start: 第一个桶的上界
+        factor: 相邻桶的倍数
+        count: 桶数量
+
+    Returns:
+        桶边界
+    """
+    return tuple(round(start * factor**i, 6) for i in range(count))
+
+
+# 各指标族的默认桶边界（秒）
+DEFAULT_BUCKETS: Dict[str, Tuple[float, ...]] = {
+    "http": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+    "llm": (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0),
+    "embedding": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    "vector_search": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    "mongo": (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    "redis": (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+    # 1ms ~ 131s，覆盖从缓存读取到多次 LLM 调用的各阶段
+    "agent_stage": exponential_buckets(0.001, 2, 18),
+}
+
+# 当前请求的阶段耗时 (阶段, 开始时间 perf_counter, 耗时)，由 MetricsMiddleware 在请求开始时
+# 设置，超过慢请求阈值时输出。motor 在线程池中执行时会复制上下文，MongoDB 命令同样可见
+request_timings: ContextVar[Optional[List[Tuple[str, float, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+# 单个请求最多记录的阶段数
+MAX_REQUEST_TIMINGS = 200
+
+
+def record_request_timing(stage: str, duration: float) -> None:
+    """
+    记录当前请求的一个阶段耗时（不在请求内时忽略）
+
+    Args:
+        stage: 阶段名称
+        duration: 耗时（秒）
+    """
+    timings = request_timings.get()
+    if timings is not None and len(timings) < MAX_REQUEST_TIMINGS:
+        timings.append((stage, time.perf_counter() - duration, duration))
+
+
+# 检索结果数和最高相似度的桶边界
+RESULT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+
+def parse_buckets(spec: str) -> Tuple[float, ...]:
+    """
+    解析桶边界配置
+
+    支持逗号分隔的边界列表（"0.1,0.5,1"）或指数桶（"exp:起始值,倍数,数量"）。
+
+    Args:
+        spec: 配置字符串
+
+    Returns:
+        升序桶边界
+
+    Raises:
+        ValueError: 配置格式错误
+    """
+    spec = spec.strip()
+    if spec.startswith("exp:"):
+        start, factor, count = spec[4:].split(",")
+        return exponential_buckets(float(start), float(factor), int(count))
+
+    buckets = tuple(sorted(float(b) for b in spec.split(",") if b.strip()))
+    if not buckets:
+        raise ValueError(f"Empty histogram buckets: {spec!r}")
+    return buckets
+
+
+def histogram_buckets(family: str) -> Tuple[float, ...]:
+    """
+    获取指标族的桶边界（配置优先，否则使用默认值）
+
+    Args:
+        family: 指标族（http, llm, embedding, vector_search, mongo, redis, agent_stage）
+
+    Returns:
+        桶边界
+    """
+    spec = getattr(settings, f"metrics_buckets_{family}", None)
+    return parse_buckets(spec) if spec else DEFAULT_BUCKETS[family]
+
 
 class MetricsService:
     """
@@ -31,10 +152,27 @@ class MetricsService:
         self.api_request_duration = Histogram(
             name="api_request_duration_seconds",
             documentation="API 请求响应时间（单位：秒）",
-            buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0),
+            buckets=histogram_buckets("http"),
             labelnames=["method", "endpoint", "status"],
         )
 
+        # 进行中的 API 请求数
+        self.api_requests_in_progress = Gauge(
+            name="api_requests_in_progress",
+            documentation="进行中的 API 请求数",
+            labelnames=["method"],
+            # 多进程模式下汇总存活 worker 的值
+            multiprocess_mode="livesum",
+        )
+
+        # API 响应大小直方图（单位：字节）
+        self.api_response_size = Histogram(
+            name="api_response_size_bytes",
+            documentation="API 响应体大小（单位：字节）",
+            buckets=(100, 1_000, 10_000, 100_000, 1_000_000),
+            labelnames=["method", "endpoint"],
+        )
+
         # API 错误计数器
         self.api_errors_total = Counter(
             name="api_errors_total",
@@ -46,7 +184,22 @@ class MetricsService:
         self.deepseek_tokens_total = Counter(
             name="deepseek_tokens_total",
             documentation="DeepSeek API 使用的 Token 总数",
-            labelnames=["model", "type"],  # token_type: prompt or completion
+            labelnames=["model", "type", "endpoint"],  # type: prompt or completion
+        )
+
+        # DeepSeek API 估算费用计数器
+        self.deepseek_cost_total = Counter(
+            name="deepseek_cost_total",
+            documentation="DeepSeek API 估算费用总额（按配置单价计算）",
+            labelnames=["model", "endpoint"],
+        )
+
+        # LLM 调用耗时直方图
+        self.llm_request_duration = Histogram(
+            name="llm_request_duration_seconds",
+            documentation="LLM 调用耗时（单位：秒）",
+            buckets=histogram_buckets("llm"),
+            labelnames=["model", "endpoint"],
         )
 
         # 向量检索次数计数器
@@ -60,7 +213,23 @@ class MetricsService:
         self.vector_search_duration = Histogram(
             name="vector_search_duration_seconds",
             documentation="向量检索响应时间（单位：秒）",
-            buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0),
+            buckets=histogram_buckets("vector_search"),
+            labelnames=["collection"],
+        )
+
+        # 检索结果数直方图
+        self.retrieval_results = Histogram(
+            name="retrieval_results",
+            documentation="单次向量检索返回的结果数",
+            buckets=RESULT_COUNT_BUCKETS,
+            labelnames=["collection"],
+        )
+
+        # 检索最高相似度直方图
+        self.retrieval_top_score = Histogram(
+            name="retrieval_top_score",
+            documentation="单次向量检索的最高相似度（无结果时不记录）",
+            buckets=SCORE_BUCKETS,
             labelnames=["collection"],
         )
 
@@ -89,10 +258,71 @@ class MetricsService:
         self.rag_retrieval_duration = Histogram(
             name="rag_retrieval_duration_seconds",
             documentation="RAG 检索响应时间（单位：秒）",
-            buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0),
+            buckets=histogram_buckets("vector_search"),
             labelnames=["query_type"],
         )
 
+        # Embedding 生成耗时直方图
+        self.embedding_duration = Histogram(
+            name="embedding_duration_seconds",
+            documentation="Embedding 生成耗时（单位：秒）",
+            buckets=histogram_buckets("embedding"),
+            labelnames=["provider"],
+        )
+
+        # MongoDB 操作耗时直方图
+        self.mongo_operation_duration = Histogram(
+            name="mongo_operation_duration_seconds",
+            documentation="MongoDB 操作耗时（单位：秒）",
+            buckets=histogram_buckets("mongo"),
+            labelnames=["collection", "operation"],
+        )
+
+        # Redis 操作耗时直方图
+        self.redis_operation_duration = Histogram(
+            name="redis_operation_duration_seconds",
+            documentation="Redis 操作耗时（单位：秒）",
+            buckets=histogram_buckets("redis"),
+            labelnames=["operation"],
+        )
+
+        # Agent 对话各阶段耗时直方图
+        self.agent_stage_duration = Histogram(
+            name="agent_stage_duration_seconds",
+            documentation="Agent 对话各阶段耗时（单位：秒）",
+            buckets=histogram_buckets("agent_stage"),
+            labelnames=["stage"],
+        )
+
+        # 慢请求计数器
+        self.slow_requests_total = Counter(
+            name="slow_requests_total",
+            documentation="超过延迟 SLO 的请求数",
+            labelnames=["method", "endpoint"],
+        )
+
+        # 事件循环阻塞计数器
+        self.event_loop_blocks_total = Counter(
+            name="event_loop_blocks_total",
+            documentation="事件循环被单个回调占用超过阈值的次数",
+        )
+
+        # 熔断器状态（0=closed, 1=half_open, 2=open）
+        self.circuit_breaker_state = Gauge(
+            name="circuit_breaker_state",
+            documentation="外部依赖熔断器状态（0=关闭, 1=半开, 2=打开）",
+            labelnames=["dependency"],
+            # 熔断器按 worker 独立计数，多进程模式下取存活 worker 中最严重的状态
+            multiprocess_mode="livemax",
+        )
+
+        # 熔断拒绝计数器
+        self.circuit_breaker_rejections_total = Counter(
+            name="circuit_breaker_rejections_total",
+            documentation="熔断器拒绝的请求总数",
+            labelnames=["dependency"],
+        )
+
         logger.info("Metrics service initialized")
 
     def record_api_request(
@@ -101,21 +331,25 @@ class MetricsService:
         endpoint: str,
         duration: float,
         status_code: int,
+        response_size: Optional[int] = None,
     ) -> None:
         """
         记录 API 请求指标
 
         Args:
             method: HTTP 方法（GET, POST 等）
-            endpoint: API 端点
+            endpoint: API 路由模板（不能使用原始路径，避免指标序列无限增长）
             duration: 请求耗时（秒）
             status_code: HTTP 状态码
+            response_size: 响应体大小（字节）
         """
         self.api_request_duration.labels(
             method=method,
             endpoint=endpoint,
             status=status_code,
         ).observe(duration)
+        if response_size is not None:
+            self.api_response_size.labels(method=method, endpoint=endpoint).observe(response_size)
 
     def record_api_error(
         self,
@@ -142,6 +376,7 @@ class MetricsService:
         model: str,
         token_type: str,
         count: int,
+        endpoint: str = "unknown",
     ) -> None:
         """
         记录 DeepSeek API Token 使用
@@ -150,12 +385,65 @@ class MetricsService:
             model: 模型名称
             token_type: Token 类型（prompt 或 completion）
             count: Token 数量
+            endpoint: 调用方（意图或接口，e.g., intent_recognition, rag_query）
         """
         self.deepseek_tokens_total.labels(
             model=model,
             type=token_type,
+            endpoint=endpoint,
         ).inc(count)
 
+    def record_llm_usage(
+        self,
+        model: str,
+        endpoint: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        duration: float,
+        estimated: bool = False,
+    ) -> float:
+        """
+        记录一次 LLM 调用的 Token 用量、估算费用，并输出结构化日志
+
+        Args:
+            model: 模型名称
+            endpoint: 调用方（意图或接口）
+            prompt_tokens: 输入 Token 数
+            completion_tokens: 输出 Token 数
+            duration: 调用耗时（秒）
+            estimated: Token 数是否为本地估算值（流式响应无 usage 时）
+
+        Returns:
+            估算费用
+        """
+        cost = (
+            prompt_tokens * settings.deepseek_input_price_per_million
+            + completion_tokens * settings.deepseek_output_price_per_million
+        ) / 1_000_000
+
+        self.record_deepseek_tokens(model, "prompt", prompt_tokens, endpoint)
+        self.record_deepseek_tokens(model, "completion", completion_tokens, endpoint)
+        self.deepseek_cost_total.labels(model=model, endpoint=endpoint).inc(cost)
+        self.llm_request_duration.labels(model=model, endpoint=endpoint).observe(duration)
+        record_request_timing(f"llm:{endpoint}", duration)
+
+        # 关键字参数同时作为结构化字段输出（JSON 日志）
+        logger.info(
+            "LLM usage: endpoint={endpoint} model={model} prompt_tokens={prompt_tokens} "
+            "completion_tokens={completion_tokens} duration={duration_ms}ms cost={cost}"
+            + (" (estimated)" if estimated else ""),
+            event="llm_usage",
+            model=model,
+            endpoint=endpoint,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            duration_ms=round(duration * 1000, 1),
+            cost=round(cost, 6),
+            estimated=estimated,
+        )
+        return cost
+
     def record_vector_search(
         self,
         collection: str,
@@ -171,23 +459,74 @@ class MetricsService:
         self.vector_search_total.labels(collection=collection).inc()
         self.vector_search_duration.labels(collection=collection).observe(duration)
 
-    def record_cache_hit(self, cache_type: str) -> None:
+    def record_retrieval_results(self, collection: str, scores: Sequence[float]) -> None:
+        """
+        记录检索结果数和最高相似度
+
+        Args:
+            collection: 集合名称
+            scores: 结果相似度列表
+        """
+        self.retrieval_results.labels(collection=collection).observe(len(scores))
+        if scores:
+            self.retrieval_top_score.labels(collection=collection).observe(max(scores))
+
+    def record_embedding(self, provider: str, duration: float) -> None:
+        """
+        记录 Embedding 生成耗时
+
+        Args:
+            provider: 向量化方式（openai, local）
+            duration: 耗时（秒）
+        """
+        self.embedding_duration.labels(provider=provider).observe(duration)
+
+    def record_mongo_operation(self, collection: str, operation: str, duration: float) -> None:
+        """
+        记录 MongoDB 操作耗时
+
+        Args:
+            collection: 集合名称
+            operation: 命令名称（find, insert, update, aggregate...）
+            duration: 耗时（秒）
+        """
+        self.mongo_operation_duration.labels(collection=collection, operation=operation).observe(
+            duration
+        )
+        record_request_timing(f"mongo:{collection}.{operation}", duration)
+
+    def record_redis_operation(self, operation: str, duration: float) -> None:
+        """
+        记录 Redis 操作耗时
+
+        Args:
+            operation: 命令名称（GET, SET, pipeline...）
+            duration: 耗时（秒）
+        """
+        self.redis_operation_duration.labels(operation=operation).observe(duration)
+        record_request_timing(f"redis:{operation}", duration)
+
+    def record_cache_hit(self, cache_type: str, count: int = 1) -> None:
         """
         记录缓存命中
 
         Args:
             cache_type: 缓存类型（e.g., rag_answer, search_result, health_advice）
+            count: 命中次数（批量读取时）
         """
-        self.cache_hits_total.labels(cache_type=cache_type).inc()
+        if count:
+            self.cache_hits_total.labels(cache_type=cache_type).inc(count)
 
-    def record_cache_miss(self, cache_type: str) -> None:
+    def record_cache_miss(self, cache_type: str, count: int = 1) -> None:
         """
         记录缓存未命中
 
         Args:
             cache_type: 缓存类型
+            count: 未命中次数（批量读取时）
         """
-        self.cache_misses_total.labels(cache_type=cache_type).inc()
+        if count:
+            self.cache_misses_total.labels(cache_type=cache_type).inc(count)
 
     def record_rag_retrieval(
         self,
@@ -204,24 +543,123 @@ class MetricsService:
         self.rag_retrievals_total.labels(query_type=query_type).inc()
         self.rag_retrieval_duration.labels(query_type=query_type).observe(duration)
 
-    @contextmanager
-    def measure_duration(self):
+    def record_slow_request(self, method: str, endpoint: str) -> None:
+        """
+        记录慢请求
+
+        Args:
+            method: HTTP 方法
+            endpoint: 路由模板
+        """
+        self.slow_requests_total.labels(method=method, endpoint=endpoint).inc()
+
+    def record_event_loop_block(self) -> None:
+        """记录一次事件循环阻塞"""
+        self.event_loop_blocks_total.inc()
+
+    def record_circuit_breaker_state(self, dependency: str, state: int) -> None:
         """
-        测量代码块执行时间的上下文管理器
+        记录熔断器状态
+
+        Args:
+            dependency: 依赖名称（e.g., deepseek, qdrant, mongodb）
+            state: 状态值（0=关闭, 1=半开, 2=打开）
+        """
+        self.circuit_breaker_state.labels(dependency=dependency).set(state)
+
+    def record_circuit_breaker_rejection(self, dependency: str) -> None:
+        """
+        记录熔断器拒绝的请求
+
+        Args:
+            dependency: 依赖名称
+        """
+        self.circuit_breaker_rejections_total.labels(dependency=dependency).inc()
+
+    def record_agent_stage(self, stage: str, duration: float) -> None:
+        """
+        记录 Agent 对话阶段耗时
+
+        Args:
+            stage: 阶段名称（intent, context, retrieval, generation, persistence）
+            duration: 耗时（秒）
+        """
+        self.agent_stage_duration.labels(stage=stage).observe(duration)
+
+    def time_agent_stage(self, stage: str) -> "timed":
+        """
+        记录 Agent 对话阶段耗时的上下文管理器（异常时同样记录）
 
         Usage:
-            with metrics.measure_duration() as timer:
-                # 执行操作
-                pass
-            duration = timer.elapsed()
+            with metrics.time_agent_stage("intent"):
+                ...
+
+        Args:
+            stage: 阶段名称（intent, context, retrieval, generation, persistence）
         """
-        start_time = time.time()
+        return timed("record_agent_stage", stage)
+
 
-        class Timer:
-            def elapsed(self) -> float:
-                return time.time() - start_time
+class timed:
+    """
+    计时上下文管理器 / 装饰器
 
-        yield Timer()
+    使用 perf_counter 计时，结束时（包括抛出异常时）调用 MetricsService 的记录方法，
+    耗时以 duration 关键字参数传入。装饰器同时支持同步和异步函数。
+
+    Usage:
+        with timed("record_vector_search", collection_name) as timer:
+            ...
+        timer.elapsed()
+
+        @timed("record_embedding", "openai")
+        async def _embed_with_openai(...):
+            ...
+    """
+
+    def __init__(self, record: str, *labels: str):
+        """
+        Args:
+            record: MetricsService 的记录方法名
+            labels: 记录方法的标签参数
+        """
+        self.record = record
+        self.labels = labels
+        self.duration: Optional[float] = None
+        self._start = 0.0
+
+    def __enter__(self) -> "timed":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.duration = time.perf_counter() - self._start
+        getattr(get_metrics_service(), self.record)(*self.labels, duration=self.duration)
+        stage = self.record.removeprefix("record_")
+        record_request_timing(":".join((stage, *self.labels)), self.duration)
+
+    def elapsed(self) -> float:
+        """已耗时（秒），退出后为总耗时"""
+        if self.duration is not None:
+            return self.duration
+        return time.perf_counter() - self._start
+
+    def __call__(self, func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(self.record, *self.labels):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.record, *self.labels):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
 
 
 # 全局单例
@@ -241,13 +679,101 @@ def get_metrics_service() -> MetricsService:
     return _metrics_service
 
 
+# 多进程模式下的指标文件名，如 counter_1234.db、gauge_livesum_1234.db
+_PID_FILE_PATTERN = re.compile(r"_(\d+)\.db$")
+
+
+def multiprocess_dir() -> Optional[str]:
+    """
+    多进程模式的指标目录
+
+    Returns:
+        PROMETHEUS_MULTIPROC_DIR，未设置时返回 None（单进程模式）
+    """
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否存活"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_dead_workers() -> int:
+    """
+    清理已退出 worker 的实时仪表文件（live* 模式）
+
+    计数器和直方图文件保留，已退出 worker 的累计值仍计入汇总结果。
+
+    Returns:
+        清理的 worker 数
+    """
+    directory = multiprocess_dir()
+    if not directory:
+        return 0
+
+    pids = set()
+    for filename in os.listdir(directory):
+        match = _PID_FILE_PATTERN.search(filename)
+        if filename.startswith("gauge_live") and match:
+            pids.add(int(match.group(1)))
+
+    dead = [pid for pid in pids if pid != os.getpid() and not _pid_alive(pid)]
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, directory)
+    if dead:
+        logger.info(f"Cleaned up metrics of dead workers: {sorted(dead)}")
+    return len(dead)
+
+
+def mark_worker_dead(pid: Optional[int] = None) -> None:
+    """
+    标记 worker 退出，删除其实时仪表文件（worker 关闭或 gunicorn child_exit 时调用）
+
+    Args:
+        pid: worker 进程 ID，默认为当前进程
+    """
+    directory = multiprocess_dir()
+    if directory:
+        multiprocess.mark_process_dead(pid or os.getpid(), directory)
+
+
+def collect_metrics() -> bytes:
+    """
+    生成 Prometheus 文本格式的指标
+
+    多进程模式下汇总指标目录中所有 worker 的数据，否则导出当前进程的默认注册表。
+
+    Returns:
+        Prometheus 文本格式指标
+    """
+    if not multiprocess_dir():
+        return generate_latest()
+
+    cleanup_dead_workers()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
 def start_metrics_server(port: int = 8000) -> None:
     """
     启动 Prometheus metrics HTTP 服务器
 
+    多进程模式下各 worker 会争用同一端口，此时不启动，由应用的 /metrics 端点汇总导出。
+
     Args:
         port: Prometheus metrics 服务器端口
     """
+    if multiprocess_dir():
+        logger.info("Multiprocess metrics mode, skipping standalone metrics server; use /metrics")
+        return
+
     try:
         start_http_server(port)
         logger.info(f"Prometheus metrics server started on port {port}")
@@ -0,0 +1,173 @@
+"""
+MongoDB 索引管理模块
+
+启动时为各服务的查询模式创建索引：
+- conversations / conversation_messages：按 ID、用户 + 更新时间、会话 + 桶号查询
+- articles：按 ID、分类 + 创建时间查询
+- favorites：按用户 + 文章唯一约束、用户 + 收藏时间查询
+- 列表使用游标分页，排序索引末尾带 ID 作为同一时间内的次序（见 pagination）
+- 会话过期使用会话头上的 TTL 索引，由 MongoDB 后台删除；消息桶随会话头级联清理
+  （见 ConversationService.purge_expired_buckets）
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.config import settings
+
+# 索引选项冲突（例如 TTL 时长变更）
+_INDEX_OPTIONS_CONFLICT = 85
+
+# 各服务实际使用的查询模式：(集合, 过滤条件, 排序)，用于索引覆盖检查
+# 游标条件作用于排序字段和 ID，与第一页使用同一索引
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("conversations", {"id": "c1"}, []),
+    ("conversations", {"user_id": "u1"}, [("updated_at", DESCENDING), ("id", DESCENDING)]),
+    (
+        "conversation_messages",
+        {"conversation_id": "c1", "bucket": {"$gte": 0, "$lte": 1}},
+        [("bucket", ASCENDING)],
+    ),
+    (
+        "conversation_messages",
+        {"updated_at": {"$lt": "cutoff"}},
+        [("updated_at", ASCENDING), ("_id", ASCENDING)],
+    ),
+    ("articles", {"id": "a1"}, []),
+    ("articles", {"id": {"$in": ["a1", "a2"]}}, []),
+    ("articles", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("articles", {"category": "高血压"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("favorites", {"user_id": "u1", "article_id": "a1"}, []),
+    (
+        "favorites",
+        {"user_id": "u1"},
+        [("created_at", DESCENDING), ("article_id", DESCENDING)],
+    ),
+]
+
+
+def get_index_models() -> Dict[str, List[IndexModel]]:
+    """
+    获取各集合的索引定义
+
+    Returns:
+        {集合名称: 索引列表}
+    """
+    indexes = {
+        "conversations": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel(
+                [("user_id", ASCENDING), ("updated_at", DESCENDING), ("id", DESCENDING)],
+                name="user_id_updated_at_id",
+            ),
+        ],
+        "conversation_messages": [
+            IndexModel(
+                [("conversation_id", ASCENDING), ("bucket", ASCENDING)],
+                name="conversation_id_bucket_unique",
+                unique=True,
+            ),
+            # 按 (updated_at, _id) 游标逐批清理已过期会话的消息桶
+            IndexModel([("updated_at", ASCENDING), ("_id", ASCENDING)], name="updated_at_id"),
+        ],
+        "articles": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+            IndexModel(
+                [("category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="category_created_at_id",
+            ),
+        ],
+        "favorites": [
+            IndexModel(
+                [("user_id", ASCENDING), ("article_id", ASCENDING)],
+                name="user_id_article_id_unique",
+                unique=True,
+            ),
+            IndexModel(
+                [("user_id", ASCENDING), ("created_at", DESCENDING), ("article_id", DESCENDING)],
+                name="user_id_created_at_article_id",
+            ),
+        ],
+    }
+
+    # 会话过期：会话头在最后一次写入 N 天后由 TTL 索引删除。消息桶不设 TTL，
+    # 否则活跃会话中较早写满的桶会先于会话头过期
+    ttl_seconds = settings.conversation_ttl_days * 86400
+    if ttl_seconds > 0:
+        indexes["conversations"].append(
+            IndexModel(
+                [("updated_at", ASCENDING)],
+                name="updated_at_ttl",
+                expireAfterSeconds=ttl_seconds,
+            )
+        )
+
+    return indexes
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """
+    创建（或更新）所有索引，已存在的索引不会重复创建
+
+    Args:
+        db: Motor 数据库对象
+
+    Returns:
+        {集合名称: 索引名称列表}
+    """
+    created: Dict[str, List[str]] = {}
+    for collection_name, models in get_index_models().items():
+        for model in models:
+            await _ensure_index(db, collection_name, model)
+            created.setdefault(collection_name, []).append(model.document["name"])
+
+    logger.info(
+        "MongoDB indexes ensured: "
+        + ", ".join(f"{name}({len(indexes)})" for name, indexes in created.items())
+    )
+    return created
+
+
+async def _ensure_index(db: AsyncIOMotorDatabase, collection_name: str, model: IndexModel) -> None:
+    """
+    创建单个索引，处理选项冲突
+
+    Args:
+        db: Motor 数据库对象
+        collection_name: 集合名称
+        model: 索引定义
+    """
+    try:
+        await db[collection_name].create_indexes([model])
+    except OperationFailure as e:
+        if e.code != _INDEX_OPTIONS_CONFLICT:
+            raise
+        if "expireAfterSeconds" not in model.document:
+            # 相同键的索引已以其他名称存在，查询仍可使用
+            logger.warning(
+                f"Index {collection_name}.{model.document['name']} "
+                f"already exists with different options: {e}"
+            )
+            return
+        await _update_ttl(db, collection_name, model)
+
+
+async def _update_ttl(db: AsyncIOMotorDatabase, collection_name: str, model: IndexModel) -> None:
+    """TTL 时长变更：通过 collMod 原地修改，无需重建索引"""
+    await db.command(
+        "collMod",
+        collection_name,
+        index={
+            "name": model.document["name"],
+            "expireAfterSeconds": model.document["expireAfterSeconds"],
+        },
+    )
+    logger.info(
+        f"TTL index updated: {collection_name}.{model.document['name']} "
+        f"expireAfterSeconds={model.document['expireAfterSeconds']}"
+    )
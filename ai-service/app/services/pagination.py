@@ -0,0 +1,116 @@
+"""
+游标（keyset）分页工具
+
+列表按 (排序字段, ID) 倒序排列，下一页从上一页最后一条记录之后开始：
+- 游标为不透明的 base64 字符串，编码最后一条记录的排序值和 ID
+- 查询条件为 排序字段 < t，或 排序字段 == t 且 ID < id，配合 (..., 排序字段, ID) 复合索引
+- 翻页开销与页码无关，不需要 skip
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import DESCENDING
+
+
+class InvalidCursorError(ValueError):
+    """游标格式错误"""
+
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    """
+    编码游标
+
+    Args:
+        sort_value: 最后一条记录的排序值（datetime 或 ISO 时间字符串）
+        doc_id: 最后一条记录的 ID
+
+    Returns:
+        游标字符串
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps({"t": sort_value, "id": doc_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    解码游标
+
+    Args:
+        cursor: 游标字符串
+
+    Returns:
+        (排序值, ID)
+
+    Raises:
+        InvalidCursorError: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), str(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_query(
+    query: Dict[str, Any], sort_field: str, cursor: Optional[str], id_field: str = "id"
+) -> Dict[str, Any]:
+    """
+    在查询条件上追加游标条件
+
+    Args:
+        query: 原查询条件
+        sort_field: 排序字段
+        cursor: 游标，None 表示第一页
+        id_field: ID 字段（排序相同时的次序）
+
+    Returns:
+        查询条件
+    """
+    if not cursor:
+        return query
+
+    sort_value, doc_id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, id_field: {"$lt": doc_id}},
+        ],
+    }
+
+
+def keyset_sort(sort_field: str, id_field: str = "id") -> List[Tuple[str, int]]:
+    """游标分页的排序条件"""
+    return [(sort_field, DESCENDING), (id_field, DESCENDING)]
+
+
+def paginate(
+    docs: List[Dict[str, Any]], page_size: int, sort_field: str, id_field: str = "id"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    截取一页并生成下一页游标
+
+    查询时多取一条（limit = page_size + 1）用于判断是否还有下一页。
+
+    Args:
+        docs: 查询结果
+        page_size: 每页数量
+        sort_field: 排序字段
+        id_field: ID 字段
+
+    Returns:
+        (本页记录, 下一页游标)，没有下一页时游标为 None
+    """
+    if len(docs) <= page_size:
+        return docs, None
+
+    page = docs[:page_size]
+    last = page[-1]
+    return page, encode_cursor(last[sort_field], last[id_field])
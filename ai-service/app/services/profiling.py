@@ -0,0 +1,347 @@
+"""
+运行时性能剖析
+
+不依赖外部工具，在线上 worker 内直接定位性能问题：
+- 采样剖析：后台线程按固定间隔采样线程栈 N 秒，导出为 collapsed stacks（flamegraph.pl /
+  speedscope 均可导入）或 speedscope JSON
+- 事件循环阻塞检测：事件循环内的心跳任务定期打点，监控线程发现心跳停顿超过阈值时记录
+  事件循环线程当前的调用栈（同步的 Qdrant 调用、本地 embedding 等会在此暴露）
+- 慢请求采集：超过延迟 SLO 的请求记录各阶段耗时（见 metrics_service.request_timings）
+
+所有数据只针对处理该请求的 worker 进程。
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.core.logger import request_id
+from app.services.metrics_service import get_metrics_service
+
+# 栈帧：(函数名, 文件, 函数首行号)
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+_SITE_PACKAGES = f"site-packages{os.sep}"
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有采样剖析在进行"""
+
+
+def _short_path(filename: str) -> str:
+    """缩短文件路径：第三方库从包名开始，项目文件使用相对路径"""
+    index = filename.rfind(_SITE_PACKAGES)
+    if index != -1:
+        return filename[index + len(_SITE_PACKAGES) :]
+    try:
+        relative = os.path.relpath(filename)
+    except ValueError:
+        return filename
+    return filename if relative.startswith("..") else relative
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({_short_path(filename)}:{line})"
+
+
+def _stack(frame) -> Stack:
+    """从栈顶帧回溯，返回由外到内的调用栈"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def sample_stacks(
+    seconds: float, interval: float, thread_ids: Optional[Set[int]] = None
+) -> Counter:
+    """
+    采样线程栈（阻塞调用，应在独立线程中运行）
+
+    Args:
+        seconds: 采样时长（秒）
+        interval: 采样间隔（秒）
+        thread_ids: 只采样这些线程，None 表示除当前线程外的全部线程
+
+    Returns:
+        调用栈 -> 采样次数
+    """
+    stacks: Counter = Counter()
+    own_thread = threading.get_ident()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread or (thread_ids and thread_id not in thread_ids):
+                continue
+            stacks[_stack(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """
+    导出为 collapsed stacks 格式（每行 "帧;帧;帧 次数"）
+
+    Args:
+        stacks: 调用栈 -> 采样次数
+
+    Returns:
+        collapsed stacks 文本
+    """
+    lines = [
+        f"{';'.join(_frame_label(frame) for frame in stack)} {count}"
+        for stack, count in stacks.most_common()
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def to_speedscope(stacks: Counter, interval: float, name: str) -> Dict[str, Any]:
+    """
+    导出为 speedscope JSON（sampled profile）
+
+    Args:
+        stacks: 调用栈 -> 采样次数
+        interval: 采样间隔（秒），作为每次采样的权重
+        name: profile 名称
+
+    Returns:
+        speedscope 文件内容
+    """
+    frame_index: Dict[Frame, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+    for stack, count in stacks.most_common():
+        samples.append([frame_index.setdefault(frame, len(frame_index)) for frame in stack])
+        weights.append(count * interval)
+
+    frames = [
+        {"name": func, "file": _short_path(filename), "line": line}
+        for func, filename, line in frame_index
+    ]
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "ai-service",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+class SamplingProfiler:
+    """按需采样剖析（同一时间只允许一个）"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def profile(
+        self, seconds: float, interval: float, thread_ids: Optional[Set[int]] = None
+    ) -> Counter:
+        """
+        在后台线程中采样，不阻塞事件循环
+
+        Args:
+            seconds: 采样时长（秒）
+            interval: 采样间隔（秒）
+            thread_ids: 只采样这些线程，None 表示全部线程
+
+        Returns:
+            调用栈 -> 采样次数
+
+        Raises:
+            ProfilerBusyError: 已有采样在进行
+        """
+        if self._lock.locked():
+            raise ProfilerBusyError("A profile is already running")
+
+        async with self._lock:
+            logger.info(f"Sampling profile started: seconds={seconds}, interval={interval}")
+            stacks = await asyncio.to_thread(sample_stacks, seconds, interval, thread_ids)
+            logger.info(f"Sampling profile finished: {sum(stacks.values())} samples")
+            return stacks
+
+
+class LoopBlockMonitor:
+    """
+    事件循环阻塞检测
+
+    心跳任务每半个阈值打点一次；监控线程发现距上次打点超过 间隔 + 阈值 时，
+    认为有回调占用事件循环超过阈值，记录事件循环线程的调用栈（每次阻塞只记录一次）。
+    """
+
+    def __init__(self, threshold: float, history_size: int = 50):
+        """
+        Args:
+            threshold: 阻塞阈值（秒）
+            history_size: 保留的最近阻塞记录数
+        """
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.blocks: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._last_beat = time.perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._beat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """在当前事件循环上启动检测"""
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopping.clear()
+        self._beat_task = asyncio.get_running_loop().create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-block-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop block monitor started: threshold={self.threshold * 1000:.0f}ms")
+
+    async def stop(self) -> None:
+        """停止检测"""
+        if self._beat_task is None:
+            return
+        self._stopping.set()
+        self._beat_task.cancel()
+        await asyncio.gather(self._beat_task, return_exceptions=True)
+        await asyncio.to_thread(self._thread.join)
+        self._beat_task = None
+        self._thread = None
+
+    async def _beat(self) -> None:
+        while True:
+            self._last_beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopping.wait(self.interval / 2):
+            last_beat = self._last_beat
+            blocked = time.perf_counter() - last_beat - self.interval
+            # 同一次阻塞（心跳未更新）只记录一次
+            if blocked < self.threshold or reported_beat == last_beat:
+                continue
+
+            reported_beat = last_beat
+            self._report(blocked)
+
+    def _report(self, blocked: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        self.blocks.append(
+            {
+                "detected_at": datetime.now(timezone.utc).isoformat(),
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": stack,
+            }
+        )
+        get_metrics_service().record_event_loop_block()
+        logger.warning(
+            f"Event loop blocked for {blocked * 1000:.0f}ms (threshold "
+            f"{self.threshold * 1000:.0f}ms), current stack:\n{stack}"
+        )
+
+
+class SlowRequestLog:
+    """最近的慢请求及其各阶段耗时"""
+
+    def __init__(self, size: int):
+        self.requests: Deque[Dict[str, Any]] = deque(maxlen=size)
+
+    def record(
+        self,
+        method: str,
+        endpoint: str,
+        status_code: int,
+        duration: float,
+        started_at: float,
+        timings: Iterable[Tuple[str, float, float]],
+    ) -> Dict[str, Any]:
+        """
+        记录一次慢请求
+
+        Args:
+            method: HTTP 方法
+            endpoint: 路由模板
+            status_code: 状态码
+            duration: 总耗时（秒）
+            started_at: 请求开始时间（perf_counter）
+            timings: (阶段, 开始时间 perf_counter, 耗时)
+
+        Returns:
+            记录内容
+        """
+        stages = [
+            {
+                "stage": stage,
+                "offset_ms": round((start - started_at) * 1000, 1),
+                "duration_ms": round(stage_duration * 1000, 1),
+            }
+            for stage, start, stage_duration in timings
+        ]
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "request_id": request_id.get(),
+            "method": method,
+            "endpoint": endpoint,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "stages": stages,
+        }
+        self.requests.append(entry)
+
+        breakdown = ", ".join(f"{s['stage']}={s['duration_ms']}ms" for s in stages[:20])
+        logger.warning(
+            f"Slow request: {method} {endpoint} {status_code} "
+            f"{entry['duration_ms']}ms [{breakdown}]"
+        )
+        return entry
+
+
+# 全局单例
+_profiler: Optional[SamplingProfiler] = None
+_loop_block_monitor: Optional[LoopBlockMonitor] = None
+_slow_request_log: Optional[SlowRequestLog] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """获取采样剖析器单例"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
+
+
+def get_loop_block_monitor() -> LoopBlockMonitor:
+    """获取事件循环阻塞检测器单例"""
+    global _loop_block_monitor
+    if _loop_block_monitor is None:
+        _loop_block_monitor = LoopBlockMonitor(settings.loop_block_threshold_ms / 1000)
+    return _loop_block_monitor
+
+
+def get_slow_request_log() -> SlowRequestLog:
+    """获取慢请求记录单例"""
+    global _slow_request_log
+    if _slow_request_log is None:
+        _slow_request_log = SlowRequestLog(settings.slow_request_log_size)
+    return _slow_request_log
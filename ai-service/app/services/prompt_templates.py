@@ -8,6 +8,7 @@ Prompt 模板管理系统
 - 诊断建议
 - RAG 问答
 - 意图识别
+- 对话摘要
 """
 
 from typing import Dict, Any, List, Optional
@@ -25,6 +26,7 @@ class PromptType(str, Enum):
     INTENT_RECOGNITION = "intent_recognition"  # 意图识别
     DIET_ADVICE = "diet_advice"  # 饮食建议
     EXERCISE_ADVICE = "exercise_advice"  # 运动建议
+    CONVERSATION_SUMMARY = "conversation_summary"  # 对话摘要
 
 
 # 免责声明
@@ -67,6 +69,8 @@ class PromptTemplates:
 请根据患者的健康状况，提供个性化的饮食建议。""",
             PromptType.EXERCISE_ADVICE: """你是一位运动康复专家，擅长为慢性病患者制定运动方案。
 请根据患者的健康状况，提供安全、有效的运动建议。""",
+            PromptType.CONVERSATION_SUMMARY: """你是一位健康咨询记录员，负责整理医患对话要点。
+请客观、简洁地总结对话内容，不要添加对话中没有的信息。""",
         }
         return roles.get(prompt_type, roles[PromptType.HEALTH_CONSULTATION])
 
@@ -328,3 +332,40 @@ class PromptTemplates:
             {"role": "system", "content": system_content},
             {"role": "user", "content": user_content},
         ]
+
+    @staticmethod
+    def build_conversation_summary_prompt(
+        messages: List[Dict[str, str]], previous_summary: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        构建对话摘要 Prompt
+
+        Args:
+            messages: 待压缩的对话消息
+            previous_summary: 已有的对话摘要（在其基础上增量更新）
+
+        Returns:
+            消息列表
+        """
+        system_content = f"""{PromptTemplates.get_system_role(PromptType.CONVERSATION_SUMMARY)}
+
+摘要要求：
+1. 保留用户的健康状况、症状、用药、检查指标等关键信息
+2. 保留已给出的主要建议和用户尚未解决的问题
+3. 使用第三人称，不超过 300 字
+4. 只返回摘要内容，不要其他内容
+"""
+
+        user_content = ""
+        if previous_summary:
+            user_content += f"已有摘要：\n{previous_summary}\n\n"
+        user_content += "新增对话：\n"
+        for message in messages:
+            speaker = "用户" if message["role"] == "user" else "助手"
+            user_content += f"{speaker}：{message['content']}\n"
+        user_content += "\n请输出合并后的完整摘要。"
+
+        return [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_content},
+        ]
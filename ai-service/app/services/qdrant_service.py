@@ -5,8 +5,10 @@ Qdrant 向量数据库服务模块
 """
 
 from typing import Any, Dict, List, Optional
+import httpx
 from loguru import logger
 from qdrant_client import QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
 from qdrant_client.models import (
     Distance,
     PointStruct,
@@ -16,6 +18,34 @@ from qdrant_client.models import (
 )
 
 from app.config import settings
+from app.core.tracing import set_span_attributes, start_span
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.services.metrics_service import get_metrics_service, timed
+
+# QDRANT_URL 设为该值时使用进程内的内存模式
+IN_MEMORY_URL = ":memory:"
+
+
+def is_qdrant_failure(error: BaseException) -> bool:
+    """
+    判断 Qdrant 异常是否计入熔断（沿异常链检查，连接失败会被包装为 RuntimeError）
+
+    Args:
+        error: 异常
+
+    Returns:
+        传输层错误、超时或 5xx 响应返回 True
+    """
+    while error is not None:
+        if isinstance(error, UnexpectedResponse):
+            return error.status_code is None or error.status_code >= 500
+        if isinstance(
+            error,
+            (ResponseHandlingException, httpx.TransportError, ConnectionError, TimeoutError),
+        ):
+            return True
+        error = error.__cause__
+    return False
 
 
 class QdrantService:
@@ -29,27 +59,40 @@ class QdrantService:
         """初始化 Qdrant 服务"""
         self.url = settings.qdrant_url
         self._client: Optional[QdrantClient] = None
+        # 只有连接类错误和 5xx 计入熔断，请求参数 / 过滤条件错误（4xx）不计入
+        self.circuit_breaker = get_circuit_breaker("qdrant", is_failure=is_qdrant_failure)
         logger.info(f"Qdrant service initialized: {self.url}")
 
     def _get_client(self) -> QdrantClient:
         """
         获取 Qdrant 客户端（懒加载）
 
+        连接失败计入熔断器，熔断期间直接抛出 CircuitOpenError，不再反复重连
+
         Returns:
             Qdrant 客户端实例
         """
         if self._client is None:
-            try:
-                logger.info("Connecting to Qdrant server...")
-                self._client = QdrantClient(url=self.url, timeout=30)
-                # 测试连接
-                collections = self._client.get_collections()
-                logger.info(f"Qdrant connected, collections: {len(collections.collections)}")
-            except Exception as e:
-                logger.error(f"Failed to connect to Qdrant: {str(e)}")
-                raise RuntimeError(f"Cannot connect to Qdrant server: {str(e)}")
+            self._client = self.circuit_breaker.call_sync(self._connect)
         return self._client
 
+    def _connect(self) -> QdrantClient:
+        """连接 Qdrant 服务器"""
+        try:
+            logger.info("Connecting to Qdrant server...")
+            if self.url == IN_MEMORY_URL:
+                # 进程内模式（基准测试、本地调试），数据不持久化
+                client = QdrantClient(location=IN_MEMORY_URL)
+            else:
+                client = QdrantClient(url=self.url, timeout=30)
+            # 测试连接
+            collections = client.get_collections()
+            logger.info(f"Qdrant connected, collections: {len(collections.collections)}")
+            return client
+        except Exception as e:
+            logger.error(f"Failed to connect to Qdrant: {str(e)}")
+            raise RuntimeError(f"Cannot connect to Qdrant server: {str(e)}") from e
+
     def create_collection(
         self,
         collection_name: str,
@@ -146,14 +189,25 @@ class QdrantService:
         try:
             # 分批插入
             total = len(points)
-            logger.info(f"Upserting {total} points to {collection_name}, batch_size: {batch_size}")
+            logger.debug(
+                "Upserting {total} points to {collection}, batch_size: {batch_size}",
+                total=total,
+                collection=collection_name,
+                batch_size=batch_size,
+            )
 
             for i in range(0, total, batch_size):
                 batch = points[i : i + batch_size]
                 client.upsert(collection_name=collection_name, points=batch)
-                logger.debug(f"Upserted {min(i + batch_size, total)}/{total} points")
-
-            logger.info(f"Successfully upserted {total} points to {collection_name}")
+                logger.debug(
+                    "Upserted {done}/{total} points", done=min(i + batch_size, total), total=total
+                )
+
+            logger.info(
+                "Successfully upserted {total} points to {collection}",
+                total=total,
+                collection=collection_name,
+            )
             return True
 
         except Exception as e:
@@ -185,21 +239,35 @@ class QdrantService:
 
         try:
             logger.debug(
-                f"Searching in {collection_name}, limit={limit}, threshold={score_threshold}"
-            )
-            # 新版本使用 query_points 替代 search
-            response = client.query_points(
-                collection_name=collection_name,
-                query=query_vector,
+                "Searching in {collection}, limit={limit}, threshold={threshold}",
+                collection=collection_name,
                 limit=limit,
-                score_threshold=score_threshold,
-                query_filter=filter_conditions,
+                threshold=score_threshold,
             )
+            # 新版本使用 query_points 替代 search
+            with (
+                timed("record_vector_search", collection_name),
+                start_span("qdrant.search", collection=collection_name, limit=limit),
+            ):
+                response = self.circuit_breaker.call_sync(
+                    lambda: client.query_points(
+                        collection_name=collection_name,
+                        query=query_vector,
+                        limit=limit,
+                        score_threshold=score_threshold,
+                        query_filter=filter_conditions,
+                    )
+                )
 
             results = response.points if hasattr(response, "points") else []
-            logger.info(f"Found {len(results)} results")
+            scores = [point.score for point in results]
+            get_metrics_service().record_retrieval_results(collection_name, scores)
+            set_span_attributes(results=len(scores), top_score=max(scores, default=None))
+            logger.debug("Found {count} results", count=len(results))
             return results
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Search failed: {str(e)}")
             raise RuntimeError(f"Search failed: {str(e)}")
@@ -294,6 +362,13 @@ class QdrantService:
             logger.error(f"Failed to delete points: {str(e)}")
             raise RuntimeError(f"Failed to delete points: {str(e)}")
 
+    def close(self) -> None:
+        """关闭客户端连接（下次使用时重新连接）"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+            logger.info("Qdrant connection closed")
+
 
 # 全局单例
 _qdrant_service: Optional[QdrantService] = None
@@ -14,8 +14,11 @@ import uuid
 from loguru import logger
 
 from app.config import settings
+from app.core.tracing import set_span_attributes, start_span
 from app.services.qdrant_service import get_qdrant_service
 from app.services.embedding_service import get_embedding_service
+from app.services.circuit_breaker import CircuitState
+from app.services.metrics_service import timed
 from qdrant_client.models import Distance, PointStruct
 
 
@@ -29,6 +32,18 @@ class RAGService:
         self.vector_size = settings.embedding_dimension
         logger.info(f"RAG service initialized: collection={self.collection_name}")
 
+    def is_available(self) -> bool:
+        """
+        检索链路是否可用（Qdrant 与 Embedding 熔断器均未打开）
+
+        Returns:
+            可用返回 True
+        """
+        return (
+            self.qdrant.circuit_breaker.state != CircuitState.OPEN
+            and self.embedding.circuit_breaker.state != CircuitState.OPEN
+        )
+
     async def initialize(self, force: bool = False) -> bool:
         """
         初始化知识库
@@ -96,6 +111,7 @@ class RAGService:
             logger.error(f"Search failed: {str(e)}")
             raise
 
+    @timed("record_rag_retrieval", "text")
     async def search_by_text(
         self,
         query_text: str,
@@ -113,9 +129,21 @@ class RAGService:
         Returns:
             检索结果列表
         """
-        # 将文本转换为向量
-        query_vector = await self.embedding.embed_text(query_text)
-        return await self.search(query_vector, top_k, score_threshold)
+        with start_span(
+            "rag.search",
+            collection=self.collection_name,
+            top_k=top_k or settings.rag_top_k,
+            score_threshold=score_threshold or settings.rag_score_threshold,
+        ):
+            # 将文本转换为向量
+            with start_span("rag.embed"):
+                query_vector = await self.embedding.embed_text(query_text)
+            results = await self.search(query_vector, top_k, score_threshold)
+            set_span_attributes(
+                results=len(results),
+                top_score=max((r["score"] for r in results), default=None),
+            )
+            return results
 
     async def add_document(
         self,
@@ -178,7 +206,7 @@ class RAGService:
             文档 ID 列表
         """
         try:
-            logger.info(f"Batch adding {len(documents)} documents")
+            logger.debug("Batch adding {count} documents", count=len(documents))
             doc_ids = []
             points = []
 
@@ -210,7 +238,7 @@ class RAGService:
                 batch_size=batch_size,
             )
 
-            logger.info(f"Successfully added {len(doc_ids)} documents")
+            logger.info("Successfully added {count} documents", count=len(doc_ids))
             return doc_ids
 
         except Exception as e:
@@ -7,10 +7,10 @@ Redis 服务模块
 import json
 from typing import Any, Optional
 
-import redis.asyncio as redis
 from loguru import logger
 
 from app.config import settings
+from app.services.instrumentation import InstrumentedRedis
 
 
 class RedisService:
@@ -29,7 +29,7 @@ class RedisService:
         """连接到 Redis"""
         if self.client is None:
             try:
-                self.client = redis.from_url(
+                self.client = InstrumentedRedis.from_url(
                     self.redis_url,
                     encoding="utf-8",
                     decode_responses=True,
@@ -43,7 +43,7 @@ class RedisService:
     async def disconnect(self):
         """断开 Redis 连接"""
         if self.client:
-            await self.client.close()
+            await self.client.aclose()
             self.client = None
             logger.info("Redis connection closed")
 
@@ -194,5 +194,5 @@ def get_redis_service() -> RedisService:
     return _redis_service
 
 
-# 全局实例（用于向后兼容）
-redis_service = RedisService()
+# 全局实例（用于向后兼容，与 get_redis_service() 共用同一个连接池）
+redis_service = get_redis_service()
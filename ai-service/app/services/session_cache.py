@@ -0,0 +1,281 @@
+"""
+会话上下文缓存（Redis）
+
+活跃会话的上下文保存在 Redis 中，对话轮次内的读取无需访问 MongoDB：
+- conversation:{id}:header   会话头（计数、摘要、最后一条消息）
+- conversation:{id}:window   最近 N 条消息（带 seq 的 JSON 列表）
+- conversation:{id}:patient  患者上下文
+
+写入消息时写穿透更新，读取时刷新过期时间（滑动 TTL）。MongoDB 仍是数据源，
+缓存缺失或 Redis 不可用时回退到 MongoDB 并回填。
+write-behind 模式下消息窗口同时承载尚未落库的消息。
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.models import ChatMessage, Conversation
+from app.services.metrics_service import get_metrics_service
+from app.services.redis_service import get_redis_service
+
+
+def header_key(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}:header"
+
+
+def window_key(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}:window"
+
+
+def patient_key(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}:patient"
+
+
+class SessionContextCache:
+    """会话上下文缓存"""
+
+    def __init__(self):
+        self.window_size = settings.conversation_hot_window_size
+        self.ttl = settings.conversation_cache_ttl_seconds
+        self.metrics = get_metrics_service()
+        logger.info(
+            f"Session context cache initialized: window={self.window_size}, ttl={self.ttl}s"
+        )
+
+    async def client(self):
+        """获取 Redis 客户端"""
+        redis = get_redis_service()
+        if redis.client is None:
+            await redis.connect()
+        return redis.client
+
+    async def get_header(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取会话头并刷新过期时间
+
+        Args:
+            conversation_id: 对话 ID
+
+        Returns:
+            会话头字典，未缓存或 Redis 不可用时返回 None
+        """
+        try:
+            client = await self.client()
+            pipe = client.pipeline(transaction=False)
+            pipe.get(header_key(conversation_id))
+            pipe.expire(header_key(conversation_id), self.ttl)
+            raw, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session cache read failed: id={conversation_id}, error={e}")
+            return None
+
+        if raw is None:
+            self.metrics.record_cache_miss("session_header")
+            return None
+        self.metrics.record_cache_hit("session_header")
+        return json.loads(raw)
+
+    async def set_header(self, header: Dict[str, Any]) -> None:
+        """
+        缓存会话头
+
+        Args:
+            header: 会话头文档（MongoDB 文档或已缓存的字典）
+        """
+        try:
+            client = await self.client()
+            await client.set(header_key(header["id"]), _dump_header(header), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Session cache write failed: id={header.get('id')}, error={e}")
+
+    async def get_window(self, conversation_id: str) -> Optional[Tuple[int, List[ChatMessage]]]:
+        """
+        读取最近消息窗口并刷新过期时间
+
+        Args:
+            conversation_id: 对话 ID
+
+        Returns:
+            (消息总数, 最近的连续消息)，窗口不存在时返回 None
+        """
+        try:
+            client = await self.client()
+            pipe = client.pipeline(transaction=False)
+            pipe.lrange(window_key(conversation_id), 0, -1)
+            pipe.expire(window_key(conversation_id), self.ttl)
+            raw, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session cache read failed: id={conversation_id}, error={e}")
+            return None
+
+        if not raw:
+            self.metrics.record_cache_miss("session_window")
+            return None
+        self.metrics.record_cache_hit("session_window")
+
+        docs = {doc["seq"]: doc for doc in (json.loads(item) for item in raw)}
+        seqs = sorted(docs)
+        # 只取末尾连续的一段（写入失败或并发回填可能留下空洞）
+        first = len(seqs) - 1
+        while first > 0 and seqs[first - 1] == seqs[first] - 1:
+            first -= 1
+        return seqs[-1] + 1, [ChatMessage(**docs[seq]) for seq in seqs[first:]]
+
+    def queue_append(self, pipe, conversation_id: str, payload: str) -> None:
+        """
+        在调用方的 pipeline 中追加一条消息到窗口
+
+        Args:
+            pipe: Redis pipeline
+            conversation_id: 对话 ID
+            payload: 带 seq 的消息 JSON
+        """
+        key = window_key(conversation_id)
+        pipe.rpush(key, payload)
+        pipe.ltrim(key, -self.window_size, -1)
+        pipe.expire(key, self.ttl)
+
+    async def append(self, header: Dict[str, Any], message: ChatMessage, seq: int) -> None:
+        """
+        写穿透：消息落库后更新会话头和消息窗口
+
+        Args:
+            header: 写入后的会话头
+            message: 消息
+            seq: 消息序号
+        """
+        conversation_id = header["id"]
+        try:
+            client = await self.client()
+            pipe = client.pipeline(transaction=True)
+            pipe.set(header_key(conversation_id), _dump_header(header), ex=self.ttl)
+            self.queue_append(pipe, conversation_id, dump_message(message, seq))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session cache write failed: id={conversation_id}, error={e}")
+            await self.invalidate(conversation_id)
+
+    async def backfill(
+        self, conversation_id: str, messages: Iterable[ChatMessage], start: int
+    ) -> None:
+        """
+        把从 MongoDB 读取的连续消息回填到窗口头部（不会覆盖较新的消息）
+
+        Args:
+            conversation_id: 对话 ID
+            messages: 序号从 start 开始的连续消息
+            start: 第一条消息的序号
+        """
+        payloads = [dump_message(m, start + i) for i, m in enumerate(messages)]
+        if not payloads:
+            return
+
+        key = window_key(conversation_id)
+        try:
+            client = await self.client()
+            pipe = client.pipeline(transaction=True)
+            pipe.lpush(key, *reversed(payloads))
+            pipe.ltrim(key, -self.window_size, -1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session cache backfill failed: id={conversation_id}, error={e}")
+
+    async def get_patient_context(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取会话的患者上下文并刷新过期时间
+
+        Args:
+            conversation_id: 对话 ID
+
+        Returns:
+            患者上下文，不存在时返回 None
+        """
+        try:
+            client = await self.client()
+            pipe = client.pipeline(transaction=False)
+            pipe.get(patient_key(conversation_id))
+            pipe.expire(patient_key(conversation_id), self.ttl)
+            raw, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session cache read failed: id={conversation_id}, error={e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set_patient_context(self, conversation_id: str, context: Dict[str, Any]) -> None:
+        """
+        缓存会话的患者上下文
+
+        Args:
+            conversation_id: 对话 ID
+            context: 患者上下文
+        """
+        try:
+            client = await self.client()
+            await client.set(
+                patient_key(conversation_id),
+                json.dumps(context, ensure_ascii=False, default=str),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            logger.warning(f"Session cache write failed: id={conversation_id}, error={e}")
+
+    async def invalidate(self, conversation_id: str) -> None:
+        """
+        删除缓存的会话头（会话头在缓存之外被修改时调用）
+
+        Args:
+            conversation_id: 对话 ID
+        """
+        try:
+            client = await self.client()
+            await client.delete(header_key(conversation_id))
+        except Exception as e:
+            logger.warning(f"Session cache invalidate failed: id={conversation_id}, error={e}")
+
+    async def discard(self, conversation_id: str, *extra_keys: str) -> None:
+        """
+        删除会话的全部缓存（删除会话时调用）
+
+        Args:
+            conversation_id: 对话 ID
+            extra_keys: 需要一并删除的其他键
+        """
+        client = await self.client()
+        await client.delete(
+            header_key(conversation_id),
+            window_key(conversation_id),
+            patient_key(conversation_id),
+            *extra_keys,
+        )
+
+
+def _dump_header(header: Dict[str, Any]) -> str:
+    """会话头序列化为 JSON（不含消息列表）"""
+    doc = Conversation(**header).model_dump(mode="json", exclude={"messages"})
+    return json.dumps(doc, ensure_ascii=False)
+
+
+def dump_message(message: ChatMessage, seq: int) -> str:
+    """消息序列化为带 seq 的 JSON"""
+    return json.dumps({**message.model_dump(), "seq": seq}, ensure_ascii=False)
+
+
+# 全局单例
+_session_cache: Optional[SessionContextCache] = None
+
+
+def get_session_cache() -> SessionContextCache:
+    """
+    获取会话上下文缓存单例
+
+    Returns:
+        SessionContextCache 实例
+    """
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = SessionContextCache()
+    return _session_cache
@@ -0,0 +1,163 @@
+"""
+对话滚动摘要服务
+
+会话中尚未摘要的消息超过条数或 Token 阈值后，将较早的轮次交给 LLM
+压缩进会话的 summary 字段，构建 Prompt 时以摘要代替原文：
+- 摘要任务在后台执行，不阻塞对话请求
+- 同一会话的任务按 summary_debounce_seconds 防抖合并
+- 同时执行的摘要任务数受 summary_max_concurrency 限制
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+
+from app.config import settings
+from app.models import ChatMessage
+from app.services.context_builder import message_tokens
+from app.services.conversation_service import conversation_service
+from app.services.deepseek_client import get_deepseek_client
+from app.services.prompt_templates import PromptTemplates
+
+
+class ConversationSummarizer:
+    """对话滚动摘要器"""
+
+    def __init__(self):
+        self.deepseek = get_deepseek_client()
+        self.keep_recent = settings.summary_keep_recent_messages
+        self._semaphore = asyncio.Semaphore(settings.summary_max_concurrency)
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._waiting: Set[str] = set()  # 仍在防抖等待中的会话
+        self._dirty: Set[str] = set()  # 摘要执行期间又有新消息的会话
+        logger.info("Conversation summarizer initialized")
+
+    def schedule(self, conversation_id: str) -> None:
+        """
+        调度会话摘要任务（防抖）
+
+        等待期间再次调度会重新计时；执行期间再次调度会在本次结束后重新调度。
+
+        Args:
+            conversation_id: 对话 ID
+        """
+        if not settings.summary_enabled:
+            return
+
+        task = self._pending.get(conversation_id)
+        if task and not task.done():
+            if conversation_id not in self._waiting:
+                self._dirty.add(conversation_id)
+                return
+            task.cancel()
+
+        self._waiting.add(conversation_id)
+        self._pending[conversation_id] = asyncio.create_task(self._run(conversation_id))
+
+    def needs_summary(self, messages: List[ChatMessage]) -> bool:
+        """
+        判断未摘要的消息是否达到触发阈值
+
+        Args:
+            messages: 尚未压缩进摘要的消息
+
+        Returns:
+            需要摘要返回 True
+        """
+        if len(messages) <= self.keep_recent:
+            return False
+        if len(messages) >= settings.summary_trigger_messages:
+            return True
+        return sum(message_tokens(m) for m in messages) >= settings.summary_trigger_tokens
+
+    async def summarize(self, conversation_id: str) -> bool:
+        """
+        将较早的轮次压缩进会话摘要
+
+        Args:
+            conversation_id: 对话 ID
+
+        Returns:
+            是否更新了摘要
+        """
+        conversation = await conversation_service.get_unsummarized_conversation(conversation_id)
+        if not conversation:
+            return False
+
+        unsummarized = conversation.messages
+        if not self.needs_summary(unsummarized):
+            return False
+
+        to_condense = unsummarized[: -self.keep_recent]
+        prompt = PromptTemplates.build_conversation_summary_prompt(
+            messages=[{"role": m.role, "content": m.content} for m in to_condense],
+            previous_summary=conversation.summary,
+        )
+        response = await self.deepseek.chat(
+            messages=prompt, temperature=0.3, endpoint="conversation_summary"
+        )
+
+        summarized_count = conversation.summarized_count + len(to_condense)
+        updated = await conversation_service.update_summary(
+            conversation_id,
+            summary=response["content"].strip(),
+            summarized_count=summarized_count,
+            expected_count=conversation.summarized_count,
+        )
+        logger.info(
+            f"Conversation summarized: id={conversation_id}, "
+            f"condensed={len(to_condense)}, summarized_count={summarized_count}, "
+            f"updated={updated}"
+        )
+        return updated
+
+    async def close(self) -> None:
+        """取消所有未完成的摘要任务"""
+        self._dirty.clear()
+        tasks = [task for task in self._pending.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+        self._waiting.clear()
+
+    async def _run(self, conversation_id: str) -> None:
+        """防抖等待后执行摘要"""
+        await asyncio.sleep(settings.summary_debounce_seconds)
+        self._waiting.discard(conversation_id)
+
+        try:
+            async with self._semaphore:
+                await self.summarize(conversation_id)
+        except Exception as e:
+            logger.warning(f"Conversation summary failed: id={conversation_id}, error={e}")
+        finally:
+            if self._pending.get(conversation_id) is asyncio.current_task():
+                del self._pending[conversation_id]
+            if conversation_id in self._dirty:
+                self._dirty.discard(conversation_id)
+                self.schedule(conversation_id)
+
+
+# 全局单例
+_summarizer: Optional[ConversationSummarizer] = None
+
+
+def get_conversation_summarizer() -> ConversationSummarizer:
+    """
+    获取对话摘要器单例
+
+    Returns:
+        ConversationSummarizer 实例
+    """
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = ConversationSummarizer()
+    return _summarizer
+
+
+async def close_conversation_summarizer() -> None:
+    """关闭对话摘要器，取消未完成的后台任务"""
+    if _summarizer is not None:
+        await _summarizer.close()
@@ -0,0 +1,79 @@
+"""
+Token 计数模块
+
+在本地估算文本 Token 数，用于：
+- 流式响应缺少 usage 信息时的用量估算
+- Prompt 上下文窗口的 Token 预算控制
+
+估算规则参考 DeepSeek 官方换算：1 个中文字符约 0.6 token，1 个英文字符约 0.3 token。
+"""
+
+from typing import Any, Dict, List, Tuple
+
+# 每条消息的格式开销（role、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_CJK_RATIO = 0.6
+_OTHER_RATIO = 0.3
+
+
+def _is_cjk(char: str) -> bool:
+    """判断字符是否为中日韩字符或全角标点"""
+    code = ord(char)
+    return (
+        0x4E00 <= code <= 0x9FFF  # CJK 统一表意文字
+        or 0x3400 <= code <= 0x4DBF  # CJK 扩展 A
+        or 0x3000 <= code <= 0x303F  # CJK 标点
+        or 0xFF00 <= code <= 0xFFEF  # 全角字符
+    )
+
+
+def count_tokens(text: str) -> int:
+    """
+    估算文本的 Token 数
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        估算的 Token 数（非空文本至少为 1）
+    """
+    if not text:
+        return 0
+
+    cjk = sum(1 for char in text if _is_cjk(char))
+    other = len(text) - cjk
+    return max(1, int(cjk * _CJK_RATIO + other * _OTHER_RATIO + 0.5))
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    估算消息列表的 Token 数
+
+    Args:
+        messages: 对话消息列表，格式为 [{"role": "...", "content": "..."}]
+
+    Returns:
+        估算的 Token 数
+    """
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def extract_usage(usage: Any) -> Tuple[int, int]:
+    """
+    从 SDK 响应的 usage（对象或字典）中提取 Token 数
+
+    Args:
+        usage: usage 对象、字典或 None
+
+    Returns:
+        (prompt_tokens, completion_tokens)
+    """
+    if usage is None:
+        return 0, 0
+    if isinstance(usage, dict):
+        return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+    return (
+        int(getattr(usage, "prompt_tokens", 0) or 0),
+        int(getattr(usage, "completion_tokens", 0) or 0),
+    )
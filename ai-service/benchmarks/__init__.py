@@ -0,0 +1,12 @@
+"""
+AI 服务基准测试
+
+本地替身代替外部依赖，结果可在不同提交之间比较：
+- DeepSeek / Embedding：OpenAI 兼容接口替身（fake_llm），延迟分布可配置，支持流式
+- Qdrant：内存模式（QDRANT_URL=:memory:）
+- MongoDB / Redis：docker-compose.yml 中的本地实例（tmpfs，不持久化）
+
+retrieval_eval 用标注问题集评测不同检索配置的质量和延迟。
+
+用法见 benchmarks/__main__.py。
+"""
@@ -0,0 +1,194 @@
+"""
+基准测试命令行
+
+用法（在 ai-service 目录下）：
+    # 启动本地 MongoDB / Redis（tmpfs，不持久化）
+    docker compose -f benchmarks/docker-compose.yml up -d
+
+    # 执行全部场景，LLM 替身在进程内运行，Qdrant 使用内存模式
+    python -m benchmarks run --concurrency 1,8,32 --duration 30
+
+    # 使用独立进程的 LLM 替身（真实网络栈，流式逐块下发）
+    python -m benchmarks fake-llm --port 9000 --chat-latency lognormal:800:3000
+    python -m benchmarks run --llm http://127.0.0.1:9000/v1 --scenarios chat,llm_stream
+
+    # 检索质量 / 延迟评测（本地 Embedding 模型 + Qdrant 本地模式）
+    python -m benchmarks retrieval-eval --k 3
+
+    # 比较两次结果，p95 / 吞吐变差超过 10% 时退出码为 1
+    python -m benchmarks compare benchmarks/results/<基线>.json benchmarks/results/<当前>.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from loguru import logger
+
+from benchmarks import runner
+from benchmarks.fake_llm import FakeLLMConfig, LatencyModel, serve
+from benchmarks.stats import compare
+
+
+def _concurrency(value: str):
+    levels = [int(level) for level in value.split(",")]
+    if any(level < 1 for level in levels):
+        raise argparse.ArgumentTypeError("concurrency must be >= 1")
+    return levels
+
+
+def _latency(value: str) -> LatencyModel:
+    try:
+        return LatencyModel.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _add_fake_llm_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("LLM 替身")
+    group.add_argument("--chat-latency", type=_latency, default="constant:300", help="首 token 延迟")
+    group.add_argument(
+        "--token-latency", type=_latency, default="constant:0", help="每个 token 的生成延迟"
+    )
+    group.add_argument(
+        "--embedding-latency", type=_latency, default="constant:50", help="Embedding 延迟"
+    )
+    group.add_argument("--completion-tokens", type=int, default=200, help="每次回答的 token 数")
+    group.add_argument("--dimension", type=int, default=1536, help="Embedding 维度")
+    group.add_argument("--intent", default="health_consultation", help="意图识别返回的意图")
+    group.add_argument("--error-rate", type=float, default=0.0, help="注入 503 错误的比例")
+
+
+def _fake_llm_config(args) -> FakeLLMConfig:
+    return FakeLLMConfig(
+        chat_latency=args.chat_latency,
+        token_latency=args.token_latency,
+        embedding_latency=args.embedding_latency,
+        completion_tokens=args.completion_tokens,
+        dimension=args.dimension,
+        intent=args.intent,
+        error_rate=args.error_rate,
+    )
+
+
+def _run(args) -> int:
+    runner.configure_environment(args)
+    results = asyncio.run(runner.run(args, _fake_llm_config(args)))
+    path = runner.save_results(results, args.output)
+    print(runner.format_table(results["scenarios"]))
+    print(f"Results saved to {path}")
+    return 0
+
+
+def _retrieval_eval(args) -> int:
+    from benchmarks import retrieval_eval
+
+    retrieval_eval.configure_environment(args)
+    results = asyncio.run(retrieval_eval.evaluate(args))
+    path = runner.save_results(results, args.output, prefix="retrieval-")
+    print(retrieval_eval.format_table(results["scenarios"]))
+    for spec, reason in results["skipped"].items():
+        print(f"skipped {spec}: {reason}")
+    for note in results["notes"]:
+        print(f"note: {note}")
+    print(f"Results saved to {path}")
+    return 0
+
+
+def _compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    print(f"baseline: {baseline['meta']['commit']}  current: {current['meta']['commit']}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(
+            f"{row['scenario']:<20}{row['metric']:<16}{row['baseline']:>12}"
+            f"{row['current']:>12}{row['change_pct']:>+10.1f}%{flag}"
+        )
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="AI 服务基准测试")
+    parser.add_argument("--log-level", default="WARNING", help="被测服务的日志级别")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="执行基准测试")
+    run.add_argument("--scenarios", default="all", help="逗号分隔的场景名称，默认全部")
+    run.add_argument("--concurrency", type=_concurrency, default=[8], help="并发度，如 1,8,32")
+    run.add_argument("--duration", type=float, default=30, help="每个并发度的测试时长（秒）")
+    run.add_argument("--requests", type=int, default=None, help="每个并发度的最大请求数")
+    run.add_argument("--warmup", type=float, default=3, help="预热时长（秒），不计入结果")
+    run.add_argument("--label", default=None, help="结果标签")
+    run.add_argument("--output", default=None, help="结果文件路径")
+    run.add_argument("--llm", default=runner.IN_PROCESS, help="in-process 或 LLM 替身地址（如 .../v1）")
+    run.add_argument("--qdrant-url", default=":memory:", help="Qdrant 地址，默认内存模式")
+    run.add_argument(
+        "--mongodb-url", default="mongodb://localhost:27018", help="MongoDB 地址（基准测试实例）"
+    )
+    run.add_argument("--redis-host", default="localhost")
+    run.add_argument("--redis-port", type=int, default=6380)
+    run.add_argument("--redis-password", default="")
+    run.add_argument("--redis-db", type=int, default=0)
+    run.add_argument("--corpus-size", type=int, default=500, help="知识库文档数")
+    run.add_argument("--articles", type=int, default=200, help="科普文章数")
+    run.add_argument("--ingest-batch", type=int, default=20, help="ingest 场景每批文档数")
+    _add_fake_llm_arguments(run)
+
+    fake_llm = commands.add_parser("fake-llm", help="以独立 HTTP 服务运行 LLM 替身")
+    fake_llm.add_argument("--host", default="127.0.0.1")
+    fake_llm.add_argument("--port", type=int, default=9000)
+    _add_fake_llm_arguments(fake_llm)
+
+    evaluation = commands.add_parser("retrieval-eval", help="检索质量 / 延迟评测")
+    evaluation.add_argument("--configs", default=None, help="逗号分隔的检索配置，默认评测全部类型（见 retrieval_eval）")
+    evaluation.add_argument("--k", type=int, default=None, help="评测的 top-k，默认 RAG_TOP_K")
+    evaluation.add_argument(
+        "--embedding",
+        choices=["local", "openai", "hashing"],
+        default="local",
+        help="local: 本地模型；openai: 配置的 Embedding API；hashing: 无模型的词面基线",
+    )
+    evaluation.add_argument("--embedding-model", default=None, help="覆盖配置中的 Embedding 模型")
+    evaluation.add_argument(
+        "--embedding-price", type=float, default=None, help="Embedding 价格（美元 / 百万 token）"
+    )
+    evaluation.add_argument(
+        "--reranker", default="BAAI/bge-reranker-base", help="reranked 配置使用的 CrossEncoder"
+    )
+    evaluation.add_argument("--qdrant-url", default=":memory:", help="Qdrant 地址，默认本地模式")
+    evaluation.add_argument("--repeat", type=int, default=3, help="每个问题重复检索次数（测延迟）")
+    evaluation.add_argument("--label", default=None, help="结果标签")
+    evaluation.add_argument("--output", default=None, help="结果文件路径")
+
+    comparison = commands.add_parser("compare", help="比较两次结果")
+    comparison.add_argument("baseline")
+    comparison.add_argument("current")
+    comparison.add_argument("--threshold", type=float, default=10, help="回归阈值（百分比）")
+
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    if args.command == "run":
+        return _run(args)
+    if args.command == "retrieval-eval":
+        return _retrieval_eval(args)
+    if args.command == "fake-llm":
+        serve(_fake_llm_config(args), args.host, args.port)
+        return 0
+    return _compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
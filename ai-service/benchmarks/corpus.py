@@ -0,0 +1,77 @@
+"""
+基准测试数据：知识库文档、查询和科普文章
+
+按固定随机种子生成，同样的参数每次生成同样的数据，不同提交之间的结果可以比较。
+"""
+
+import random
+from typing import Any, Dict, List
+
+TOPICS = ["高血压", "糖尿病", "高血脂", "冠心病", "痛风", "骨质疏松", "慢性胃炎", "失眠"]
+ASPECTS = {
+    "饮食": "应当控制总热量，少盐少油，多吃新鲜蔬菜和全谷物，避免暴饮暴食",
+    "运动": "建议每周进行至少 150 分钟中等强度的有氧运动，如快走、游泳、骑自行车",
+    "用药": "应遵医嘱按时按量服药，不可自行停药或调整剂量，出现不适及时就医",
+    "监测": "需要定期监测相关指标并记录，每三个月复查一次，根据结果调整治疗方案",
+    "症状": "早期可能没有明显症状，出现头晕、乏力、胸闷等情况时应尽快到医院检查",
+    "作息": "保持规律作息，保证每天七到八小时睡眠，避免熬夜和长期精神紧张",
+}
+CATEGORIES = ["慢病管理", "饮食营养", "运动健身", "用药指导"]
+
+
+def knowledge_documents(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    生成知识库文档
+
+    Args:
+        count: 文档数量
+        seed: 随机种子
+
+    Returns:
+        文档列表，每个文档包含 content 和 metadata
+    """
+    rng = random.Random(seed)
+    aspects = list(ASPECTS.items())
+    documents = []
+    for index in range(count):
+        topic = TOPICS[index % len(TOPICS)]
+        aspect, advice = aspects[(index // len(TOPICS)) % len(aspects)]
+        extra = rng.choice(list(ASPECTS.values()))
+        documents.append(
+            {
+                "content": f"{topic}患者的{aspect}要点（第 {index} 条）：{advice}。此外，{extra}。",
+                "metadata": {"topic": topic, "aspect": aspect, "source": "benchmark"},
+            }
+        )
+    return documents
+
+
+def query(rng: random.Random) -> str:
+    """随机生成一条检索问题（与知识库文档有较高相似度）"""
+    topic = rng.choice(TOPICS)
+    aspect, advice = rng.choice(list(ASPECTS.items()))
+    return f"{topic}患者的{aspect}要点：{advice}，请问还要注意什么？"
+
+
+def articles(count: int) -> List[Dict[str, Any]]:
+    """
+    生成科普文章
+
+    Args:
+        count: 文章数量
+
+    Returns:
+        文章字段字典列表（可直接构造 Article）
+    """
+    aspects = list(ASPECTS.items())
+    return [
+        {
+            "id": f"bench-article-{index}",
+            "title": f"{TOPICS[index % len(TOPICS)]}{aspects[index % len(aspects)][0]}指南 {index}",
+            "content": "。".join(ASPECTS.values()) * 3,
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "tags": [TOPICS[index % len(TOPICS)]],
+            "author": "benchmark",
+        }
+        for index in range(count)
+    ]
@@ -0,0 +1,315 @@
+"""
+OpenAI 兼容接口的本地替身（对话 + Embedding）
+
+用于基准测试，不调用真实的 DeepSeek / Embedding API：
+- /v1/chat/completions：支持流式（SSE）和非流式，延迟 = 首 token 延迟 + 每个 token 的生成延迟
+- /v1/embeddings：基于字符二元组的特征哈希向量，相同文本向量相同、相似文本相似度高，
+  检索阈值和排序在基准测试中仍然有意义
+- 意图识别请求返回固定意图的 JSON，对话链路会走完整的 RAG 分支
+- 可按比例注入 503 错误，用于测试重试和熔断路径下的性能
+
+延迟分布格式（毫秒）：
+    constant:200            固定 200ms
+    uniform:100:300         100~300ms 均匀分布
+    lognormal:800:3000      对数正态分布，p50=800ms，p99=3000ms
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# 标准正态分布的 99 分位数
+_Z99 = 2.3263
+
+
+@dataclass
+class LatencyModel:
+    """延迟分布（毫秒）"""
+
+    kind: str = "constant"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """
+        解析延迟分布
+
+        Args:
+            spec: "constant:ms" / "uniform:min:max" / "lognormal:p50:p99"
+
+        Returns:
+            延迟分布
+
+        Raises:
+            ValueError: 格式错误
+        """
+        kind, _, rest = spec.strip().partition(":")
+        arity = {"constant": 1, "uniform": 2, "lognormal": 2}
+        if kind not in arity:
+            raise ValueError(f"Unknown latency distribution: {spec!r}")
+        try:
+            params = [float(p) for p in rest.split(":")]
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution: {spec!r}")
+        if len(params) != arity[kind] or any(p < 0 for p in params):
+            raise ValueError(f"Invalid latency distribution: {spec!r}")
+        if kind == "uniform" and params[0] > params[1]:
+            raise ValueError(f"Invalid latency distribution: {spec!r}")
+        if kind == "lognormal" and not 0 < params[0] <= params[1]:
+            raise ValueError(f"Invalid latency distribution: {spec!r}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random = random) -> float:
+        """采样一次延迟（秒）"""
+        if self.kind == "uniform":
+            ms = rng.uniform(*self.params)
+        elif self.kind == "lognormal":
+            p50, p99 = self.params
+            sigma = math.log(p99 / p50) / _Z99
+            ms = rng.lognormvariate(math.log(p50), sigma)
+        else:
+            ms = self.params[0]
+        return ms / 1000
+
+    def __str__(self) -> str:
+        return ":".join([self.kind, *(f"{p:g}" for p in self.params)])
+
+
+@dataclass
+class FakeLLMConfig:
+    """替身服务配置"""
+
+    # 首 token 延迟（非流式请求同样计入）
+    chat_latency: LatencyModel = field(default_factory=lambda: LatencyModel.parse("constant:300"))
+    # 每个 token 的生成延迟
+    token_latency: LatencyModel = field(default_factory=lambda: LatencyModel.parse("constant:0"))
+    embedding_latency: LatencyModel = field(
+        default_factory=lambda: LatencyModel.parse("constant:50")
+    )
+    # 每次回答的 token 数
+    completion_tokens: int = 200
+    # Embedding 维度，需与 EMBEDDING_DIMENSION 一致
+    dimension: int = 1536
+    # 意图识别请求返回的意图
+    intent: str = "health_consultation"
+    # 注入 503 错误的比例
+    error_rate: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chat_latency": str(self.chat_latency),
+            "token_latency": str(self.token_latency),
+            "embedding_latency": str(self.embedding_latency),
+            "completion_tokens": self.completion_tokens,
+            "dimension": self.dimension,
+            "intent": self.intent,
+            "error_rate": self.error_rate,
+        }
+
+
+def bigrams(text: str) -> List[str]:
+    """字符二元组（中文无需分词），空白不参与"""
+    chars = [c for c in text.lower() if not c.isspace()]
+    if len(chars) < 2:
+        return chars
+    return [a + b for a, b in zip(chars, chars[1:])]
+
+
+def fake_embedding(text: str, dimension: int) -> List[float]:
+    """
+    特征哈希向量（L2 归一化）
+
+    每个字符二元组映射到一个维度和符号，共享二元组越多余弦相似度越高。
+
+    Args:
+        text: 文本
+        dimension: 向量维度
+
+    Returns:
+        向量
+    """
+    vector = [0.0] * dimension
+    for gram in bigrams(text):
+        digest = hashlib.md5(gram.encode()).digest()
+        index = int.from_bytes(digest[:4], "little") % dimension
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return [v / norm for v in vector]
+
+
+def _count_tokens(messages: List[Dict[str, Any]]) -> int:
+    # 粗略估算：中文约 1.5 字符 / token
+    return max(1, int(sum(len(str(m.get("content") or "")) for m in messages) / 1.5))
+
+
+class _FakeLLM:
+    """替身服务的请求处理（每个应用一个实例，持有配置和随机数生成器）"""
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.rng = random.Random()
+
+    def error(self) -> Optional[JSONResponse]:
+        """按比例注入 503 错误"""
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+                status_code=503,
+            )
+        return None
+
+    def answer(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """生成回答的 token 序列：意图识别请求返回意图 JSON，其余返回固定长度的回答"""
+        system = " ".join(str(m.get("content") or "") for m in messages if m["role"] == "system")
+        if '"intent"' in system:
+            body = json.dumps(
+                {"intent": self.config.intent, "confidence": 0.9, "entities": {}},
+                ensure_ascii=False,
+            )
+            return [body]
+        # 每个 token 一个汉字
+        return ["健康建议基准测试回答内容"[i % 12] for i in range(self.config.completion_tokens)]
+
+    async def chat_completions(self, request: Request):
+        payload = await request.json()
+        error = self.error()
+        if error is not None:
+            return error
+
+        messages = payload.get("messages", [])
+        tokens = self.answer(messages)
+        prompt_tokens = _count_tokens(messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        meta = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake-chat"),
+        }
+
+        if not payload.get("stream"):
+            return await self._completion(meta, tokens, usage)
+        include_usage = (payload.get("stream_options") or {}).get("include_usage", False)
+        return StreamingResponse(
+            self._events(meta, tokens, usage if include_usage else None),
+            media_type="text/event-stream",
+        )
+
+    async def _completion(
+        self, meta: Dict[str, Any], tokens: List[str], usage: Dict[str, int]
+    ) -> JSONResponse:
+        """非流式响应：等待全部 token 生成后一次返回"""
+        await asyncio.sleep(
+            self.config.chat_latency.sample(self.rng)
+            + sum(self.config.token_latency.sample(self.rng) for _ in tokens)
+        )
+        return JSONResponse(
+            {
+                **meta,
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    async def _events(
+        self, meta: Dict[str, Any], tokens: List[str], usage: Optional[Dict[str, int]]
+    ) -> AsyncIterator[str]:
+        """流式响应（SSE）：每个 token 一个分片，请求 include_usage 时最后附带 usage 分片"""
+
+        def chunk(choices: List[Dict[str, Any]], **extra) -> str:
+            body = {**meta, "object": "chat.completion.chunk", "choices": choices, **extra}
+            return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+        await asyncio.sleep(self.config.chat_latency.sample(self.rng))
+        for index, token in enumerate(tokens):
+            if index:
+                await asyncio.sleep(self.config.token_latency.sample(self.rng))
+            yield chunk([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+        yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage is not None:
+            yield chunk([], usage=usage)
+        yield "data: [DONE]\n\n"
+
+    async def embeddings(self, request: Request):
+        payload = await request.json()
+        error = self.error()
+        if error is not None:
+            return error
+
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await asyncio.sleep(self.config.embedding_latency.sample(self.rng))
+        tokens = sum(max(1, len(text)) for text in inputs)
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": index,
+                        "embedding": fake_embedding(text, self.config.dimension),
+                    }
+                    for index, text in enumerate(inputs)
+                ],
+                "model": payload.get("model", "fake-embedding"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            }
+        )
+
+
+def create_fake_llm_app(config: Optional[FakeLLMConfig] = None) -> Starlette:
+    """
+    创建替身服务 ASGI 应用
+
+    Args:
+        config: 替身服务配置
+
+    Returns:
+        Starlette 应用
+    """
+    fake = _FakeLLM(config or FakeLLMConfig())
+    return Starlette(
+        routes=[
+            Route("/v1/chat/completions", fake.chat_completions, methods=["POST"]),
+            Route("/v1/embeddings", fake.embeddings, methods=["POST"]),
+        ]
+    )
+
+
+def serve(config: FakeLLMConfig, host: str = "127.0.0.1", port: int = 9000) -> None:
+    """
+    以独立 HTTP 服务运行替身（真实网络栈，流式响应逐块下发）
+
+    Args:
+        config: 替身服务配置
+        host: 监听地址
+        port: 监听端口
+    """
+    import uvicorn
+
+    uvicorn.run(create_fake_llm_app(config), host=host, port=port, log_level="warning")
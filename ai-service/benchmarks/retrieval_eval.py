@@ -0,0 +1,457 @@
+"""
+检索质量 / 延迟评测
+
+用 app/data/knowledge_base.py 的文档和 retrieval_queries.py 的标注问题，批量评测不同检索配置，
+在同一张表里同时给出质量（recall@k、MRR、nDCG@k）和代价（检索延迟、Embedding 延迟和 token 数）：
+- dense: 稠密向量检索（当前线上方式），可设置 threshold（RAG_SCORE_THRESHOLD）和 hnsw_ef
+- quantized: int8 标量量化的 collection，rescore 控制是否用原始向量重打分
+- hybrid: 稠密向量 + 字符二元组稀疏向量（IDF 加权），RRF 融合
+- reranked: 稠密向量取 candidates 个候选，再用 CrossEncoder 重排
+
+配置格式：类型[:参数=值,...]，例如 dense:threshold=0.7、dense:hnsw_ef=16、reranked:candidates=10
+
+默认使用本地 Embedding 模型（sentence-transformers）和 Qdrant 本地模式，不依赖外部服务。
+注意：Qdrant 本地模式是精确检索，hnsw_ef 和量化不影响结果和延迟，
+评测这两类配置需用 --qdrant-url 指向 Qdrant 服务。
+"""
+
+import hashlib
+import math
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from qdrant_client import QdrantClient, models
+
+from benchmarks.fake_llm import bigrams, fake_embedding
+from benchmarks.retrieval_queries import labeled_queries
+from benchmarks.stats import percentile
+
+KINDS = ("dense", "quantized", "hybrid", "reranked")
+IN_MEMORY_URL = ":memory:"
+
+
+@dataclass
+class RetrievalConfig:
+    """检索配置"""
+
+    spec: str
+    kind: str = "dense"
+    threshold: Optional[float] = None
+    hnsw_ef: Optional[int] = None
+    rescore: bool = True
+    candidates: int = 20
+
+    @classmethod
+    def parse(cls, spec: str) -> "RetrievalConfig":
+        """
+        解析检索配置
+
+        Args:
+            spec: 类型[:参数=值,...]
+
+        Returns:
+            检索配置
+
+        Raises:
+            ValueError: 格式错误
+        """
+        kind, _, rest = spec.strip().partition(":")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown retrieval config: {spec!r}")
+        config = cls(spec=spec.strip(), kind=kind)
+        for item in filter(None, rest.split(",")):
+            key, _, value = item.partition("=")
+            try:
+                if key == "threshold":
+                    config.threshold = float(value)
+                elif key == "hnsw_ef":
+                    config.hnsw_ef = int(value)
+                elif key == "candidates":
+                    config.candidates = int(value)
+                elif key == "rescore" and value in ("true", "false"):
+                    config.rescore = value == "true"
+                else:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"Invalid option {item!r} in retrieval config {spec!r}")
+        return config
+
+
+def default_configs(threshold: float) -> List[str]:
+    """默认评测的配置"""
+    return [
+        "dense",
+        f"dense:threshold={threshold:g}",
+        "dense:hnsw_ef=16",
+        "dense:hnsw_ef=128",
+        "quantized",
+        "quantized:rescore=false",
+        "hybrid",
+        "reranked",
+    ]
+
+
+def recall_at_k(ranked: List[str], relevant: Dict[str, int], k: int) -> float:
+    """前 k 个结果覆盖的相关文档比例"""
+    total = sum(1 for grade in relevant.values() if grade > 0)
+    hits = sum(1 for title in ranked[:k] if relevant.get(title, 0) > 0)
+    return hits / total if total else 0.0
+
+
+def reciprocal_rank(ranked: List[str], relevant: Dict[str, int], k: int) -> float:
+    """第一个相关结果排名的倒数（前 k 个内没有相关结果时为 0）"""
+    for rank, title in enumerate(ranked[:k], start=1):
+        if relevant.get(title, 0) > 0:
+            return 1 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[str], relevant: Dict[str, int], k: int) -> float:
+    """分级相关度的 nDCG@k，增益为 2^相关度 - 1"""
+
+    def dcg(grades: List[int]) -> float:
+        return sum((2**grade - 1) / math.log2(i + 2) for i, grade in enumerate(grades))
+
+    ideal = dcg(sorted(relevant.values(), reverse=True)[:k])
+    return dcg([relevant.get(title, 0) for title in ranked[:k]]) / ideal if ideal else 0.0
+
+
+def sparse_vector(text: str) -> models.SparseVector:
+    """字符二元组词频稀疏向量（IDF 由 Qdrant 计算）"""
+    counts: Counter = Counter()
+    for gram in bigrams(text):
+        counts[int.from_bytes(hashlib.md5(gram.encode()).digest()[:4], "little")] += 1
+    return models.SparseVector(indices=list(counts), values=[float(v) for v in counts.values()])
+
+
+class ServiceEmbedder:
+    """使用服务的 EmbeddingService（与线上相同的向量化路径，由 EMBEDDING_PROVIDER 决定）"""
+
+    def __init__(self):
+        from app.services import get_embedding_service
+
+        self.service = get_embedding_service()
+        self.name = f"{self.service.provider}:{self.service.model}"
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.service.embed_texts(texts)
+
+    async def embed_query(self, text: str) -> List[float]:
+        return await self.service.embed_text(text)
+
+
+class HashingEmbedder:
+    """字符二元组特征哈希（无需模型，作为词面匹配的基线和冒烟测试）"""
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+        self.name = f"hashing:{dimension}"
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [fake_embedding(text, self.dimension) for text in texts]
+
+    async def embed_query(self, text: str) -> List[float]:
+        return fake_embedding(text, self.dimension)
+
+
+class CrossEncoderReranker:
+    """CrossEncoder 重排（sentence-transformers）"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name)
+
+    def rerank(self, query: str, points: List[models.ScoredPoint]) -> List[models.ScoredPoint]:
+        if not points:
+            return points
+        scores = self.model.predict([(query, point.payload["content"]) for point in points])
+        ranked = sorted(zip(scores, range(len(points))), reverse=True)
+        return [points[index] for _, index in ranked]
+
+
+class EvalIndex:
+    """评测用 collection（稠密 + 稀疏向量一份，int8 量化一份）"""
+
+    def __init__(self, client: QdrantClient, prefix: str = "retrieval_eval"):
+        self.client = client
+        self.dense = f"{prefix}_dense"
+        self.quantized = f"{prefix}_quantized"
+
+    def build(self, documents: List[Dict[str, Any]], vectors: List[List[float]]) -> None:
+        size = len(vectors[0])
+        for name, quantization in (
+            (self.dense, None),
+            (
+                self.quantized,
+                models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8, always_ram=True
+                    )
+                ),
+            ),
+        ):
+            if self.client.collection_exists(name):
+                self.client.delete_collection(name)
+            self.client.create_collection(
+                name,
+                vectors_config={
+                    "dense": models.VectorParams(size=size, distance=models.Distance.COSINE)
+                },
+                sparse_vectors_config={
+                    "sparse": models.SparseVectorParams(modifier=models.Modifier.IDF)
+                },
+                quantization_config=quantization,
+            )
+            self.client.upsert(
+                name,
+                points=[
+                    models.PointStruct(
+                        id=index,
+                        vector={"dense": vector, "sparse": sparse_vector(doc["content"])},
+                        payload={"title": doc["metadata"]["title"], "content": doc["content"]},
+                    )
+                    for index, (doc, vector) in enumerate(zip(documents, vectors))
+                ],
+            )
+
+    def drop(self) -> None:
+        for name in (self.dense, self.quantized):
+            if self.client.collection_exists(name):
+                self.client.delete_collection(name)
+
+    def search(
+        self,
+        config: RetrievalConfig,
+        query: str,
+        vector: List[float],
+        k: int,
+        reranker: Optional[CrossEncoderReranker],
+    ) -> List[str]:
+        """按配置检索，返回结果文档标题（按排名）"""
+        params = models.SearchParams(
+            hnsw_ef=config.hnsw_ef,
+            quantization=(
+                models.QuantizationSearchParams(rescore=config.rescore)
+                if config.kind == "quantized"
+                else None
+            ),
+        )
+        collection = self.quantized if config.kind == "quantized" else self.dense
+
+        if config.kind == "hybrid":
+            response = self.client.query_points(
+                collection,
+                prefetch=[
+                    models.Prefetch(query=vector, using="dense", limit=config.candidates),
+                    models.Prefetch(
+                        query=sparse_vector(query), using="sparse", limit=config.candidates
+                    ),
+                ],
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                limit=k,
+                with_payload=["title"],
+            )
+            return [point.payload["title"] for point in response.points]
+
+        limit = config.candidates if config.kind == "reranked" else k
+        response = self.client.query_points(
+            collection,
+            query=vector,
+            using="dense",
+            limit=limit,
+            score_threshold=config.threshold,
+            search_params=params,
+            with_payload=True if config.kind == "reranked" else ["title"],
+        )
+        points = response.points
+        if config.kind == "reranked":
+            points = reranker.rerank(query, points)[:k]
+        return [point.payload["title"] for point in points]
+
+
+def configure_environment(args) -> None:
+    """设置 Embedding 配置（必须在导入 app 之前调用）"""
+    os.environ.setdefault("DEEPSEEK_API_KEY", "retrieval-eval")
+    # 每次都真实向量化，测得的 Embedding 延迟才有意义
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    if args.embedding != "hashing":
+        os.environ["EMBEDDING_PROVIDER"] = args.embedding
+    if args.embedding_model:
+        key = "EMBEDDING_LOCAL_MODEL" if args.embedding == "local" else "EMBEDDING_MODEL"
+        os.environ[key] = args.embedding_model
+
+
+def evaluate_config(
+    index: EvalIndex,
+    config: RetrievalConfig,
+    queries: List[Dict[str, Any]],
+    query_vectors: List[List[float]],
+    embed_latencies: List[float],
+    k: int,
+    repeat: int,
+    reranker: Optional[CrossEncoderReranker],
+) -> Dict[str, Any]:
+    """
+    对一种检索配置执行全部查询并汇总指标
+
+    Args:
+        index: 评测索引
+        config: 检索配置
+        queries: 带相关性标注的查询
+        query_vectors: 查询向量（与 queries 一一对应）
+        embed_latencies: 查询向量化耗时（秒）
+        k: 返回结果数
+        repeat: 每个查询重复次数（延迟取全部重复）
+        reranker: 重排模型
+
+    Returns:
+        质量指标（recall@k、MRR、nDCG@k、空结果率）和延迟分位数
+    """
+    recalls, rrs, ndcgs, empty = [], [], [], 0
+    search_latencies: List[float] = []
+    total_latencies: List[float] = []
+    for item, vector, embed_latency in zip(queries, query_vectors, embed_latencies):
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            ranked = index.search(config, item["query"], vector, k, reranker)
+            elapsed = time.perf_counter() - start_time
+            search_latencies.append(elapsed)
+            total_latencies.append(embed_latency + elapsed)
+        relevant = item["relevant"]
+        recalls.append(recall_at_k(ranked, relevant, k))
+        rrs.append(reciprocal_rank(ranked, relevant, k))
+        ndcgs.append(ndcg_at_k(ranked, relevant, k))
+        empty += not ranked
+
+    search_latencies.sort()
+    total_latencies.sort()
+    return {
+        "queries": len(queries),
+        "recall_at_k": round(sum(recalls) / len(queries), 4),
+        "mrr": round(sum(rrs) / len(queries), 4),
+        "ndcg_at_k": round(sum(ndcgs) / len(queries), 4),
+        "empty_rate": round(empty / len(queries), 4),
+        "p50_ms": round(percentile(search_latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(search_latencies, 99) * 1000, 3),
+        "total_p50_ms": round(percentile(total_latencies, 50) * 1000, 3),
+        "total_p99_ms": round(percentile(total_latencies, 99) * 1000, 3),
+    }
+
+
+async def evaluate(args) -> Dict[str, Any]:
+    """
+    执行检索评测
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        结果文件内容（格式与基准测试结果一致，可用 compare 比较）
+    """
+    from app.config import settings
+    from app.data.knowledge_base import health_knowledge_documents
+    from app.services.token_counter import count_tokens
+    from benchmarks.runner import metadata
+
+    k = args.k or settings.rag_top_k
+    specs = (
+        args.configs.split(",") if args.configs else default_configs(settings.rag_score_threshold)
+    )
+    configs = [RetrievalConfig.parse(spec) for spec in specs]
+
+    embedder = HashingEmbedder() if args.embedding == "hashing" else ServiceEmbedder()
+    reranker = None
+    skipped: Dict[str, str] = {}
+    if any(config.kind == "reranked" for config in configs):
+        try:
+            reranker = CrossEncoderReranker(args.reranker)
+        except Exception as e:
+            reason = f"reranker unavailable ({type(e).__name__}: {e})"
+            logger.warning(f"Skipping reranked configs: {reason}")
+            skipped.update({c.spec: reason for c in configs if c.kind == "reranked"})
+            configs = [c for c in configs if c.kind != "reranked"]
+
+    local_mode = args.qdrant_url == IN_MEMORY_URL
+    client = (
+        QdrantClient(location=IN_MEMORY_URL) if local_mode else QdrantClient(url=args.qdrant_url)
+    )
+    index = EvalIndex(client)
+
+    documents = health_knowledge_documents
+    start_time = time.perf_counter()
+    doc_vectors = await embedder.embed_documents([doc["content"] for doc in documents])
+    index_embed_s = time.perf_counter() - start_time
+    index.build(documents, doc_vectors)
+
+    queries = labeled_queries
+    query_vectors: List[List[float]] = []
+    embed_latencies: List[float] = []
+    for item in queries:
+        start_time = time.perf_counter()
+        query_vectors.append(await embedder.embed_query(item["query"]))
+        embed_latencies.append(time.perf_counter() - start_time)
+    tokens_per_query = sum(count_tokens(item["query"]) for item in queries) / len(queries)
+    sorted_embed = sorted(embed_latencies)
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    try:
+        for config in configs:
+            summary = {
+                "k": k,
+                **evaluate_config(
+                    index, config, queries, query_vectors, embed_latencies, k, args.repeat, reranker
+                ),
+                "embed_p50_ms": round(percentile(sorted_embed, 50) * 1000, 3),
+                "embed_tokens_per_query": round(tokens_per_query, 2),
+            }
+            if args.embedding_price:
+                summary["embed_cost_per_1k_queries"] = round(
+                    tokens_per_query * 1000 * args.embedding_price / 1e6, 6
+                )
+            summaries[config.spec] = summary
+    finally:
+        index.drop()
+
+    notes = []
+    if local_mode:
+        notes.append(
+            "Qdrant local mode performs exact search: hnsw_ef and quantization do not "
+            "change results or latency here, use --qdrant-url to evaluate them."
+        )
+    return {
+        "meta": metadata(args.label),
+        "config": {
+            "embedding": embedder.name,
+            "reranker": args.reranker if reranker else None,
+            "qdrant_url": args.qdrant_url,
+            "documents": len(documents),
+            "index_embed_s": round(index_embed_s, 3),
+            "repeat": args.repeat,
+        },
+        "scenarios": summaries,
+        "skipped": skipped,
+        "notes": notes,
+    }
+
+
+def format_table(summaries: Dict[str, Dict[str, Any]]) -> str:
+    """格式化评测结果表格"""
+    header = (
+        f"{'config':<28}{'recall@k':>9}{'MRR':>8}{'nDCG@k':>8}{'empty':>7}"
+        f"{'p50':>9}{'p99':>9}{'tot p50':>9}{'tot p99':>9}{'emb p50':>9}{'tok/q':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for spec, s in summaries.items():
+        lines.append(
+            f"{spec:<28}{s['recall_at_k']:>9.3f}{s['mrr']:>8.3f}{s['ndcg_at_k']:>8.3f}"
+            f"{s['empty_rate']:>7.2f}{s['p50_ms']:>9.2f}{s['p99_ms']:>9.2f}"
+            f"{s['total_p50_ms']:>9.2f}{s['total_p99_ms']:>9.2f}{s['embed_p50_ms']:>9.2f}"
+            f"{s['embed_tokens_per_query']:>7.1f}"
+        )
+    lines.append("(latencies in ms; p50/p99 = search incl. rerank, tot = embedding + search)")
+    return "\n".join(lines)
@@ -0,0 +1,85 @@
+"""
+检索评测标注集
+
+针对 app/data/knowledge_base.py 的文档，以用户口吻编写问题（不照抄原文），
+按文档标题标注相关度：2 = 直接回答该问题，1 = 部分相关。
+新增知识库文档时应同步补充问题，标题变更时需同步修改标注。
+"""
+
+labeled_queries = [
+    # 高血压
+    {"query": "血压多少算高血压？", "relevant": {"高血压诊断标准": 2}},
+    {"query": "收缩压150舒张压95属于几级高血压", "relevant": {"高血压诊断标准": 2}},
+    {"query": "正常高值血压是什么意思", "relevant": {"高血压诊断标准": 2}},
+    {
+        "query": "高血压病人每天能吃多少盐",
+        "relevant": {"高血压饮食管理": 2, "冠心病预防": 1},
+    },
+    {"query": "什么是DASH饮食", "relevant": {"高血压饮食管理": 2}},
+    {"query": "血压高应该多吃哪些含钾的食物", "relevant": {"高血压饮食管理": 2}},
+    {
+        "query": "高血压可以跑步吗，运动时要注意什么",
+        "relevant": {"高血压运动指导": 2, "糖尿病运动指导": 1},
+    },
+    {"query": "血压高能不能做俯卧撑举重这类力量训练", "relevant": {"高血压运动指导": 2}},
+    {"query": "氨氯地平有什么副作用", "relevant": {"降压药物指导": 2}},
+    {"query": "吃卡托普利一直干咳怎么办", "relevant": {"降压药物指导": 2}},
+    {"query": "血压正常了可以停降压药吗", "relevant": {"降压药物指导": 2}},
+    {"query": "高血压控制不好会引起哪些并发症", "relevant": {"高血压并发症": 2}},
+    {
+        "query": "高血压会导致中风和肾衰竭吗",
+        "relevant": {"高血压并发症": 2},
+    },
+    {
+        "query": "合并糖尿病的高血压患者血压要控制到多少",
+        "relevant": {"高血压并发症": 2, "高血压诊断标准": 1},
+    },
+    # 糖尿病
+    {"query": "空腹血糖7.2是糖尿病吗", "relevant": {"糖尿病诊断标准": 2}},
+    {"query": "糖化血红蛋白控制目标是多少", "relevant": {"糖尿病诊断标准": 2}},
+    {"query": "糖尿病前期的血糖范围", "relevant": {"糖尿病诊断标准": 2}},
+    {"query": "糖尿病人主食怎么吃，碳水占多少", "relevant": {"糖尿病饮食管理": 2}},
+    {"query": "血糖高选什么低GI食物", "relevant": {"糖尿病饮食管理": 2}},
+    {"query": "糖尿病患者每天需要多少热量", "relevant": {"糖尿病饮食管理": 2}},
+    {"query": "糖尿病患者什么时候运动最好", "relevant": {"糖尿病运动指导": 2}},
+    {
+        "query": "血糖多少的时候不适合运动",
+        "relevant": {"糖尿病运动指导": 2, "低血糖处理": 1},
+    },
+    {"query": "二甲双胍饭前吃还是饭后吃", "relevant": {"降糖药物指导": 2}},
+    {"query": "达格列净有什么副作用", "relevant": {"降糖药物指导": 2}},
+    {"query": "哪些降糖药容易引起低血糖", "relevant": {"降糖药物指导": 2, "低血糖处理": 1}},
+    {"query": "出冷汗手抖心慌可能是低血糖吗", "relevant": {"低血糖处理": 2}},
+    {"query": "低血糖了应该马上吃什么", "relevant": {"低血糖处理": 2}},
+    {"query": "家人低血糖昏迷了怎么办", "relevant": {"低血糖处理": 2}},
+    # 冠心病
+    {"query": "哪些因素会增加得冠心病的风险", "relevant": {"冠心病预防": 2}},
+    {"query": "怎样预防冠心病", "relevant": {"冠心病预防": 2, "戒烟指导": 1}},
+    {"query": "胸口压榨样疼痛向左肩放射是怎么回事", "relevant": {"心绞痛紧急处理": 2}},
+    {"query": "硝酸甘油怎么含，最多含几片", "relevant": {"心绞痛紧急处理": 2}},
+    {
+        "query": "心绞痛发作时在家能做什么急救",
+        "relevant": {"心绞痛紧急处理": 2, "冠心病预防": 1},
+    },
+    # 慢阻肺
+    {"query": "COPD有哪些症状", "relevant": {"慢阻肺管理": 2}},
+    {"query": "慢阻肺患者怎么做呼吸训练", "relevant": {"慢阻肺管理": 2}},
+    {
+        "query": "老是咳嗽咳痰气短，是慢阻肺吗",
+        "relevant": {"慢阻肺管理": 2},
+    },
+    # 通用生活方式
+    {"query": "BMI怎么算，多少算肥胖", "relevant": {"健康体重管理": 2}},
+    {"query": "一个月减多少斤比较合适", "relevant": {"健康体重管理": 2}},
+    {
+        "query": "腰围多少算腹型肥胖",
+        "relevant": {"健康体重管理": 2, "冠心病预防": 1},
+    },
+    {"query": "想戒烟有什么好方法", "relevant": {"戒烟指导": 2}},
+    {"query": "戒烟以后多久冠心病风险会降低", "relevant": {"戒烟指导": 2, "冠心病预防": 1}},
+    {"query": "尼古丁贴片有用吗", "relevant": {"戒烟指导": 2}},
+    {"query": "晚上睡不着怎么办", "relevant": {"睡眠健康指导": 2}},
+    {"query": "成年人每天睡几个小时合适", "relevant": {"睡眠健康指导": 2}},
+    {"query": "长期熬夜对血压血糖有影响吗", "relevant": {"睡眠健康指导": 2}},
+    {"query": "睡前喝酒能帮助睡眠吗", "relevant": {"睡眠健康指导": 2}},
+]
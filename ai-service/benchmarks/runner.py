@@ -0,0 +1,259 @@
+"""
+基准测试执行
+
+- configure_environment: 在导入 app 之前设置环境变量，指向本地替身
+- run: 按场景和并发度执行闭环压测（每个 worker 完成一次操作后立即发起下一次）
+- save_results: 结果按 时间-提交 保存为 JSON，供 compare 比较不同提交
+"""
+
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_llm import FakeLLMConfig, create_fake_llm_app
+from benchmarks.stats import ScenarioResult
+
+IN_PROCESS = "in-process"
+# 进程内模式下替身的地址（请求经 ASGITransport 直接交给替身应用，不走网络）
+IN_PROCESS_URL = "http://fake-llm/v1"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def configure_environment(args) -> None:
+    """
+    设置被测服务的配置（必须在导入 app 之前调用）
+
+    Args:
+        args: 命令行参数
+    """
+    llm_url = IN_PROCESS_URL if args.llm == IN_PROCESS else args.llm.rstrip("/")
+    os.environ.update(
+        {
+            "DEEPSEEK_API_KEY": os.environ.get("DEEPSEEK_API_KEY", "benchmark"),
+            "DEEPSEEK_BASE_URL": llm_url,
+            "EMBEDDING_PROVIDER": "openai",
+            "EMBEDDING_BASE_URL": llm_url,
+            "EMBEDDING_API_KEY": "benchmark",
+            "EMBEDDING_DIMENSION": str(args.dimension),
+            "QDRANT_URL": args.qdrant_url,
+            "QDRANT_COLLECTION": "benchmark_knowledge",
+            "MONGODB_URL": args.mongodb_url,
+            "MONGODB_DB_NAME": "health_benchmark",
+            "MONGODB_SERVER_SELECTION_TIMEOUT_MS": "2000",
+            "REDIS_HOST": args.redis_host,
+            "REDIS_PORT": str(args.redis_port),
+            "REDIS_PASSWORD": args.redis_password,
+            "REDIS_DB": str(args.redis_db),
+        }
+    )
+
+
+def install_in_process_llm(config: FakeLLMConfig) -> None:
+    """让 DeepSeek 和 Embedding 客户端把请求直接交给进程内替身"""
+    from app.services import get_deepseek_client, get_embedding_service
+
+    http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_fake_llm_app(config)), timeout=60
+    )
+    for service in (get_deepseek_client(), get_embedding_service()):
+        service.client = service.client.copy(http_client=http_client)
+
+
+async def check_stores() -> Dict[str, Optional[str]]:
+    """
+    检查 MongoDB 和 Redis 是否可用
+
+    Returns:
+        存储名称 -> 不可用原因（可用时为 None）
+    """
+    from app.services import article_service
+
+    status: Dict[str, Optional[str]] = {}
+    try:
+        await article_service.mongo_client.admin.command("ping")
+        status["mongo"] = None
+    except Exception as e:
+        status["mongo"] = f"{type(e).__name__}: {e}"
+    try:
+        await article_service.redis.ping()
+        status["redis"] = None
+    except Exception as e:
+        status["redis"] = f"{type(e).__name__}: {e}"
+    return status
+
+
+async def _drive(
+    scenario,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    result: Optional[ScenarioResult],
+    seed: int,
+) -> None:
+    """并发执行场景，result 为 None 时为预热，不记录结果"""
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker(index: int) -> None:
+        nonlocal issued
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            start_time = time.perf_counter()
+            try:
+                first_token = await scenario.run_once(index, rng)
+            except Exception as e:
+                if result is not None:
+                    result.record_error(e)
+                continue
+            if result is not None:
+                result.latencies.append(time.perf_counter() - start_time)
+                if first_token is not None:
+                    result.first_token_latencies.append(first_token)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    if result is not None:
+        result.elapsed = time.perf_counter() - start_time
+
+
+async def run(args, fake_llm: FakeLLMConfig) -> Dict[str, Any]:
+    """
+    执行基准测试
+
+    Args:
+        args: 命令行参数
+        fake_llm: 替身服务配置（进程内模式使用）
+
+    Returns:
+        结果文件内容
+    """
+    from app.services import article_service, close_http_client
+    from benchmarks.scenarios import SCENARIOS
+
+    if args.llm == IN_PROCESS:
+        install_in_process_llm(fake_llm)
+
+    names: List[str] = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    stores = await check_stores()
+    summaries: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+    options = {
+        "corpus_size": args.corpus_size,
+        "articles": args.articles,
+        "ingest_batch": args.ingest_batch,
+    }
+
+    try:
+        for name in names:
+            scenario = SCENARIOS[name](options)
+            missing = {store: stores[store] for store in scenario.requires if stores[store]}
+            if missing:
+                skipped[name] = "; ".join(f"{k} unavailable ({v})" for k, v in missing.items())
+                print(f"[skip] {name}: {skipped[name]}", file=sys.stderr)
+                continue
+
+            await scenario.setup()
+            for seed, concurrency in enumerate(args.concurrency):
+                key = f"{name}@c{concurrency}"
+                print(f"[run] {key}", file=sys.stderr)
+                if args.warmup:
+                    await _drive(scenario, concurrency, args.warmup, None, None, seed)
+                result = ScenarioResult(name, concurrency)
+                await _drive(scenario, concurrency, args.duration, args.requests, result, seed)
+                summaries[key] = result.summary()
+    finally:
+        await article_service.close()
+        await close_http_client()
+
+    return {
+        "meta": metadata(args.label),
+        "config": {
+            "llm": args.llm,
+            "fake_llm": fake_llm.to_dict() if args.llm == IN_PROCESS else None,
+            "qdrant_url": args.qdrant_url,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "max_requests": args.requests,
+            **options,
+        },
+        "scenarios": summaries,
+        "skipped": skipped,
+    }
+
+
+def _git(*command: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *command],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def metadata(label: Optional[str]) -> Dict[str, Any]:
+    return {
+        "label": label,
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        # 只看 ai-service 目录，结果文件本身不算改动
+        "dirty": bool(_git("status", "--porcelain", "--", ".", ":!benchmarks/results")),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(results: Dict[str, Any], output: Optional[str] = None, prefix: str = "") -> Path:
+    """
+    保存结果
+
+    Args:
+        results: 结果文件内容
+        output: 输出路径，默认 benchmarks/results/<前缀><时间>-<提交>.json
+        prefix: 默认文件名前缀，区分不同类型的结果
+
+    Returns:
+        文件路径
+    """
+    if output:
+        path = Path(output)
+    else:
+        meta = results["meta"]
+        stamp = datetime.fromisoformat(meta["timestamp"]).strftime("%Y%m%d-%H%M%S")
+        suffix = "-dirty" if meta["dirty"] else ""
+        path = RESULTS_DIR / f"{prefix}{stamp}-{meta['commit']}{suffix}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n")
+    return path
+
+
+def format_table(summaries: Dict[str, Dict[str, Any]]) -> str:
+    """格式化结果表格"""
+    header = f"{'scenario':<20}{'reqs':>8}{'err':>6}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+    lines = [header, "-" * len(header)]
+    for key, s in summaries.items():
+        lines.append(
+            f"{key:<20}{s['requests']:>8}{s['errors']:>6}{s['throughput_rps']:>10.1f}"
+            f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}"
+        )
+    lines.append("(latencies in ms)")
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+"""
+基准测试场景
+
+每个场景直接调用服务层（与 API 路由调用的是同一套服务），不经过 HTTP 和鉴权，
+测量的是业务链路本身的吞吐和延迟。
+
+注意：本模块导入时即会初始化 app.services，必须在 runner.configure_environment() 之后导入。
+"""
+
+import random
+import time
+import uuid
+from typing import Dict, Optional, Set, Tuple, Type
+
+from app.models import Article
+from app.services import (
+    article_service,
+    get_agent_service,
+    get_deepseek_client,
+    rag_service,
+)
+
+from benchmarks import corpus
+
+
+class Scenario:
+    """场景基类"""
+
+    name = ""
+    # 依赖的外部存储（mongo / redis），不可用时跳过该场景
+    requires: Set[str] = set()
+
+    def __init__(self, options: Dict):
+        self.options = options
+
+    async def setup(self) -> None:
+        """准备数据（不计入结果）"""
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        """
+        执行一次操作
+
+        Args:
+            worker: 并发 worker 编号
+            rng: 该 worker 的随机数生成器
+
+        Returns:
+            流式场景返回首 token 延迟（秒），其他场景返回 None
+        """
+        raise NotImplementedError
+
+
+async def seed_knowledge_base(options: Dict) -> None:
+    """初始化基准测试用知识库（重建 collection 并写入文档）"""
+    await rag_service.initialize(force=True)
+    documents = corpus.knowledge_documents(options["corpus_size"])
+    await rag_service.add_documents_batch(documents)
+
+
+class ChatScenario(Scenario):
+    """完整的 AI 对话：意图识别、会话上下文、RAG、生成、持久化"""
+
+    name = "chat"
+    requires = {"mongo", "redis"}
+    # 每个 worker 的会话轮数达到该值后开启新会话，上下文长度保持稳定
+    turns_per_session = 10
+
+    async def setup(self) -> None:
+        await seed_knowledge_base(self.options)
+        self.agent = get_agent_service()
+        self.sessions: Dict[int, Tuple[str, int]] = {}
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        session_id, turns = self.sessions.get(worker, ("", 0))
+        if turns >= self.turns_per_session:
+            session_id, turns = "", 0
+        response = await self.agent.chat(
+            user_id=f"bench-user-{worker}",
+            session_id=session_id,
+            message=corpus.query(rng),
+        )
+        self.sessions[worker] = (response["session_id"], turns + 1)
+        return None
+
+
+class LLMStreamScenario(Scenario):
+    """DeepSeek 流式生成（记录首 token 延迟）"""
+
+    name = "llm_stream"
+
+    async def setup(self) -> None:
+        self.deepseek = get_deepseek_client()
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        start_time = time.perf_counter()
+        first_token = None
+        async for _ in self.deepseek.chat_stream(
+            messages=[{"role": "user", "content": corpus.query(rng)}]
+        ):
+            if first_token is None:
+                first_token = time.perf_counter() - start_time
+        return first_token
+
+
+class RAGQueryScenario(Scenario):
+    """文本检索：Embedding + 向量检索"""
+
+    name = "rag_query"
+
+    async def setup(self) -> None:
+        await seed_knowledge_base(self.options)
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        # 附加随机编号，避免 Embedding 内存缓存命中
+        await rag_service.search_by_text(f"{corpus.query(rng)} #{rng.getrandbits(32)}")
+        return None
+
+
+class SearchScenario(Scenario):
+    """纯向量检索（查询向量预先计算）"""
+
+    name = "search"
+
+    async def setup(self) -> None:
+        await seed_knowledge_base(self.options)
+        rng = random.Random(0)
+        texts = [corpus.query(rng) for _ in range(64)]
+        self.vectors = await rag_service.embedding.embed_texts(texts)
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        await rag_service.search(rng.choice(self.vectors))
+        return None
+
+
+class IngestScenario(Scenario):
+    """知识库批量写入：批量 Embedding + upsert"""
+
+    name = "ingest"
+
+    async def setup(self) -> None:
+        await rag_service.initialize(force=True)
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        batch = self.options["ingest_batch"]
+        documents = [
+            {"content": f"{doc['content']} {uuid.uuid4().hex}", "metadata": doc["metadata"]}
+            for doc in corpus.knowledge_documents(batch, seed=rng.getrandbits(32))
+        ]
+        await rag_service.add_documents_batch(documents)
+        return None
+
+
+class ArticleReadScenario(Scenario):
+    """科普文章读取：80% 文章详情，20% 分类列表前几页"""
+
+    name = "article_read"
+    requires = {"mongo", "redis"}
+
+    async def setup(self) -> None:
+        self.articles = corpus.articles(self.options["articles"])
+        for fields in self.articles:
+            await article_service.save_article(Article(**fields))
+        await article_service.warm_listings()
+
+    async def run_once(self, worker: int, rng: random.Random) -> Optional[float]:
+        if rng.random() < 0.8:
+            article = rng.choice(self.articles)
+            await article_service.get_article(article["id"], viewer_id=f"bench-{worker}")
+        else:
+            await article_service.get_articles(
+                category=rng.choice(corpus.CATEGORIES), page=rng.randint(1, 3)
+            )
+        return None
+
+
+SCENARIOS: Dict[str, Type[Scenario]] = {
+    scenario.name: scenario
+    for scenario in (
+        ChatScenario,
+        LLMStreamScenario,
+        RAGQueryScenario,
+        SearchScenario,
+        IngestScenario,
+        ArticleReadScenario,
+    )
+}
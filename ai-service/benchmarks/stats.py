@@ -0,0 +1,134 @@
+"""
+基准测试统计与结果比较
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    分位数（线性插值）
+
+    Args:
+        sorted_values: 升序排列的样本
+        q: 分位（0-100）
+
+    Returns:
+        分位数，没有样本时返回 0
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+@dataclass
+class ScenarioResult:
+    """单个场景的原始样本"""
+
+    name: str
+    concurrency: int
+    latencies: List[float] = field(default_factory=list)
+    # 流式场景的首 token 延迟
+    first_token_latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def record_error(self, error: BaseException) -> None:
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总为吞吐量和延迟分位数（毫秒）
+
+        Returns:
+            汇总结果
+        """
+        latencies = sorted(self.latencies)
+        error_count = sum(self.errors.values())
+        total = len(latencies) + error_count
+        summary: Dict[str, Any] = {
+            "concurrency": self.concurrency,
+            "requests": total,
+            "errors": error_count,
+            "error_types": dict(self.errors),
+            "error_rate": round(error_count / total, 4) if total else 0.0,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(len(latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+        for q in PERCENTILES:
+            summary[f"p{q}_ms"] = round(percentile(latencies, q) * 1000, 2)
+        if self.first_token_latencies:
+            first_token = sorted(self.first_token_latencies)
+            for q in PERCENTILES:
+                summary[f"ttft_p{q}_ms"] = round(percentile(first_token, q) * 1000, 2)
+        return summary
+
+
+# 比较的指标 -> 数值越大越好
+COMPARED_METRICS: Dict[str, bool] = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "ttft_p95_ms": False,
+    "error_rate": False,
+    # 检索评测
+    "recall_at_k": True,
+    "mrr": True,
+    "ndcg_at_k": True,
+}
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    比较两次基准测试结果
+
+    Args:
+        baseline: 基线结果文件内容
+        current: 当前结果文件内容
+        threshold: 回归阈值（百分比），变差超过该比例视为回归
+
+    Returns:
+        (各场景各指标的对比行, 回归描述列表)
+    """
+    rows: List[Dict[str, Any]] = []
+    regressions: List[str] = []
+    for name, after in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in before or metric not in after:
+                continue
+            old, new = before[metric], after[metric]
+            if old:
+                change = (new - old) / old * 100
+            else:
+                change = 0.0 if not new else math.inf
+            worse = -change if higher_is_better else change
+            # 错误率按绝对值比较，从 0 变为非 0 即回归
+            regressed = worse > threshold if metric != "error_rate" else new > old
+            rows.append(
+                {
+                    "scenario": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change_pct": round(change, 2),
+                    "regressed": regressed,
+                }
+            )
+            if regressed:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1f}%)")
+    return rows, regressions
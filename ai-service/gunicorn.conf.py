@@ -0,0 +1,35 @@
+"""
+Gunicorn 配置（多 worker 部署）
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus gunicorn -c gunicorn.conf.py app.main:app
+
+设置 PROMETHEUS_MULTIPROC_DIR 时启用多进程指标模式：master 启动时清空指标目录，
+worker 退出（包括崩溃）后删除其实时仪表文件。
+"""
+
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8001')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+# 停机时 worker 排空请求、刷写缓冲数据的时间，
+# 须大于 SHUTDOWN_DRAIN_DELAY_SECONDS 与 SHUTDOWN_DRAIN_TIMEOUT_SECONDS 之和
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+
+
+def on_starting(server):
+    """清空上次运行遗留的指标文件"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """worker 退出后删除其实时仪表文件"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # master 进程不导入应用模块，直接使用 prometheus_client
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,89 @@
+"""
+会话消息分桶迁移脚本
+
+将 conversations 中内嵌 messages 数组的旧会话迁移为分桶存储：
+1. 按 CONVERSATION_BUCKET_SIZE 切分消息，写入 conversation_messages（只写入不存在的桶）
+2. 会话头写入 message_count、last_message，并移除内嵌 messages 数组
+
+脚本可重复执行：已迁移的会话不含 messages 字段，不会被再次处理；
+add_message 遇到尚未迁移的会话时会先就地迁移，与脚本并发执行不会覆盖之后追加的消息。
+
+用法：
+    python scripts/migrate_conversation_buckets.py [--dry-run] [--batch-size 100]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 添加 ai-service 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services.conversation_service import (  # noqa: E402
+    build_buckets,
+    conversation_service,
+    migrate_embedded_messages,
+)
+from app.services.mongo_indexes import ensure_indexes  # noqa: E402
+
+
+async def migrate(dry_run: bool = False, batch_size: int = 100) -> int:
+    """
+    迁移所有内嵌 messages 数组的会话
+
+    Args:
+        dry_run: 只统计不写入
+        batch_size: 游标批大小
+
+    Returns:
+        迁移的会话数量
+    """
+    await ensure_indexes(conversation_service.db)
+
+    conversations = conversation_service.collection
+    buckets_collection = conversation_service.messages_collection
+    bucket_size = settings.conversation_bucket_size
+
+    migrated = 0
+    cursor = conversations.find({"messages": {"$exists": True}}).batch_size(batch_size)
+    async for doc in cursor:
+        messages = doc.get("messages") or []
+        buckets = build_buckets(
+            doc["id"], messages, bucket_size, doc.get("updated_at") or datetime.now()
+        )
+
+        if dry_run:
+            logger.info(
+                f"[dry-run] {doc['id']}: {len(messages)} messages -> {len(buckets)} buckets"
+            )
+            migrated += 1
+            continue
+
+        if not await migrate_embedded_messages(conversations, buckets_collection, doc, bucket_size):
+            # 已被 add_message 就地迁移
+            continue
+        migrated += 1
+
+        if migrated % 100 == 0:
+            logger.info(f"Migrated {migrated} conversations...")
+
+    logger.info(f"Migration finished: {migrated} conversations{' (dry-run)' if dry_run else ''}")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="迁移会话消息为分桶存储")
+    parser.add_argument("--dry-run", action="store_true", help="只统计不写入")
+    parser.add_argument("--batch-size", type=int, default=100, help="游标批大小")
+    args = parser.parse_args()
+
+    asyncio.run(migrate(dry_run=args.dry_run, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
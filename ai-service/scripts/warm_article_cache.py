@@ -0,0 +1,37 @@
+"""
+文章列表缓存预热脚本
+
+直接写入 MongoDB 导入或修改文章后执行：递增列表缓存版本号（旧缓存立即失效），
+并为全部文章和每个分类重新构建前 K 页。
+
+用法：
+    python scripts/warm_article_cache.py [--page-size 20]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加 ai-service 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.article_service import article_service  # noqa: E402
+
+
+async def warm(page_size: int) -> int:
+    """使旧列表缓存失效并重新预热"""
+    await article_service.listings.invalidate()
+    return await article_service.warm_listings(page_size=page_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预热文章列表缓存")
+    parser.add_argument("--page-size", type=int, default=20, help="每页数量")
+    args = parser.parse_args()
+
+    asyncio.run(warm(args.page_size))
+
+
+if __name__ == "__main__":
+    main()
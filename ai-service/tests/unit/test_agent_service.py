@@ -0,0 +1,35 @@
+"""
+Test Agent Service
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.services.agent_service import AgentService
+from app.services.intent_service import IntentType
+
+
+@pytest.fixture
+def agent():
+    """Agent 服务fixture（生成回答替换为固定内容）"""
+    service = AgentService()
+    service._generate_response = AsyncMock(return_value={"content": "回答"})
+    return service
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "intent, patient_context, cached",
+    [
+        (IntentType.DIET_ADVICE, None, True),
+        (IntentType.DIET_ADVICE, {"age": 60}, False),
+        # 健康咨询的回答基于对话历史和摘要，不能跨用户共用
+        (IntentType.HEALTH_CONSULTATION, None, False),
+    ],
+)
+async def test_only_non_personalized_answers_are_cached(agent, intent, patient_context, cached):
+    with patch("app.services.agent_service.get_cache_manager") as cache:
+        cache.return_value.set = AsyncMock()
+        response, degraded = await agent._respond(intent, "高血压吃什么", [], True, patient_context, None)
+
+    assert (response["content"], degraded) == ("回答", False)
+    assert cache.return_value.set.called is cached
@@ -4,6 +4,7 @@ Test Article Service
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from app.models import Article
 from app.services.article_service import ArticleService
 
 
@@ -12,7 +13,7 @@ def article_service():
     """文章服务fixture"""
     with (
         patch("app.services.article_service.AsyncIOMotorClient"),
-        patch("app.services.article_service.aioredis"),
+        patch("app.services.article_service.InstrumentedRedis"),
     ):
         service = ArticleService()
         service.articles_collection = MagicMock()
@@ -20,13 +21,19 @@ def article_service():
         service.redis = MagicMock()
         service.redis.get = AsyncMock(return_value=None)
         service.redis.setex = AsyncMock()
+        service.redis.delete = AsyncMock()
+        service.redis.mget = AsyncMock(side_effect=lambda keys: [None] * len(keys))
+        service.redis.pipeline.return_value.execute = AsyncMock()
+        service.listings.redis = service.redis
+        service.views = MagicMock()
+        service.views.record_view = AsyncMock(return_value=(1, None))
         return service
 
 
 @pytest.mark.asyncio
 async def test_get_articles(article_service):
     """测试获取文章列表"""
-    article_service.articles_collection.count_documents = AsyncMock(return_value=10)
+    article_service.articles_collection.estimated_document_count = AsyncMock(return_value=10)
 
     mock_cursor = MagicMock()
     mock_cursor.sort.return_value = mock_cursor
@@ -48,11 +55,14 @@ async def test_get_articles(article_service):
     mock_cursor.__aiter__ = lambda self: mock_async_iter(self)
     article_service.articles_collection.find = MagicMock(return_value=mock_cursor)
 
-    articles, total = await article_service.get_articles(page=1, page_size=20)
+    articles, total, next_cursor = await article_service.get_articles(page=1, page_size=20)
 
     assert total == 10
     assert len(articles) > 0
     assert articles[0].title == "测试文章"
+    assert next_cursor is None
+    mock_cursor.limit.assert_called_once_with(21)
+    mock_cursor.skip.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -70,13 +80,16 @@ async def test_get_article(article_service):
     }
     article_service.articles_collection.find_one = AsyncMock(return_value=mock_doc)
     article_service.articles_collection.update_one = AsyncMock()
+    article_service.views.record_view = AsyncMock(return_value=(3, 2))
 
-    article = await article_service.get_article("article1")
+    article = await article_service.get_article("article1", viewer_id="user:u1")
 
     assert article is not None
     assert article.title == "测试文章"
-    assert article.views == 11  # 浏览量+1
-    article_service.articles_collection.update_one.assert_called_once()
+    assert article.views == 13  # 已落库 10 + 待落库 3
+    assert article.unique_views == 2
+    article_service.views.record_view.assert_awaited_once_with("article1", "user:u1")
+    article_service.articles_collection.update_one.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -141,8 +154,148 @@ async def test_get_user_favorites(article_service):
 
     article_service.favorites_collection.count_documents = AsyncMock(return_value=1)
 
-    articles, total = await article_service.get_user_favorites("user123")
+    articles, total, _ = await article_service.get_user_favorites("user123")
 
     assert total == 1
     assert len(articles) > 0
     assert articles[0].title == "收藏的文章"
+
+
+def _article(article_id: str) -> dict:
+    return {
+        "id": article_id,
+        "title": f"文章{article_id}",
+        "content": "内容",
+        "category": "健康",
+        "tags": [],
+        "author": "作者",
+        "views": 0,
+        "created_at": "2024-01-01T00:00:00",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_articles_by_ids_keeps_order_and_backfills(article_service):
+    """测试批量获取：缓存命中的不查库，未命中的一次 $in 查询并回填，结果保持传入顺序"""
+    cached = Article(**_article("a2")).model_dump_json()
+    article_service.redis.mget = AsyncMock(
+        return_value=[None, cached, None, None] + [None, "5", None, None]
+    )
+
+    mock_cursor = MagicMock()
+
+    async def mock_iter(self):
+        # $in 查询结果不保证顺序，a4 已被删除
+        yield _article("a3")
+        yield _article("a1")
+
+    mock_cursor.__aiter__ = lambda self: mock_iter(self)
+    article_service.articles_collection.find = MagicMock(return_value=mock_cursor)
+
+    articles = await article_service.get_articles_by_ids(["a1", "a2", "a3", "a4"])
+
+    assert [a.id for a in articles] == ["a1", "a2", "a3"]
+    assert [a.views for a in articles] == [0, 5, 0]
+    article_service.articles_collection.find.assert_called_once_with(
+        {"id": {"$in": ["a1", "a3", "a4"]}}
+    )
+    pipe = article_service.redis.pipeline.return_value
+    assert sorted(c.args[0] for c in pipe.setex.call_args_list) == ["article:a1", "article:a3"]
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_articles_by_ids_all_cached(article_service):
+    """测试全部命中缓存时只访问一次 Redis"""
+    article_service.redis.mget = AsyncMock(
+        return_value=[Article(**_article(i)).model_dump_json() for i in ("a1", "a2")] + [None, None]
+    )
+    article_service.articles_collection.find = MagicMock()
+
+    articles = await article_service.get_articles_by_ids(["a1", "a2"])
+
+    assert [a.id for a in articles] == ["a1", "a2"]
+    article_service.articles_collection.find.assert_not_called()
+
+
+def _id_cursor(ids):
+    mock_cursor = MagicMock()
+    mock_cursor.sort.return_value = mock_cursor
+    mock_cursor.skip.return_value = mock_cursor
+    mock_cursor.limit.return_value = mock_cursor
+
+    async def mock_iter(self):
+        for i, article_id in enumerate(ids):
+            yield {"id": article_id, "created_at": f"2024-01-{20 - i:02d}T00:00:00"}
+
+    mock_cursor.__aiter__ = lambda self: mock_iter(self)
+    return mock_cursor
+
+
+@pytest.mark.asyncio
+async def test_get_articles_served_from_listing_cache(article_service):
+    """测试前 K 页命中列表缓存时不查询 MongoDB"""
+    listing = '{"ids": ["a2", "a1"], "next_cursor": "c2", "total": 7}'
+    article_service.redis.get = AsyncMock(side_effect=["3", listing])
+    article_service.redis.mget = AsyncMock(
+        return_value=[Article(**_article(i)).model_dump_json() for i in ("a2", "a1")] + [None] * 2
+    )
+    article_service.articles_collection.find = MagicMock()
+
+    articles, total, next_cursor = await article_service.get_articles(category="健康", page=2)
+
+    assert [a.id for a in articles] == ["a2", "a1"]
+    assert (total, next_cursor) == (7, "c2")
+    assert article_service.redis.get.call_args_list[1].args[0] == "articles:list:v3:健康:2:20"
+    article_service.articles_collection.find.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_articles_miss_populates_listing_cache(article_service):
+    """测试列表缓存未命中时查询 MongoDB 并按读取时的版本号写入缓存"""
+    article_service.redis.get = AsyncMock(side_effect=["3", None, "5"])
+    article_service.articles_collection.find = MagicMock(return_value=_id_cursor(["a1"]))
+    article_service.articles_collection.count_documents = AsyncMock(return_value=1)
+    article_service.get_articles_by_ids = AsyncMock(return_value=[])
+
+    await article_service.get_articles(category="健康")
+
+    article_service.get_articles_by_ids.assert_awaited_once_with(["a1"])
+
+    keys = [c.args[0] for c in article_service.redis.setex.call_args_list]
+    assert "articles:list:v3:健康:1:20" in keys
+
+
+@pytest.mark.asyncio
+async def test_save_article_invalidates_listings(article_service):
+    """测试写入文章后递增列表版本号、删除相关缓存并重新预热"""
+    article_service.articles_collection.find_one_and_replace = AsyncMock(
+        return_value={"category": "旧分类"}
+    )
+    article_service.redis.incr = AsyncMock(return_value=4)
+    article_service.schedule_warm = MagicMock()
+
+    await article_service.save_article(Article(**_article("a1")))
+
+    deleted = article_service.redis.delete.call_args.args
+    assert deleted[0] == "article:a1"
+    assert set(deleted[1:]) == {"articles:count:健康", "articles:count:旧分类"}
+    article_service.redis.incr.assert_awaited_once_with("articles:list:version")
+    article_service.schedule_warm.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_warm_listings_reads_version_without_cache_lookup(article_service):
+    """测试预热直接读取版本号，不查询列表缓存（不产生命中/未命中指标）"""
+    article_service.redis.get = AsyncMock(return_value="7")
+    article_service.articles_collection.distinct = AsyncMock(return_value=[])
+    article_service._count_articles = AsyncMock(return_value=1)
+    article_service._list_article_ids = AsyncMock(return_value=(["a1"], None))
+    article_service.get_articles_by_ids = AsyncMock()
+
+    with patch("app.services.article_listing_cache.get_metrics_service") as metrics:
+        assert await article_service.warm_listings() == 1
+
+    article_service.redis.get.assert_awaited_once_with("articles:list:version")
+    metrics.return_value.record_cache_miss.assert_not_called()
+    assert article_service.redis.setex.call_args.args[0] == "articles:list:v7:*:1:20"
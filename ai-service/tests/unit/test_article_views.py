@@ -0,0 +1,63 @@
+"""
+Test Article View Counter
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.article_views import DIRTY_KEY, ArticleViewCounter
+
+
+@pytest.fixture
+def counter():
+    """浏览量计数器fixture"""
+    redis = MagicMock()
+    redis.pipeline.return_value.execute = AsyncMock()
+    redis.eval = AsyncMock()
+    collection = MagicMock()
+    collection.bulk_write = AsyncMock()
+    return ArticleViewCounter(redis, collection)
+
+
+@pytest.mark.asyncio
+async def test_record_view_only_touches_redis(counter):
+    """测试记录浏览只写 Redis：INCR 增量、标记 dirty、PFADD 访客"""
+    pipe = counter.redis.pipeline.return_value
+    pipe.execute = AsyncMock(return_value=[4, 0, 1, 3])
+
+    pending, unique = await counter.record_view("a1", "user:u1")
+
+    assert (pending, unique) == (4, 3)
+    pipe.incr.assert_called_once_with("article:a1:views")
+    pipe.sadd.assert_called_once_with(DIRTY_KEY, "a1")
+    pipe.pfadd.assert_called_once_with("article:a1:viewers", "user:u1")
+    counter.collection.bulk_write.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_flush_batches_increments(counter):
+    """测试刷写：一次 bulk_write 累加增量，并原地更新缓存的文章文档"""
+    counter.redis.spop = AsyncMock(return_value=["a1", "a2", "a3"])
+    counter.redis.pipeline.return_value.execute = AsyncMock(return_value=["5", 4, None, 0, "2", 0])
+
+    assert await counter.flush() == 3
+
+    operations = counter.collection.bulk_write.call_args.args[0]
+    assert [op._filter for op in operations] == [{"id": "a1"}, {"id": "a3"}]
+    assert operations[0]._doc == {"$inc": {"views": 5}, "$max": {"unique_views": 4}}
+    assert operations[1]._doc == {"$inc": {"views": 2}}
+    assert counter.redis.eval.call_args.args[1:] == (2, "article:a1", "article:a3", 5, 2)
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_restores_increments(counter):
+    """测试写入 MongoDB 失败时把增量放回 Redis"""
+    counter.redis.spop = AsyncMock(return_value=["a1"])
+    pipe = counter.redis.pipeline.return_value
+    pipe.execute = AsyncMock(return_value=["7", 0])
+    counter.collection.bulk_write = AsyncMock(side_effect=ConnectionError("down"))
+
+    with pytest.raises(ConnectionError):
+        await counter.flush()
+
+    pipe.incrby.assert_called_once_with("article:a1:views", 7)
+    counter.redis.eval.assert_not_called()
@@ -0,0 +1,128 @@
+"""
+Test Benchmarks
+"""
+
+import random
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from benchmarks.fake_llm import FakeLLMConfig, LatencyModel, create_fake_llm_app
+from benchmarks.retrieval_eval import (
+    RetrievalConfig,
+    evaluate,
+    ndcg_at_k,
+    recall_at_k,
+    reciprocal_rank,
+)
+from benchmarks.stats import ScenarioResult, compare, percentile
+
+
+def test_latency_model_parse_and_sample():
+    rng = random.Random(0)
+    assert LatencyModel.parse("constant:200").sample(rng) == 0.2
+    assert 0.1 <= LatencyModel.parse("uniform:100:300").sample(rng) <= 0.3
+
+    samples = sorted(LatencyModel.parse("lognormal:100:1000").sample(rng) for _ in range(5000))
+    assert percentile(samples, 50) == pytest.approx(0.1, rel=0.1)
+    assert percentile(samples, 99) == pytest.approx(1.0, rel=0.25)
+
+    for spec in ("gaussian:1", "uniform:3:1", "lognormal:500:100", "constant:x"):
+        with pytest.raises(ValueError):
+            LatencyModel.parse(spec)
+
+
+def test_summary_and_compare():
+    result = ScenarioResult("search", concurrency=2, latencies=[i / 1000 for i in range(1, 101)])
+    result.record_error(TimeoutError())
+    result.elapsed = 2.0
+    summary = result.summary()
+    assert summary["requests"] == 101
+    assert summary["throughput_rps"] == 50.0
+    assert summary["p50_ms"] == 50.5
+    assert summary["error_types"] == {"TimeoutError": 1}
+
+    baseline = {"scenarios": {"search@c2": summary}}
+    slower = dict(summary, p95_ms=summary["p95_ms"] * 1.5, throughput_rps=49.0)
+    rows, regressions = compare(baseline, {"scenarios": {"search@c2": slower}}, threshold=10)
+    assert [r for r in regressions if r.startswith("search@c2.p95_ms")]
+    # 吞吐下降 2% 未超过阈值
+    assert not [r for r in regressions if "throughput" in r]
+    assert {row["metric"] for row in rows} >= {"throughput_rps", "p99_ms", "error_rate"}
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_serves_openai_sdk():
+    config = FakeLLMConfig(
+        chat_latency=LatencyModel.parse("constant:0"),
+        embedding_latency=LatencyModel.parse("constant:0"),
+        completion_tokens=5,
+        dimension=8,
+    )
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_fake_llm_app(config)))
+    client = AsyncOpenAI(api_key="test", base_url="http://fake/v1", http_client=http_client)
+
+    response = await client.chat.completions.create(
+        model="deepseek-chat", messages=[{"role": "user", "content": "你好"}]
+    )
+    assert len(response.choices[0].message.content) == 5
+    assert response.usage.completion_tokens == 5
+
+    stream = await client.chat.completions.create(
+        model="deepseek-chat",
+        messages=[{"role": "user", "content": "你好"}],
+        stream=True,
+        extra_body={"stream_options": {"include_usage": True}},
+    )
+    chunks = [chunk async for chunk in stream]
+    assert "".join(c.choices[0].delta.content or "" for c in chunks if c.choices) == (
+        response.choices[0].message.content
+    )
+    assert chunks[-1].usage["completion_tokens"] == 5
+
+    embeddings = await client.embeddings.create(model="embedding", input=["高血压饮食", "高血压饮食", "运动"])
+    first, same, other = (item.embedding for item in embeddings.data)
+    assert len(first) == 8
+    assert first == same
+    assert first != other
+    await http_client.aclose()
+
+
+def test_retrieval_metrics_and_config_parse():
+    relevant = {"a": 2, "b": 1}
+    assert recall_at_k(["x", "b", "a"], relevant, k=2) == 0.5
+    assert reciprocal_rank(["x", "b", "a"], relevant, k=3) == 0.5
+    assert ndcg_at_k(["a", "b"], relevant, k=2) == pytest.approx(1.0)
+    assert ndcg_at_k(["b", "a"], relevant, k=2) < 1.0
+    assert ndcg_at_k([], relevant, k=2) == 0.0
+
+    config = RetrievalConfig.parse("quantized:rescore=false,threshold=0.5")
+    assert (config.kind, config.rescore, config.threshold) == ("quantized", False, 0.5)
+    for spec in ("sparse", "dense:hnsw_ef=x", "dense:unknown=1"):
+        with pytest.raises(ValueError):
+            RetrievalConfig.parse(spec)
+
+
+@pytest.mark.asyncio
+async def test_retrieval_eval_runs_on_local_qdrant():
+    args = SimpleNamespace(
+        k=3,
+        configs="dense,dense:threshold=0.99,hybrid",
+        embedding="hashing",
+        reranker=None,
+        qdrant_url=":memory:",
+        repeat=1,
+        embedding_price=0.02,
+        label=None,
+    )
+    results = await evaluate(args)
+
+    dense = results["scenarios"]["dense"]
+    assert dense["queries"] > 0
+    assert 0 < dense["recall_at_k"] <= 1
+    assert dense["embed_cost_per_1k_queries"] > 0
+    assert results["scenarios"]["dense:threshold=0.99"]["empty_rate"] == 1.0
+    assert results["scenarios"]["hybrid"]["ndcg_at_k"] > 0
+    assert results["notes"]
@@ -0,0 +1,130 @@
+"""
+Test Circuit Breaker
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+@pytest.fixture
+def breaker():
+    """熔断器fixture"""
+    return CircuitBreaker(
+        "test",
+        window_size=4,
+        min_calls=4,
+        failure_rate=0.5,
+        open_seconds=60,
+        half_open_max_calls=1,
+    )
+
+
+def test_opens_when_failure_rate_exceeded(breaker):
+    """测试失败率达到阈值后熔断"""
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is False
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(breaker):
+    """测试熔断期间不调用依赖"""
+    for _ in range(4):
+        breaker.record_failure()
+    func = AsyncMock(return_value="ok")
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(func)
+
+    func.assert_not_called()
+    assert breaker.get_status()["rejected"] == 1
+
+
+def test_half_open_probe_closes_circuit(breaker):
+    """测试半开探测成功后恢复"""
+    for _ in range(4):
+        breaker.record_failure()
+    breaker.open_seconds = 0
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False  # 仅放行一个探测请求
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_probe_failure_reopens(breaker):
+    """测试半开探测失败后重新熔断"""
+    for _ in range(4):
+        breaker.record_failure()
+    breaker.open_seconds = 0
+    assert breaker.allow_request() is True
+
+    breaker.open_seconds = 60
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_call_sync_ignores_non_failures():
+    """测试非故障类异常不计入失败率"""
+    breaker = CircuitBreaker(
+        "test_sync", window_size=2, min_calls=2, is_failure=lambda e: isinstance(e, IOError)
+    )
+
+    def bad_request():
+        raise ValueError("bad input")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call_sync(bad_request)
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_probe_releases_slot(breaker):
+    """测试被取消的半开探测释放名额，后续探测仍可恢复熔断器"""
+    for _ in range(4):
+        breaker.record_failure()
+    breaker.open_seconds = 0
+
+    probe = asyncio.create_task(breaker.call(lambda: asyncio.sleep(10)))
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert await breaker.call(AsyncMock(return_value="ok")) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_qdrant_failure_predicate():
+    """测试 Qdrant 熔断只计入连接类错误和 5xx"""
+    import httpx
+    from qdrant_client.http.exceptions import UnexpectedResponse
+
+    from app.services.qdrant_service import is_qdrant_failure
+
+    def response_error(status_code):
+        return UnexpectedResponse(status_code, "", b"", httpx.Headers())
+
+    assert is_qdrant_failure(response_error(503))
+    assert not is_qdrant_failure(response_error(400))
+    assert not is_qdrant_failure(ValueError("bad filter"))
+    try:
+        raise RuntimeError("Cannot connect") from httpx.ConnectError("refused")
+    except RuntimeError as wrapped:
+        assert is_qdrant_failure(wrapped)
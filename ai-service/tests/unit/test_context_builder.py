@@ -0,0 +1,78 @@
+"""
+Test Context Builder
+"""
+
+from app.models import ChatMessage
+from app.services.context_builder import ContextBuilder, message_tokens
+from app.services.token_counter import count_message_tokens
+
+SYSTEM = [{"role": "system", "content": "你是一位健康顾问"}]
+QUESTION = [{"role": "user", "content": "高血压应该注意什么？"}]
+
+
+def _history(turns: int):
+    messages = []
+    for i in range(turns):
+        messages.append(ChatMessage(role="user", content=f"第{i}个问题" * 10))
+        messages.append(ChatMessage(role="assistant", content=f"第{i}个回答" * 20))
+    return messages
+
+
+def test_build_keeps_full_history_within_budget():
+    """测试预算充足时保留全部历史"""
+    builder = ContextBuilder(max_tokens=10000)
+    history = _history(2)
+
+    messages = builder.build(SYSTEM, history, QUESTION)
+
+    assert messages[0] == SYSTEM[0]
+    assert messages[-1] == QUESTION[0]
+    assert len(messages) == 2 + len(history)
+
+
+def test_build_trims_oldest_turns_first():
+    """测试超出预算时丢弃最早的轮次"""
+    history = _history(10)
+    per_turn = message_tokens(history[0]) + message_tokens(history[1])
+    budget = count_message_tokens(SYSTEM + QUESTION) + per_turn * 3
+    builder = ContextBuilder(max_tokens=budget)
+
+    messages = builder.build(SYSTEM, history, QUESTION)
+
+    assert count_message_tokens(messages) <= budget
+    assert messages[1:-1] == [{"role": m.role, "content": m.content} for m in history[-6:]]
+    assert messages[1]["role"] == "user"
+
+
+def test_build_uses_cached_token_count():
+    """测试优先使用消息缓存的 Token 数"""
+    builder = ContextBuilder(max_tokens=count_message_tokens(SYSTEM + QUESTION) + 50)
+    history = [ChatMessage(role="user", content="短", token_count=1000)]
+
+    assert builder.build(SYSTEM, history, QUESTION) == SYSTEM + QUESTION
+
+
+def test_select_chunks_dedupes_and_respects_budget():
+    """测试检索片段去重与预算"""
+    builder = ContextBuilder(max_chunk_tokens=20)
+    chunks = [
+        "高血压患者应低盐饮食",
+        "高血压患者应低盐  饮食",
+        "低盐饮食",
+        "规律运动有助于控制血压" * 5,
+        "戒烟限酒",
+    ]
+
+    assert builder.select_chunks(chunks) == ["高血压患者应低盐饮食", "戒烟限酒"]
+
+
+def test_build_inserts_summary_before_history():
+    """测试摘要作为 system 消息放在历史之前"""
+    builder = ContextBuilder(max_tokens=10000)
+    history = _history(1)
+
+    messages = builder.build(SYSTEM, history, QUESTION, summary="患者有高血压病史")
+
+    assert messages[1]["role"] == "system"
+    assert "患者有高血压病史" in messages[1]["content"]
+    assert messages[2]["content"] == history[0].content
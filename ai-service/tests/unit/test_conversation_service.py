@@ -3,9 +3,15 @@ Test Conversation Service
 """
 
 import pytest
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
-from app.services.conversation_service import ConversationService
+from app.services.conversation_service import (
+    ConversationService,
+    build_buckets,
+    migrate_embedded_messages,
+)
 from app.models import ChatMessage
+from app.services.pagination import decode_cursor, encode_cursor
 
 
 @pytest.fixture
@@ -14,6 +20,9 @@ def conversation_service():
     with patch("app.services.conversation_service.AsyncIOMotorClient"):
         service = ConversationService()
         service.collection = MagicMock()
+        service.messages_collection = MagicMock()
+        service.bucket_size = 50
+        service.session_cache = None
         return service
 
 
@@ -30,38 +39,253 @@ async def test_create_conversation(conversation_service):
     conversation_service.collection.insert_one.assert_called_once()
 
 
-@pytest.mark.asyncio
-async def test_get_conversation(conversation_service):
-    """测试获取对话"""
-    mock_doc = {
+def _header(**fields):
+    header = {
         "id": "conv123",
         "user_id": "user123",
-        "messages": [],
         "created_at": "2024-01-01T00:00:00",
         "updated_at": "2024-01-01T00:00:00",
     }
-    conversation_service.collection.find_one = AsyncMock(return_value=mock_doc)
+    header.update(fields)
+    return header
+
+
+def _bucket_cursor(buckets):
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+
+    async def iterate():
+        for bucket in buckets:
+            yield bucket
+
+    cursor.__aiter__ = lambda self: iterate()
+    return cursor
+
+
+def _buckets(start: int, end: int, bucket_size: int = 50):
+    buckets = {}
+    for seq in range(start, end):
+        buckets.setdefault(seq // bucket_size, []).append(
+            {"role": "user", "content": f"消息{seq}", "seq": seq}
+        )
+    return [{"messages": messages} for _, messages in sorted(buckets.items())]
+
+
+@pytest.mark.asyncio
+async def test_get_conversation(conversation_service):
+    """测试获取对话"""
+    conversation_service.collection.find_one = AsyncMock(return_value=_header())
 
     conversation = await conversation_service.get_conversation("conv123")
 
     assert conversation is not None
     assert conversation.id == "conv123"
     assert conversation.user_id == "user123"
+    assert conversation.messages == []
 
 
 @pytest.mark.asyncio
 async def test_add_message(conversation_service):
-    """测试添加消息"""
-    mock_result = MagicMock()
-    mock_result.modified_count = 1
-    conversation_service.collection.update_one = AsyncMock(return_value=mock_result)
-    conversation_service.get_conversation = AsyncMock(return_value=MagicMock(id="conv123"))
+    """测试添加消息（会话头递增计数，消息追加到对应的桶）"""
+    conversation_service.collection.find_one_and_update = AsyncMock(
+        return_value=_header(message_count=51, summarized_count=45)
+    )
+    conversation_service.messages_collection.update_one = AsyncMock()
+    conversation_service.messages_collection.find = MagicMock(
+        return_value=_bucket_cursor(_buckets(41, 51))
+    )
 
     message = ChatMessage(role="user", content="测试消息")
     result = await conversation_service.add_message("conv123", message)
 
     assert result is not None
-    conversation_service.collection.update_one.assert_called_once()
+    assert result.message_count == 51
+    assert len(result.messages) == conversation_service.max_context_messages
+    assert message.token_count is not None
+
+    bucket_filter, update = conversation_service.messages_collection.update_one.call_args.args
+    assert bucket_filter == {"conversation_id": "conv123", "bucket": 1}
+    assert update["$push"]["messages"]["$each"][0]["seq"] == 50
+    assert conversation_service.messages_collection.update_one.call_args.kwargs["upsert"] is True
+
+
+@pytest.mark.asyncio
+async def test_add_message_missing_conversation(conversation_service):
+    """测试对话不存在时不写入消息桶"""
+    conversation_service.collection.find_one_and_update = AsyncMock(return_value=None)
+    conversation_service.collection.find_one = AsyncMock(return_value=None)
+    conversation_service.messages_collection.update_one = AsyncMock()
+
+    result = await conversation_service.add_message(
+        "missing", ChatMessage(role="user", content="hi")
+    )
+
+    assert result is None
+    conversation_service.messages_collection.update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_message_migrates_embedded_messages_first(conversation_service):
+    """测试尚未迁移的旧会话先就地迁移，新消息的序号排在内嵌消息之后"""
+    embedded = [{"role": "user", "content": f"旧消息{i}"} for i in range(3)]
+    legacy = {"_id": "oid", **_header(), "messages": embedded}
+    conversation_service.collection.find_one_and_update = AsyncMock(
+        side_effect=[None, _header(message_count=4)]
+    )
+    conversation_service.collection.find_one = AsyncMock(
+        side_effect=[legacy, _header(message_count=3)]
+    )
+    conversation_service.collection.update_one = AsyncMock(return_value=MagicMock(modified_count=1))
+    conversation_service.messages_collection.bulk_write = AsyncMock()
+    conversation_service.messages_collection.update_one = AsyncMock()
+    conversation_service.messages_collection.find = MagicMock(
+        return_value=_bucket_cursor(_buckets(0, 4))
+    )
+
+    result = await conversation_service.add_message(
+        "conv123", ChatMessage(role="user", content="hi")
+    )
+
+    assert result.message_count == 4
+    allocate_filter = conversation_service.collection.find_one_and_update.call_args.args[0]
+    assert allocate_filter == {"id": "conv123", "messages": {"$exists": False}}
+    header_filter, header_update = conversation_service.collection.update_one.call_args.args
+    assert header_filter == {"_id": "oid", "messages": {"$exists": True}}
+    assert header_update["$set"]["message_count"] == 3
+    _, update = conversation_service.messages_collection.update_one.call_args.args
+    assert update["$push"]["messages"]["$each"][0]["seq"] == 3
+
+
+@pytest.mark.asyncio
+async def test_migrate_embedded_messages_does_not_overwrite_buckets():
+    """测试迁移只插入不存在的桶，会话头已迁移时不重置 message_count"""
+    collection = MagicMock()
+    collection.update_one = AsyncMock(return_value=MagicMock(modified_count=0))
+    messages_collection = MagicMock()
+    messages_collection.bulk_write = AsyncMock()
+    doc = {"_id": "oid", "id": "c1", "messages": [{"role": "user", "content": "a"}]}
+
+    migrated = await migrate_embedded_messages(collection, messages_collection, doc, 50)
+
+    assert migrated is False
+    (request,) = messages_collection.bulk_write.call_args.args[0]
+    assert set(request._doc) == {"$setOnInsert"}
+    assert request._doc["$setOnInsert"]["messages"][0]["seq"] == 0
+    assert collection.update_one.call_args.args[0] == {"_id": "oid", "messages": {"$exists": True}}
+
+
+@pytest.mark.asyncio
+async def test_get_context_window_reads_only_recent_buckets(conversation_service):
+    """测试上下文窗口只读取最近的桶，并排除已压缩进摘要的消息"""
+    conversation_service.collection.find_one = AsyncMock(
+        return_value=_header(message_count=104, summary="摘要", summarized_count=98)
+    )
+    conversation_service.messages_collection.find = MagicMock(
+        return_value=_bucket_cursor(_buckets(94, 104))
+    )
+
+    summary, messages = await conversation_service.get_context_window("conv123")
+
+    assert summary == "摘要"
+    assert [m.content for m in messages] == [f"消息{i}" for i in range(98, 104)]
+    bucket_query = conversation_service.messages_collection.find.call_args.args[0]
+    assert bucket_query["bucket"] == {"$gte": 1, "$lte": 2}
+
+
+@pytest.mark.asyncio
+async def test_get_context_window_keeps_turns_before_summary(conversation_service):
+    """测试摘要触发前的第 15 条消息时，窗口之前的轮次也作为上下文返回"""
+    conversation_service.collection.find_one = AsyncMock(
+        return_value=_header(message_count=15, summarized_count=0)
+    )
+    conversation_service.messages_collection.find = MagicMock(
+        return_value=_bucket_cursor(_buckets(0, 15))
+    )
+
+    summary, messages = await conversation_service.get_context_window("conv123")
+
+    assert summary is None
+    assert [m.content for m in messages] == [f"消息{i}" for i in range(15)]
+
+    with patch("app.services.conversation_service.settings.summary_enabled", False):
+        _, messages = await conversation_service.get_context_window("conv123")
+    assert len(messages) == conversation_service.max_context_messages
+
+
+@pytest.mark.asyncio
+async def test_get_session_info_reads_header_only(conversation_service):
+    """测试会话信息只读取会话头"""
+    conversation_service.collection.find_one = AsyncMock(
+        return_value=_header(
+            message_count=42, last_message={"role": "assistant", "content": "最后一条"}
+        )
+    )
+    conversation_service.messages_collection.find = MagicMock()
+
+    info = await conversation_service.get_session_info("conv123")
+
+    assert info["message_count"] == 42
+    assert info["last_message"] == "最后一条"
+    conversation_service.messages_collection.find.assert_not_called()
+
+
+def _fake_bucket_find(buckets):
+    """按 updated_at 截止时间、(updated_at, _id) 游标和 limit 过滤的 find 替身"""
+
+    def find(query, projection=None):
+        cursor = _bucket_cursor([])
+        after = query.get("$or")
+        selected = [b for b in buckets if b["updated_at"] < query["updated_at"]["$lt"]]
+        if after:
+            key = (after[1]["updated_at"], after[1]["_id"]["$gt"])
+            selected = [b for b in selected if (b["updated_at"], b["_id"]) > key]
+        selected.sort(key=lambda b: (b["updated_at"], b["_id"]))
+        cursor.sort.return_value = cursor
+        cursor.limit.side_effect = lambda n: _bucket_cursor(selected[:n])
+        return cursor
+
+    return find
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_buckets_pages_past_active_conversations(conversation_service):
+    """测试第一批全是活跃长会话的旧桶时，游标继续向后检查并清理过期会话的桶"""
+    old = datetime(2020, 1, 1)
+    buckets = [
+        {"_id": 1, "conversation_id": "active", "updated_at": old},
+        {"_id": 2, "conversation_id": "active", "updated_at": old},
+        {"_id": 3, "conversation_id": "expired", "updated_at": datetime(2020, 1, 2)},
+    ]
+    conversation_service.messages_collection.find = MagicMock(
+        side_effect=_fake_bucket_find(buckets)
+    )
+
+    def headers(query, projection=None):
+        return _bucket_cursor([{"id": i} for i in query["id"]["$in"] if i == "active"])
+
+    conversation_service.collection.find = MagicMock(side_effect=headers)
+    conversation_service.messages_collection.delete_many = AsyncMock()
+
+    purged, after = await conversation_service.purge_expired_buckets(batch_size=2)
+    assert (purged, after) == (0, (old, 2))
+    conversation_service.messages_collection.delete_many.assert_not_called()
+
+    purged, after = await conversation_service.purge_expired_buckets(after, batch_size=2)
+    assert (purged, after) == (1, None)
+    conversation_service.messages_collection.delete_many.assert_awaited_once_with(
+        {"conversation_id": {"$in": ["expired"]}}
+    )
+
+
+def test_build_buckets():
+    """测试迁移时的消息分桶"""
+    messages = [{"role": "user", "content": str(i)} for i in range(5)]
+
+    buckets = build_buckets("conv123", messages, bucket_size=2, updated_at=datetime(2024, 1, 1))
+
+    assert [b["bucket"] for b in buckets] == [0, 1, 2]
+    assert [b["count"] for b in buckets] == [2, 2, 1]
+    assert buckets[2]["messages"] == [{"role": "user", "content": "4", "seq": 4}]
 
 
 @pytest.mark.asyncio
@@ -84,7 +308,29 @@ async def test_get_user_conversations(conversation_service):
     mock_cursor.__aiter__ = lambda self: mock_async_iter(self)
     conversation_service.collection.find = MagicMock(return_value=mock_cursor)
 
-    conversations = await conversation_service.get_user_conversations("user123")
+    conversations, next_cursor = await conversation_service.get_user_conversations("user123")
 
     assert len(conversations) > 0
     assert conversations[0].user_id == "user123"
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_conversations_with_cursor(conversation_service):
+    """测试游标分页：按 (updated_at, id) 继续查询，不使用 skip"""
+    docs = [_header(id=f"conv{i}", updated_at=datetime(2024, 1, 10 - i)) for i in range(3)]
+    mock_cursor = _bucket_cursor(docs)
+    mock_cursor.limit.return_value = mock_cursor
+    conversation_service.collection.find = MagicMock(return_value=mock_cursor)
+
+    cursor = encode_cursor(datetime(2024, 1, 11), "conv-prev")
+    conversations, next_cursor = await conversation_service.get_user_conversations(
+        "user123", limit=2, skip=40, cursor=cursor
+    )
+
+    query = conversation_service.collection.find.call_args.args[0]
+    assert query["$or"][0] == {"updated_at": {"$lt": datetime(2024, 1, 11)}}
+    mock_cursor.skip.assert_not_called()
+    mock_cursor.limit.assert_called_once_with(3)
+    assert [c.id for c in conversations] == ["conv0", "conv1"]
+    assert decode_cursor(next_cursor) == (datetime(2024, 1, 9), "conv1")
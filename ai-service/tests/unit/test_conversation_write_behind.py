@@ -0,0 +1,138 @@
+"""
+Test Conversation Write-Behind
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import BulkWriteError
+from app.models import ChatMessage
+from app.services.conversation_service import ConversationService
+from app.services.conversation_write_behind import (
+    STREAM_KEY,
+    ConversationWriteBehind,
+    build_flush_operations,
+)
+from app.services.session_cache import SessionContextCache
+
+
+def _entry(entry_id: str, conversation_id: str, seq: int):
+    message = {"role": "user", "content": f"消息{seq}", "token_count": 3, "seq": seq}
+    return (
+        entry_id,
+        {
+            "conversation_id": conversation_id,
+            "message": json.dumps(message, ensure_ascii=False),
+            "ts": "2024-01-01T00:00:00",
+        },
+    )
+
+
+@pytest.fixture
+def redis_client():
+    """Redis 客户端 mock"""
+    client = MagicMock()
+    client.set = AsyncMock()
+    client.incr = AsyncMock(return_value=8)
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client.pipeline.return_value = pipe
+    with patch("app.services.session_cache.get_redis_service") as redis:
+        redis.return_value.client = client
+        yield client
+
+
+@pytest.fixture
+def write_behind():
+    """写入器fixture"""
+    buckets = MagicMock()
+    buckets.bulk_write = AsyncMock()
+    headers = MagicMock()
+    headers.bulk_write = AsyncMock()
+    return ConversationWriteBehind(headers, buckets, bucket_size=50, cache=SessionContextCache())
+
+
+def test_build_flush_operations():
+    """测试日志转换为幂等的桶写入和会话头写入"""
+    entries = [_entry("1-0", "c1", 49), _entry("2-0", "c1", 50), _entry("3-0", "c2", 0)]
+
+    bucket_ops, header_ops = build_flush_operations(entries, bucket_size=50)
+
+    assert [op._filter["bucket"] for op in bucket_ops] == [0, 1, 0]
+    assert bucket_ops[1]._filter["messages.seq"] == {"$ne": 50}
+    assert bucket_ops[1]._upsert is True
+
+    headers = {op._filter["id"]: op for op in header_ops}
+    assert headers["c1"]._filter["message_count"] == {"$lt": 51}
+    assert headers["c1"]._doc["$set"]["message_count"] == 51
+    assert headers["c1"]._doc["$set"]["last_message"]["content"] == "消息50"
+    assert "seq" not in headers["c1"]._doc["$set"]["last_message"]
+
+
+@pytest.mark.asyncio
+async def test_append_writes_stream_and_window(write_behind, redis_client):
+    """测试追加消息写入日志和热窗口，序号从已落库的消息数开始"""
+    seq = await write_behind.append("c1", ChatMessage(role="user", content="你好"), 7)
+
+    assert seq == 7
+    redis_client.set.assert_awaited_once()
+    assert redis_client.set.call_args.args[1] == 7
+    assert redis_client.set.call_args.kwargs["nx"] is True
+
+    pipe = redis_client.pipeline.return_value
+    stream, fields = pipe.xadd.call_args.args
+    assert stream == STREAM_KEY
+    assert json.loads(fields["message"])["seq"] == 7
+    pipe.rpush.assert_called_once()
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_flush_applies_batch_and_acks(write_behind, redis_client):
+    """测试刷写新日志后确认并删除"""
+    entries = [_entry("1-0", "c1", 0), _entry("2-0", "c1", 1)]
+    redis_client.xreadgroup = AsyncMock(side_effect=[[], [[STREAM_KEY, entries]]])
+    redis_client.xautoclaim = AsyncMock(return_value=["0-0", [], []])
+
+    flushed = await write_behind.flush()
+
+    assert flushed == 2
+    write_behind.buckets.bulk_write.assert_awaited_once()
+    write_behind.headers.bulk_write.assert_awaited_once()
+    pipe = redis_client.pipeline.return_value
+    pipe.xack.assert_called_once()
+    assert pipe.xack.call_args.args[2:] == ("1-0", "2-0")
+
+
+@pytest.mark.asyncio
+async def test_flush_ignores_replayed_messages(write_behind, redis_client):
+    """测试重放已落库的消息时忽略重复键错误"""
+    redis_client.xreadgroup = AsyncMock(return_value=[[STREAM_KEY, [_entry("1-0", "c1", 0)]]])
+    write_behind.buckets.bulk_write = AsyncMock(
+        side_effect=BulkWriteError({"writeErrors": [{"code": 11000, "index": 0}]})
+    )
+
+    assert await write_behind.flush() == 1
+    write_behind.headers.bulk_write.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_window_merges_hot_and_persisted_messages():
+    """测试读取窗口时合并已落库的消息和 Redis 热窗口中尚未落库的消息"""
+    with patch("app.services.conversation_service.AsyncIOMotorClient"):
+        service = ConversationService()
+    service.session_cache = MagicMock()
+    service.session_cache.backfill = AsyncMock()
+    service.session_cache.get_window = AsyncMock(
+        return_value=(12, [ChatMessage(role="user", content=f"消息{i}") for i in (9, 10, 11)])
+    )
+    service._load_messages = AsyncMock(
+        return_value=[ChatMessage(role="user", content=f"消息{i}") for i in (7, 8)]
+    )
+    header = {"id": "c1", "user_id": "u1", "message_count": 9}
+
+    conversation = await service._with_range(header, max_messages=5)
+
+    service._load_messages.assert_awaited_once_with("c1", 7, 9)
+    assert conversation.message_count == 12
+    assert [m.content for m in conversation.messages] == [f"消息{i}" for i in range(7, 12)]
@@ -0,0 +1,192 @@
+"""
+Test DeepSeek Client
+"""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from app.services.deepseek_client import DeepSeekClient, DeepSeekAPIError
+
+
+def _completion(content: str):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=content), finish_reason="stop")]
+    response.usage = MagicMock(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+    response.model = "deepseek-chat"
+    return response
+
+
+@pytest.fixture
+def deepseek_client():
+    """DeepSeek客户端fixture"""
+    with patch("app.services.deepseek_client.AsyncOpenAI"):
+        client = DeepSeekClient()
+        return client
+
+
+@pytest.mark.asyncio
+async def test_chat_success(deepseek_client):
+    """测试普通对话请求"""
+
+    async def create(**kwargs):
+        return _completion("你好")
+
+    deepseek_client.client.chat.completions.create = create
+
+    result = await deepseek_client.chat([{"role": "user", "content": "hi"}], hedge=False)
+
+    assert result["content"] == "你好"
+    assert result["usage"]["total_tokens"] == 15
+
+
+@pytest.mark.asyncio
+async def test_chat_attempt_timeout_bounded_by_budget(deepseek_client):
+    """测试单次尝试超时取剩余预算"""
+    timeouts = []
+
+    async def create(**kwargs):
+        timeouts.append(kwargs["timeout"])
+        return _completion("ok")
+
+    deepseek_client.client.chat.completions.create = create
+
+    await deepseek_client.chat([{"role": "user", "content": "hi"}], budget=2.0, hedge=False)
+
+    assert timeouts[0].read <= 2.0
+    assert timeouts[0].connect <= 2.0
+
+
+@pytest.mark.asyncio
+async def test_chat_bounded_by_request_deadline(deepseek_client):
+    """测试调用方的请求截止时间早于自身预算时以截止时间为准，已过期时不发起请求"""
+    timeouts = []
+
+    async def create(**kwargs):
+        timeouts.append(kwargs["timeout"])
+        return _completion("ok")
+
+    deepseek_client.client.chat.completions.create = create
+    messages = [{"role": "user", "content": "hi"}]
+
+    await deepseek_client.chat(messages, budget=30.0, deadline=time.monotonic() + 1.0, hedge=False)
+    assert timeouts[0].read <= 1.0
+
+    with pytest.raises(DeepSeekAPIError):
+        await deepseek_client.chat(messages, deadline=time.monotonic() - 1, hedge=False)
+    assert len(timeouts) == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_budget_exhausted(deepseek_client):
+    """测试慢请求超出预算后不再重试"""
+    calls = 0
+
+    async def create(**kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(1)
+        return _completion("too late")
+
+    deepseek_client.client.chat.completions.create = create
+
+    with pytest.raises(DeepSeekAPIError):
+        await deepseek_client.chat([{"role": "user", "content": "hi"}], budget=0.05, hedge=False)
+
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_hedged_request_wins(deepseek_client):
+    """测试主请求过慢时对冲请求先返回"""
+    calls = 0
+
+    async def create(**kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+            return _completion("slow")
+        return _completion("fast")
+
+    deepseek_client.client.chat.completions.create = create
+
+    with patch("app.services.deepseek_client.settings.deepseek_hedge_delay", 0.01):
+        result = await deepseek_client.chat(
+            [{"role": "user", "content": "hi"}], budget=2.0, hedge=True
+        )
+
+    assert result["content"] == "fast"
+    assert calls == 2
+    assert deepseek_client.get_usage_stats()["hedged_requests"] == 1
+
+
+def test_hedge_delay_uses_p95(deepseek_client):
+    """测试样本足够时对冲延迟取 p95"""
+    deepseek_client._latencies.extend([0.1] * 95 + [1.0] * 5)
+
+    assert deepseek_client.get_hedge_delay() == 1.0
+
+
+def _stream_chunk(content=None, usage=None):
+    chunk = MagicMock()
+    chunk.choices = [MagicMock(delta=MagicMock(content=content))] if content else []
+    chunk.usage = usage
+    return chunk
+
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_records_server_usage(deepseek_client):
+    """测试流式响应使用最后分片中的 usage"""
+    captured = {}
+
+    async def create(**kwargs):
+        captured.update(kwargs)
+        return _stream(
+            [
+                _stream_chunk("你好"),
+                _stream_chunk(usage={"prompt_tokens": 20, "completion_tokens": 8}),
+            ]
+        )
+
+    deepseek_client.client.chat.completions.create = create
+
+    with patch("app.services.deepseek_client.get_metrics_service") as metrics:
+        parts = [
+            part
+            async for part in deepseek_client.chat_stream(
+                [{"role": "user", "content": "hi"}], endpoint="general_chat"
+            )
+        ]
+
+    assert parts == ["你好"]
+    assert captured["extra_body"] == {"stream_options": {"include_usage": True}}
+    usage = metrics.return_value.record_llm_usage.call_args.kwargs
+    assert usage["endpoint"] == "general_chat"
+    assert (usage["prompt_tokens"], usage["completion_tokens"]) == (20, 8)
+    assert usage["estimated"] is False
+    assert deepseek_client.get_usage_stats()["total_tokens"] == 28
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_estimates_usage_without_server_usage(deepseek_client):
+    """测试服务端未返回 usage 时按本地估算"""
+
+    async def create(**kwargs):
+        return _stream([_stream_chunk("你好"), _stream_chunk("世界")])
+
+    deepseek_client.client.chat.completions.create = create
+
+    with patch("app.services.deepseek_client.get_metrics_service") as metrics:
+        async for _ in deepseek_client.chat_stream([{"role": "user", "content": "hi"}]):
+            pass
+
+    usage = metrics.return_value.record_llm_usage.call_args.kwargs
+    assert usage["estimated"] is True
+    assert usage["completion_tokens"] == 2  # "你好世界" 4 * 0.6
+    assert usage["prompt_tokens"] > 0
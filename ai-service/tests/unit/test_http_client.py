@@ -0,0 +1,88 @@
+"""
+Test Shared HTTP Client and Retry Policy
+"""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from openai import APIConnectionError, BadRequestError, RateLimitError
+from app.services.http_client import RetryPolicy, create_http_client
+
+
+def _request():
+    return httpx.Request("POST", "https://api.deepseek.com/v1/chat/completions")
+
+
+def _status_error(cls, status_code: int):
+    response = httpx.Response(status_code, request=_request())
+    return cls("error", response=response, body=None)
+
+
+@pytest.fixture
+def retry_policy():
+    """重试策略fixture（无真实等待）"""
+    return RetryPolicy(max_retries=2, backoff_base=0.01, backoff_max=0.01, rate_limit_backoff=0.01)
+
+
+def test_create_http_client():
+    """测试共享客户端的连接池与超时配置"""
+    client = create_http_client()
+
+    assert isinstance(client, httpx.AsyncClient)
+    assert client.timeout.connect is not None
+
+
+def test_openai_clients_keep_connect_timeout():
+    """测试 OpenAI 客户端继承共享客户端的超时，连接超时不被读超时覆盖"""
+    from app.config import settings
+    from app.services.deepseek_client import DeepSeekClient
+    from app.services.http_client import request_timeout
+
+    client = DeepSeekClient().client
+    assert client.timeout.connect == settings.http_connect_timeout
+    assert client.timeout.read == settings.deepseek_timeout
+    assert request_timeout(0.5).connect == 0.5
+
+
+def test_get_delay_is_capped(retry_policy):
+    """测试退避时间不超过上限"""
+    policy = RetryPolicy(max_retries=5, backoff_base=1.0, backoff_max=3.0, rate_limit_backoff=5.0)
+    error = APIConnectionError(request=_request())
+
+    assert policy.get_delay(10, error) <= 3.0
+    assert policy.get_delay(0, _status_error(RateLimitError, 429)) <= 3.0
+
+
+@pytest.mark.asyncio
+async def test_call_retries_connection_errors(retry_policy):
+    """测试连接错误会重试直到成功"""
+    func = AsyncMock(side_effect=[APIConnectionError(request=_request()), "ok"])
+
+    with patch("app.services.http_client.asyncio.sleep", new=AsyncMock()):
+        result = await retry_policy.call(func)
+
+    assert result == "ok"
+    assert func.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_call_does_not_retry_client_errors(retry_policy):
+    """测试 4xx 错误不重试"""
+    func = AsyncMock(side_effect=_status_error(BadRequestError, 400))
+
+    with pytest.raises(BadRequestError):
+        await retry_policy.call(func)
+
+    assert func.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_call_raises_after_max_retries(retry_policy):
+    """测试超过最大重试次数后抛出最后一次异常"""
+    func = AsyncMock(side_effect=_status_error(RateLimitError, 429))
+
+    with patch("app.services.http_client.asyncio.sleep", new=AsyncMock()):
+        with pytest.raises(RateLimitError):
+            await retry_policy.call(func)
+
+    assert func.call_count == 3
@@ -0,0 +1,102 @@
+"""
+Test Lifespan
+"""
+
+import asyncio
+import signal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import health
+from app.lifespan import RequestTracker, ServiceContainer
+from app.middleware.drain_middleware import DrainMiddleware
+
+
+@pytest.fixture
+def container():
+    """依赖全部替换为 AsyncMock 的服务容器"""
+    services = ServiceContainer()
+    with (
+        patch.object(services, "_open_mongodb", AsyncMock()),
+        patch.object(services, "_open_redis", AsyncMock()),
+        patch.object(services, "_open_qdrant", AsyncMock(side_effect=RuntimeError("down"))),
+        patch.object(services.embedding, "warm_up", AsyncMock()),
+        patch.object(services.articles, "warm_listings", AsyncMock()),
+    ):
+        yield services
+
+
+@pytest.mark.asyncio
+async def test_request_tracker_waits_for_in_flight():
+    tracker = RequestTracker()
+    assert await tracker.wait_idle(0)
+
+    tracker.enter()
+    assert not await tracker.wait_idle(0.01)
+    asyncio.get_running_loop().call_later(0.01, tracker.exit)
+    assert await tracker.wait_idle(1)
+
+
+@pytest.mark.asyncio
+async def test_readiness_after_warm_up(container):
+    ready, detail = await container.readiness()
+    assert (ready, detail["status"]) == (False, "starting")
+
+    await container._warm_up()
+    ready, detail = await container.readiness()
+    # Qdrant 不可用时检索降级，不影响就绪
+    assert ready
+    assert detail["checks"]["qdrant"] == "error: down"
+    assert detail["checks"]["embedding"] == "ok"
+    container.articles.warm_listings.assert_awaited_once()
+
+    # 必需依赖失败时不就绪，探测时重试，恢复后重新就绪
+    container.checks["redis"] = "error: timeout"
+    container._open_redis.side_effect = ConnectionError("refused")
+    assert not (await container.readiness())[0]
+    container._open_redis.side_effect = None
+    assert (await container.readiness())[0]
+
+    container.draining = True
+    ready, detail = await container.readiness()
+    assert (ready, detail["status"]) == (False, "draining")
+
+
+def test_ready_probe_and_drain(container):
+    app = FastAPI()
+    app.add_middleware(DrainMiddleware)
+    app.include_router(health.router)
+    client = TestClient(app)
+
+    assert client.get("/health/ready").status_code == 503
+
+    app.state.services = container
+    container.started = True
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["in_flight"] == 1
+
+    container.draining = True
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.headers["connection"] == "close"
+    assert container.requests.active == 0
+
+
+@pytest.mark.asyncio
+async def test_sigterm_drains_before_exit(container):
+    with (
+        patch("app.lifespan.settings.shutdown_drain_delay_seconds", 0.01),
+        patch("app.lifespan.os.kill") as kill,
+    ):
+        container._on_sigterm()
+        assert container.draining
+        assert (await container.readiness())[1]["status"] == "draining"
+        kill.assert_not_called()
+
+        await asyncio.sleep(0.05)
+        kill.assert_called_once()
+        assert kill.call_args.args[1] == signal.SIGINT
@@ -0,0 +1,87 @@
+"""
+Test Logger
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from app.core.logger import RecordPatcher, json_format, not_dropped, parse_sampling, request_id
+from app.middleware.request_context import REQUEST_ID_HEADER, RequestContextMiddleware
+
+
+@pytest.fixture
+def captured():
+    """以 JSON 格式捕获日志"""
+    lines = []
+    handler_id = logger.add(lines.append, format=json_format, filter=not_dropped, level="DEBUG")
+    yield lines
+    logger.remove(handler_id)
+
+
+def test_parse_sampling():
+    assert parse_sampling(None) == {}
+    assert parse_sampling(" app.services.qdrant_service=0.01, app.services=0.5 ") == {
+        "app.services.qdrant_service": 0.01,
+        "app.services": 0.5,
+    }
+    for spec in ("app.services", "app.services=x", "=0.1", "app.services=1.5"):
+        with pytest.raises(ValueError):
+            parse_sampling(spec)
+
+
+def test_json_output_with_request_id_and_fields(captured):
+    token = request_id.set("req-1")
+    try:
+        logger.info("Found {count} results", count=3)
+    finally:
+        request_id.reset(token)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Search failed")
+
+    record = json.loads(captured[0])
+    assert record["message"] == "Found 3 results"
+    assert record["count"] == 3
+    assert record["request_id"] == "req-1"
+    assert record["level"] == "INFO"
+    assert not [key for key in record if key.startswith("_")]
+
+    error = json.loads(captured[1])
+    assert "request_id" not in error
+    assert "ValueError: boom" in error["exception"]
+
+
+def test_sampling_drops_debug_only(captured):
+    logger.configure(patcher=RecordPatcher({__name__: 0.0, "app": 1.0}))
+    try:
+        logger.debug("sampled out")
+        logger.info("kept")
+    finally:
+        logger.configure(patcher=RecordPatcher({}))
+
+    assert [json.loads(line)["message"] for line in captured] == ["kept"]
+
+
+def test_request_context_middleware():
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"request_id": request_id.get()}
+
+    client = TestClient(app)
+    response = client.get("/ping", headers={REQUEST_ID_HEADER: "upstream-42"})
+    assert response.headers[REQUEST_ID_HEADER] == "upstream-42"
+    assert response.json() == {"request_id": "upstream-42"}
+
+    # 非法的上游请求 ID 重新生成
+    response = client.get("/ping", headers={REQUEST_ID_HEADER: "bad id\nINFO fake"})
+    generated = response.headers[REQUEST_ID_HEADER]
+    assert len(generated) == 32
+    assert response.json() == {"request_id": generated}
@@ -0,0 +1,85 @@
+"""
+Test Metrics Middleware
+"""
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.middleware.metrics_middleware import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/items/{item_id}")
+async def get_item(item_id: str):
+    return {"id": item_id}
+
+
+@app.get("/stream")
+async def stream():
+    async def chunks():
+        for i in range(3):
+            yield f"chunk{i}\n"
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+@app.get("/boom")
+async def boom():
+    raise RuntimeError("boom")
+
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_labels_use_route_template():
+    """测试 endpoint 标签为路由模板，不同路径参数共用一个序列"""
+    labels = {"method": "GET", "endpoint": "/items/{item_id}", "status": "200"}
+    before = _sample("api_request_duration_seconds_count", **labels)
+
+    for item_id in ("a", "b", "c"):
+        assert client.get(f"/items/{item_id}").status_code == 200
+
+    assert _sample("api_request_duration_seconds_count", **labels) == before + 3
+    assert _sample("api_request_duration_seconds_count", method="GET", endpoint="/items/a") == 0
+
+
+def test_unmatched_paths_share_one_series():
+    """测试未匹配路由的请求统一记为 unmatched"""
+    labels = {"method": "GET", "endpoint": "unmatched", "status": "404"}
+    before = _sample("api_request_duration_seconds_count", **labels)
+
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+
+    assert _sample("api_request_duration_seconds_count", **labels) == before + 2
+
+
+def test_streaming_response_size_and_in_progress():
+    """测试流式响应不被缓冲，响应大小按各分块累加，请求结束后进行中计数归零"""
+    labels = {"method": "GET", "endpoint": "/stream"}
+    before = _sample("api_response_size_bytes_sum", **labels)
+
+    response = client.get("/stream")
+
+    assert response.text == "chunk0\nchunk1\nchunk2\n"
+    assert _sample("api_response_size_bytes_sum", **labels) == before + len(response.content)
+    assert _sample("api_requests_in_progress", method="GET") == 0
+
+
+def test_errors_recorded_with_route_template():
+    """测试未处理异常记录为错误和 500"""
+    path = "/boom"
+    labels = {"method": "GET", "endpoint": path, "error_type": "RuntimeError"}
+    before = _sample("api_errors_total", **labels)
+
+    assert client.get(path).status_code == 500
+
+    assert _sample("api_errors_total", **labels) == before + 1
+    assert _sample("api_request_duration_seconds_count", method="GET", endpoint=path, status="500")
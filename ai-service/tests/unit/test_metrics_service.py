@@ -0,0 +1,150 @@
+"""
+Test Metrics Service
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.services.instrumentation import MongoCommandMetrics
+from app.services.metrics_service import (
+    DEFAULT_BUCKETS,
+    cleanup_dead_workers,
+    collect_metrics,
+    exponential_buckets,
+    get_metrics_service,
+    histogram_buckets,
+    mark_worker_dead,
+    parse_buckets,
+    timed,
+)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_exponential_buckets():
+    assert exponential_buckets(0.001, 2, 4) == (0.001, 0.002, 0.004, 0.008)
+
+
+def test_parse_buckets_list_and_exponential():
+    assert parse_buckets("1, 0.5,5") == (0.5, 1.0, 5.0)
+    assert parse_buckets("exp:0.1,10,3") == (0.1, 1.0, 10.0)
+
+    with pytest.raises(ValueError):
+        parse_buckets(" , ")
+
+
+def test_histogram_buckets_override(monkeypatch):
+    assert histogram_buckets("llm") == DEFAULT_BUCKETS["llm"]
+    assert DEFAULT_BUCKETS["llm"][-1] >= 120
+
+    monkeypatch.setattr(settings, "metrics_buckets_llm", "1,10,100", raising=False)
+    assert histogram_buckets("llm") == (1.0, 10.0, 100.0)
+
+
+def test_time_agent_stage_records_on_error():
+    metrics = get_metrics_service()
+    before = _sample("agent_stage_duration_seconds_count", stage="test")
+
+    with pytest.raises(RuntimeError):
+        with metrics.time_agent_stage("test"):
+            raise RuntimeError("boom")
+
+    assert _sample("agent_stage_duration_seconds_count", stage="test") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_timed_decorates_sync_and_async():
+    @timed("record_embedding", "test_async")
+    async def embed_async():
+        return "async"
+
+    @timed("record_embedding", "test_sync")
+    def embed_sync():
+        return "sync"
+
+    assert await embed_async() == "async"
+    assert embed_sync() == "sync"
+    assert _sample("embedding_duration_seconds_count", provider="test_async") == 1
+    assert _sample("embedding_duration_seconds_count", provider="test_sync") == 1
+
+    with timed("record_vector_search", "test_collection") as timer:
+        pass
+    assert timer.elapsed() == timer.duration >= 0
+    assert _sample("vector_search_total", collection="test_collection") == 1
+
+
+def test_record_retrieval_results():
+    metrics = get_metrics_service()
+    metrics.record_retrieval_results("test_retrieval", [0.62, 0.91])
+    metrics.record_retrieval_results("test_retrieval", [])
+
+    assert _sample("retrieval_results_count", collection="test_retrieval") == 2
+    assert _sample("retrieval_results_sum", collection="test_retrieval") == 2
+    assert _sample("retrieval_top_score_count", collection="test_retrieval") == 1
+    assert _sample("retrieval_top_score_sum", collection="test_retrieval") == 0.91
+
+
+def test_mongo_command_listener_records_collection_commands():
+    listener = MongoCommandMetrics()
+
+    def run(command_name, command, request_id):
+        listener.started(
+            SimpleNamespace(
+                command_name=command_name,
+                command=command,
+                connection_id=("localhost", 27017),
+                request_id=request_id,
+            )
+        )
+        listener.succeeded(
+            SimpleNamespace(
+                command_name=command_name,
+                connection_id=("localhost", 27017),
+                request_id=request_id,
+                duration_micros=1500,
+            )
+        )
+
+    run("find", {"find": "test_articles", "filter": {}}, 1)
+    run("getMore", {"getMore": 42, "collection": "test_articles"}, 2)
+    run("hello", {"hello": 1}, 3)
+
+    labels = {"collection": "test_articles"}
+    assert _sample("mongo_operation_duration_seconds_count", operation="find", **labels) == 1
+    assert _sample("mongo_operation_duration_seconds_sum", operation="find", **labels) == 0.0015
+    assert _sample("mongo_operation_duration_seconds_count", operation="getMore", **labels) == 1
+    assert listener._collections == {}
+
+
+def test_cleanup_dead_workers_removes_only_dead_live_gauges(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    dead_pid, own_pid = 2**22 + 1, os.getpid()
+    for name in (
+        f"gauge_livesum_{dead_pid}.db",
+        f"counter_{dead_pid}.db",
+        f"gauge_livesum_{own_pid}.db",
+    ):
+        (tmp_path / name).touch()
+
+    assert cleanup_dead_workers() == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"counter_{dead_pid}.db",
+        f"gauge_livesum_{own_pid}.db",
+    ]
+
+    mark_worker_dead()
+    assert [p.name for p in tmp_path.iterdir()] == [f"counter_{dead_pid}.db"]
+
+
+def test_collect_metrics_single_and_multiprocess(tmp_path, monkeypatch):
+    get_metrics_service()
+    assert b"api_requests_in_progress" in collect_metrics()
+
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert collect_metrics() == b""
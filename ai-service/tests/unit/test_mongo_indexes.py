@@ -0,0 +1,99 @@
+"""
+Test MongoDB Index Management
+"""
+
+import uuid
+from datetime import datetime
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+from app.config import settings
+from app.services.mongo_indexes import QUERY_SHAPES, ensure_indexes, get_index_models
+
+
+def _index_supports(keys, query, sort) -> bool:
+    """索引前缀为：等值字段（任意顺序）+ 范围/排序字段（按顺序）"""
+    fields = [field for field, _ in keys]
+    equality = [f for f, v in query.items() if not isinstance(v, dict)]
+    ordered = [f for f, v in query.items() if isinstance(v, dict)]
+    ordered += [f for f, _ in sort if f not in ordered]
+
+    if set(fields[: len(equality)]) != set(equality):
+        return False
+    return fields[len(equality) : len(equality) + len(ordered)] == ordered
+
+
+@pytest.mark.parametrize("collection, query, sort", QUERY_SHAPES)
+def test_query_shape_has_index(collection, query, sort):
+    """测试每个查询模式都有可用的索引前缀"""
+    models = get_index_models()[collection]
+
+    assert any(
+        _index_supports(list(model.document["key"].items()), query, sort) for model in models
+    )
+
+
+def test_ttl_index_follows_settings(monkeypatch):
+    """测试会话 TTL 索引时长来自配置，0 表示不创建"""
+    monkeypatch.setattr(settings, "conversation_ttl_days", 7)
+    ttl = [
+        m.document
+        for m in get_index_models()["conversations"]
+        if "expireAfterSeconds" in m.document
+    ]
+    assert ttl[0]["expireAfterSeconds"] == 7 * 86400
+    # 消息桶不设 TTL，随会话头级联清理
+    assert not any(
+        "expireAfterSeconds" in m.document for m in get_index_models()["conversation_messages"]
+    )
+
+    monkeypatch.setattr(settings, "conversation_ttl_days", 0)
+    assert not any("expireAfterSeconds" in m.document for m in get_index_models()["conversations"])
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_updates_changed_ttl():
+    """测试 TTL 时长变更时通过 collMod 原地修改"""
+    collection = MagicMock()
+
+    async def create_indexes(models):
+        if "expireAfterSeconds" in models[0].document:
+            raise OperationFailure("conflict", code=85)
+
+    collection.create_indexes = create_indexes
+    db = MagicMock()
+    db.__getitem__.return_value = collection
+    db.command = AsyncMock()
+
+    await ensure_indexes(db)
+
+    commands = [c.args for c in db.command.call_args_list]
+    assert commands == [("collMod", "conversations")]
+
+
+@pytest.mark.asyncio
+async def test_query_shapes_do_not_collscan():
+    """使用真实 MongoDB 执行 explain，确认没有查询退化为 COLLSCAN（无 MongoDB 时跳过）"""
+    client = AsyncIOMotorClient(settings.mongodb_url, serverSelectionTimeoutMS=500)
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        client.close()
+        pytest.skip("MongoDB not available")
+
+    db = client[f"explain_test_{uuid.uuid4().hex[:8]}"]
+    try:
+        await ensure_indexes(db)
+        for name in {collection for collection, _, _ in QUERY_SHAPES}:
+            await db[name].insert_one({"placeholder": True, "updated_at": datetime.now()})
+
+        for collection, query, sort in QUERY_SHAPES:
+            cursor = db[collection].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            plan = await cursor.explain()
+            assert "COLLSCAN" not in str(plan["queryPlanner"]["winningPlan"]), (collection, query)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
@@ -0,0 +1,55 @@
+"""
+Test Keyset Pagination
+"""
+
+from datetime import datetime
+import pytest
+from app.services.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_query,
+    paginate,
+)
+
+
+def test_cursor_round_trip():
+    """测试游标编码后可还原"""
+    ts = datetime(2024, 5, 1, 12, 30, 15, 123000)
+
+    cursor = encode_cursor(ts, "article-9")
+
+    assert decode_cursor(cursor) == (ts, "article-9")
+    assert "=" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor("yesterday", "a1")])
+def test_invalid_cursor(cursor):
+    """测试无效游标抛出 InvalidCursorError"""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_keyset_query():
+    """测试游标条件：排序值更早，或排序值相同且 ID 更小"""
+    ts = datetime(2024, 5, 1)
+
+    query = keyset_query({"user_id": "u1"}, "created_at", encode_cursor(ts, "a5"), "article_id")
+
+    assert query["user_id"] == "u1"
+    assert query["$or"] == [
+        {"created_at": {"$lt": ts}},
+        {"created_at": ts, "article_id": {"$lt": "a5"}},
+    ]
+    assert keyset_query({"user_id": "u1"}, "created_at", None) == {"user_id": "u1"}
+
+
+def test_paginate():
+    """测试多取一条判断下一页，游标指向本页最后一条"""
+    docs = [{"id": f"a{i}", "created_at": datetime(2024, 5, 10 - i)} for i in range(3)]
+
+    page, next_cursor = paginate(docs, 2, "created_at")
+
+    assert [d["id"] for d in page] == ["a0", "a1"]
+    assert decode_cursor(next_cursor) == (datetime(2024, 5, 9), "a1")
+    assert paginate(docs, 3, "created_at") == (docs, None)
@@ -0,0 +1,119 @@
+"""
+Test Profiling
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import admin
+from app.config import settings
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.services.metrics_service import timed
+from app.services.profiling import (
+    LoopBlockMonitor,
+    get_slow_request_log,
+    sample_stacks,
+    to_collapsed,
+    to_speedscope,
+)
+from tests.unit.test_jwt_auth import create_test_token
+
+STACKS = Counter(
+    {
+        (("main", "/srv/app/main.py", 1), ("handler", "/srv/app/main.py", 10)): 3,
+        (("main", "/srv/app/main.py", 1),): 1,
+    }
+)
+
+
+def test_collapsed_and_speedscope_export():
+    lines = to_collapsed(STACKS).splitlines()
+    assert lines[0].endswith("handler (/srv/app/main.py:10) 3")
+    assert lines[0].count(";") == 1
+    assert lines[1].endswith(" 1")
+
+    doc = to_speedscope(STACKS, 0.01, "test")
+    profile = doc["profiles"][0]
+    assert [f["name"] for f in doc["shared"]["frames"]] == ["main", "handler"]
+    assert profile["samples"] == [[0, 1], [0]]
+    assert profile["weights"] == [0.03, 0.01]
+
+
+def test_sample_stacks_captures_busy_thread():
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    thread = threading.Thread(target=busy_worker)
+    thread.start()
+    try:
+        stacks = sample_stacks(0.1, 0.005, {thread.ident})
+    finally:
+        stop.set()
+        thread.join()
+
+    assert stacks
+    assert all(any(frame[0] == "busy_worker" for frame in stack) for stack in stacks)
+
+
+@pytest.mark.asyncio
+async def test_loop_block_monitor_records_blocking_stack():
+    monitor = LoopBlockMonitor(threshold=0.05)
+    monitor.start()
+    await asyncio.sleep(0.05)
+
+    def blocking_call():
+        time.sleep(0.3)
+
+    blocking_call()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert len(monitor.blocks) == 1
+    assert "blocking_call" in monitor.blocks[0]["stack"]
+    assert monitor.blocks[0]["blocked_ms"] >= 50
+
+
+def test_slow_request_captures_stage_timings(monkeypatch):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/slow/{item_id}")
+    async def slow(item_id: str):
+        with timed("record_agent_stage", "retrieval"):
+            await asyncio.sleep(0.01)
+        return {"id": item_id}
+
+    monkeypatch.setattr(settings, "slow_request_threshold_seconds", 0.005)
+    TestClient(app).get("/slow/1")
+
+    entry = get_slow_request_log().requests[-1]
+    assert entry["endpoint"] == "/slow/{item_id}"
+    assert [s["stage"] for s in entry["stages"]] == ["agent_stage:retrieval"]
+    assert entry["stages"][0]["duration_ms"] >= 10
+
+
+def test_admin_profiling_requires_admin():
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/v1")
+    client = TestClient(app)
+    url = "/api/v1/admin/profiling/profile?seconds=0.05&interval_ms=5"
+
+    patient = {"Authorization": f"Bearer {create_test_token('u1', 'PATIENT')}"}
+    assert client.get(url, headers=patient).status_code == 403
+
+    headers = {"Authorization": f"Bearer {create_test_token('u2', 'ADMIN')}"}
+    response = client.get(url + "&format=speedscope", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["profiles"][0]["type"] == "sampled"
+
+    too_long = f"/api/v1/admin/profiling/profile?seconds={settings.profiling_max_seconds + 1}"
+    assert client.get(too_long, headers=headers).status_code == 400
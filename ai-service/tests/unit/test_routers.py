@@ -8,6 +8,7 @@ from unittest.mock import AsyncMock, patch
 from app.main import app
 from app.models import Conversation, Article
 from app.middleware import JWTUser, get_current_user
+from app.services import InvalidCursorError
 
 client = TestClient(app)
 
@@ -82,7 +83,7 @@ def test_get_conversations_endpoint(mock_services):
             updated_at="2024-01-01T00:00:00",
         )
     ]
-    mock_conv.get_user_conversations = AsyncMock(return_value=mock_conversations)
+    mock_conv.get_user_conversations = AsyncMock(return_value=(mock_conversations, None))
 
     response = client.get("/api/v1/ai/conversations/user123")
 
@@ -108,7 +109,7 @@ def test_get_articles_endpoint(mock_services):
             created_at="2024-01-01T00:00:00",
         )
     ]
-    mock_article.get_articles = AsyncMock(return_value=(mock_articles, 1))
+    mock_article.get_articles = AsyncMock(return_value=(mock_articles, 1, "next"))
 
     response = client.get("/api/v1/education/articles")
 
@@ -116,6 +117,17 @@ def test_get_articles_endpoint(mock_services):
     data = response.json()
     assert data["total"] == 1
     assert len(data["items"]) > 0
+    assert data["next_cursor"] == "next"
+
+
+def test_get_articles_invalid_cursor(mock_services):
+    """测试无效游标返回 400"""
+    _, _, mock_article = mock_services
+    mock_article.get_articles = AsyncMock(side_effect=InvalidCursorError("bad"))
+
+    response = client.get("/api/v1/education/articles?cursor=bad")
+
+    assert response.status_code == 400
 
 
 def test_get_article_detail_endpoint(mock_services):
@@ -166,3 +178,37 @@ def test_unfavorite_article_endpoint(mock_services):
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
+
+
+def test_article_write_endpoints_require_admin(mock_services):
+    """测试文章写入接口仅管理员可用，写入经过 article_service 使缓存失效"""
+    _, _, mock_article = mock_services
+    mock_article.save_article = AsyncMock()
+    mock_article.delete_article = AsyncMock(return_value=False)
+    article = {
+        "id": "article1",
+        "title": "测试文章",
+        "content": "内容",
+        "category": "高血压",
+        "author": "作者",
+        "created_at": "2024-01-01T00:00:00",
+    }
+
+    assert client.put("/api/v1/education/articles/article1", json=article).status_code == 403
+
+    async def override_admin():
+        return JWTUser(user_id="admin1", role="ADMIN")
+
+    app.dependency_overrides[get_current_user] = override_admin
+    try:
+        response = client.put("/api/v1/education/articles/article1", json=article)
+        assert response.status_code == 200
+        mock_article.save_article.assert_awaited_once()
+
+        response = client.put("/api/v1/education/articles/other", json=article)
+        assert response.status_code == 400
+
+        response = client.delete("/api/v1/education/articles/article1")
+        assert response.status_code == 404
+    finally:
+        app.dependency_overrides[get_current_user] = override_get_current_user
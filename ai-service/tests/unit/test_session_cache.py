@@ -0,0 +1,136 @@
+"""
+Test Session Context Cache
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.models import ChatMessage
+from app.services.conversation_service import ConversationService
+from app.services.session_cache import SessionContextCache, window_key
+
+
+def _payload(seq: int) -> str:
+    return json.dumps({"role": "user", "content": f"消息{seq}", "seq": seq}, ensure_ascii=False)
+
+
+@pytest.fixture
+def redis_client():
+    """Redis 客户端 mock"""
+    client = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client.pipeline.return_value = pipe
+    with patch("app.services.session_cache.get_redis_service") as redis:
+        redis.return_value.client = client
+        yield client
+
+
+@pytest.fixture
+def service():
+    """启用上下文缓存的对话服务"""
+    with patch("app.services.conversation_service.AsyncIOMotorClient"):
+        service = ConversationService()
+    service.collection = MagicMock()
+    service.messages_collection = MagicMock()
+    service.session_cache = MagicMock()
+    service.session_cache.set_header = AsyncMock()
+    service.session_cache.backfill = AsyncMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_get_window_returns_contiguous_tail(redis_client):
+    """测试窗口按 seq 排序、去重，只返回末尾连续的一段并刷新过期时间"""
+    raw = [_payload(seq) for seq in (3, 7, 6, 8, 6)]
+    redis_client.pipeline.return_value.execute = AsyncMock(return_value=[raw, True])
+
+    total, messages = await SessionContextCache().get_window("c1")
+
+    assert total == 9
+    assert [m.content for m in messages] == ["消息6", "消息7", "消息8"]
+    redis_client.pipeline.return_value.expire.assert_called_once()
+    assert redis_client.pipeline.return_value.expire.call_args.args[0] == window_key("c1")
+
+
+@pytest.mark.asyncio
+async def test_read_failure_falls_back(redis_client):
+    """测试 Redis 不可用时返回 None（回退到 MongoDB）"""
+    redis_client.pipeline.return_value.execute = AsyncMock(side_effect=ConnectionError("down"))
+
+    cache = SessionContextCache()
+
+    assert await cache.get_window("c1") is None
+    assert await cache.get_header("c1") is None
+
+
+@pytest.mark.asyncio
+async def test_context_window_served_from_cache(service):
+    """测试活跃会话的上下文完全从缓存读取，不访问 MongoDB"""
+    service.session_cache.get_header = AsyncMock(
+        return_value={
+            "id": "c1",
+            "user_id": "u1",
+            "message_count": 12,
+            "summary": "摘要",
+            "summarized_count": 2,
+        }
+    )
+    service.session_cache.get_window = AsyncMock(
+        return_value=(12, [ChatMessage(role="user", content=f"消息{i}") for i in range(2, 12)])
+    )
+    service.collection.find_one = AsyncMock()
+    service._load_messages = AsyncMock()
+
+    summary, messages = await service.get_context_window("c1")
+
+    assert summary == "摘要"
+    assert len(messages) == 10
+    service.collection.find_one.assert_not_called()
+    service._load_messages.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_reads_mongo_and_backfills(service):
+    """测试缓存未命中时读取 MongoDB 并回填会话头和消息窗口"""
+    header = {"id": "c1", "user_id": "u1", "message_count": 3}
+    messages = [ChatMessage(role="user", content=f"消息{i}") for i in range(3)]
+    service.session_cache.get_header = AsyncMock(return_value=None)
+    service.session_cache.get_window = AsyncMock(return_value=None)
+    service.collection.find_one = AsyncMock(return_value=header)
+    service._load_messages = AsyncMock(return_value=messages)
+
+    conversation = await service.get_conversation_window("c1")
+
+    assert len(conversation.messages) == 3
+    service.session_cache.set_header.assert_awaited_once_with(header)
+    service.session_cache.backfill.assert_awaited_once_with("c1", messages, 0)
+
+
+@pytest.mark.asyncio
+async def test_add_message_writes_through(service):
+    """测试消息落库后写穿透更新缓存"""
+    header = {"id": "c1", "user_id": "u1", "message_count": 5}
+    service.collection.find_one_and_update = AsyncMock(return_value=header)
+    service.messages_collection.update_one = AsyncMock()
+    service.session_cache.append = AsyncMock()
+    service.session_cache.get_window = AsyncMock(
+        return_value=(5, [ChatMessage(role="user", content=f"消息{i}") for i in range(5)])
+    )
+
+    message = ChatMessage(role="user", content="你好")
+    await service.add_message("c1", message)
+
+    service.session_cache.append.assert_awaited_once_with(header, message, 4)
+
+
+@pytest.mark.asyncio
+async def test_patient_context_remembered_per_session(service):
+    """测试患者上下文在会话内缓存，后续轮次未携带时沿用"""
+    service.session_cache.set_patient_context = AsyncMock()
+    service.session_cache.get_patient_context = AsyncMock(return_value={"age": 60})
+
+    assert await service.get_patient_context("c1", {"age": 61}) == {"age": 61}
+    service.session_cache.set_patient_context.assert_awaited_once_with("c1", {"age": 61})
+
+    assert await service.get_patient_context("c1") == {"age": 60}
@@ -0,0 +1,85 @@
+"""
+Test Conversation Summarizer
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.models import ChatMessage, Conversation
+from app.services.summary_service import ConversationSummarizer
+
+
+def _conversation(count: int, summarized_count: int = 0, summary=None):
+    messages = [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"消息{i}")
+        for i in range(count)
+    ]
+    return Conversation(
+        id="conv-1",
+        user_id="user-1",
+        messages=messages,
+        summary=summary,
+        summarized_count=summarized_count,
+    )
+
+
+@pytest.fixture
+def summarizer():
+    """摘要器fixture"""
+    with patch("app.services.summary_service.get_deepseek_client"):
+        summarizer = ConversationSummarizer()
+    summarizer.keep_recent = 4
+    summarizer.deepseek.chat = AsyncMock(return_value={"content": " 新摘要 "})
+    return summarizer
+
+
+def test_needs_summary_thresholds(summarizer):
+    """测试条数和 Token 阈值"""
+    with patch("app.services.summary_service.settings") as settings:
+        settings.summary_trigger_messages = 10
+        settings.summary_trigger_tokens = 100000
+        assert not summarizer.needs_summary(_conversation(4).messages)
+        assert not summarizer.needs_summary(_conversation(9).messages)
+        assert summarizer.needs_summary(_conversation(10).messages)
+
+        settings.summary_trigger_tokens = 10
+        assert summarizer.needs_summary(_conversation(5).messages)
+
+
+@pytest.mark.asyncio
+async def test_summarize_condenses_older_messages(summarizer):
+    """测试只压缩未摘要且不在最近窗口内的消息"""
+    conversation = _conversation(30, summarized_count=10, summary="旧摘要")
+    conversation.messages = conversation.messages[10:]
+
+    with patch("app.services.summary_service.conversation_service") as conv:
+        conv.get_unsummarized_conversation = AsyncMock(return_value=conversation)
+        conv.update_summary = AsyncMock(return_value=True)
+
+        assert await summarizer.summarize("conv-1") is True
+
+    prompt = summarizer.deepseek.chat.call_args.kwargs["messages"]
+    assert "旧摘要" in prompt[1]["content"]
+    assert "消息10" in prompt[1]["content"]
+    assert "消息9\n" not in prompt[1]["content"]
+    assert "消息26" not in prompt[1]["content"]
+    conv.update_summary.assert_awaited_once_with(
+        "conv-1", summary="新摘要", summarized_count=26, expected_count=10
+    )
+
+
+@pytest.mark.asyncio
+async def test_schedule_debounces_per_session(summarizer):
+    """测试同一会话的多次调度只执行一次摘要"""
+    summarizer.summarize = AsyncMock(return_value=True)
+
+    with patch("app.services.summary_service.settings") as settings:
+        settings.summary_enabled = True
+        settings.summary_debounce_seconds = 0.05
+        summarizer.schedule("conv-1")
+        summarizer.schedule("conv-1")
+        summarizer.schedule("conv-2")
+        await asyncio.sleep(0.15)
+
+    assert summarizer.summarize.await_count == 2
+    await summarizer.close()
@@ -0,0 +1,40 @@
+"""
+Test Token Counter
+"""
+
+from unittest.mock import MagicMock
+from app.services.token_counter import (
+    MESSAGE_OVERHEAD_TOKENS,
+    count_message_tokens,
+    count_tokens,
+    extract_usage,
+)
+
+
+def test_count_tokens_empty():
+    """测试空文本"""
+    assert count_tokens("") == 0
+
+
+def test_count_tokens_cjk_weighs_more_than_ascii():
+    """测试中文字符按更高比例估算"""
+    assert count_tokens("高血压患者饮食") == 4  # 7 * 0.6
+    assert count_tokens("hypertens") == 3  # 9 * 0.3
+    assert count_tokens("a") == 1
+
+
+def test_count_message_tokens_adds_overhead():
+    """测试消息格式开销"""
+    messages = [
+        {"role": "system", "content": "hello world"},
+        {"role": "user", "content": "你好"},
+    ]
+    expected = count_tokens("hello world") + count_tokens("你好") + 2 * MESSAGE_OVERHEAD_TOKENS
+    assert count_message_tokens(messages) == expected
+
+
+def test_extract_usage():
+    """测试从对象、字典和 None 中提取用量"""
+    assert extract_usage(None) == (0, 0)
+    assert extract_usage({"prompt_tokens": 12, "completion_tokens": 3}) == (12, 3)
+    assert extract_usage(MagicMock(prompt_tokens=7, completion_tokens=2)) == (7, 2)
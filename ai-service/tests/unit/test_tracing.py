@@ -0,0 +1,57 @@
+"""
+Test Tracing
+"""
+
+import pytest
+
+from app.core import tracing
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (  # noqa: E402
+    InMemorySpanExporter,
+)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """用内存导出器收集 span（不修改全局 TracerProvider）"""
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing.trace, "get_tracer", provider.get_tracer)
+    return exporter
+
+
+def test_nested_spans_with_attributes(exporter):
+    with tracing.start_span("agent.chat", session_id="s1", patient=None):
+        with tracing.start_span("rag.search", top_k=3):
+            tracing.set_span_attributes(results=2, top_score=0.9, intent=["x"])
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert spans["rag.search"].parent.span_id == spans["agent.chat"].context.span_id
+    assert dict(spans["agent.chat"].attributes) == {"session_id": "s1"}
+    assert dict(spans["rag.search"].attributes) == {
+        "top_k": 3,
+        "results": 2,
+        "top_score": 0.9,
+        "intent": "['x']",
+    }
+
+
+def test_span_records_exception(exporter):
+    with pytest.raises(RuntimeError):
+        with tracing.start_span("intent.recognize"):
+            raise RuntimeError("boom")
+
+    (span,) = exporter.get_finished_spans()
+    assert not span.status.is_ok
+    assert span.events[0].name == "exception"
+
+
+def test_noop_without_opentelemetry(monkeypatch):
+    monkeypatch.setattr(tracing, "trace", None)
+
+    with tracing.start_span("agent.chat") as span:
+        tracing.set_span_attributes(intent="chat")
+    assert span is None